@@ -26,6 +26,9 @@
 # Imports
 #
 
+from alphapy.cache import data_fingerprint
+from alphapy.cache import run_stage
+from alphapy.cache import StageCache
 from alphapy.data import get_data
 from alphapy.data import sample_data
 from alphapy.data import shuffle_data
@@ -36,6 +39,7 @@ from alphapy.features import create_crosstabs
 from alphapy.features import create_features
 from alphapy.features import create_interactions
 from alphapy.features import drop_features
+from alphapy.features import get_predict_features
 from alphapy.features import remove_lv_features
 from alphapy.features import save_features
 from alphapy.features import select_features
@@ -43,22 +47,20 @@ from alphapy.globals import CSEP, PSEP, SSEP, USEP
 from alphapy.globals import ModelType
 from alphapy.globals import Partition, datasets
 from alphapy.globals import WILDCARD
-from alphapy.model import first_fit
+from alphapy.matrix import FeatureMatrix
+from alphapy.model import fit_algorithms
 from alphapy.model import generate_metrics
 from alphapy.model import get_model_config
 from alphapy.model import get_class_weights
 from alphapy.model import load_feature_map
 from alphapy.model import load_predictor
-from alphapy.model import make_predictions
 from alphapy.model import Model
 from alphapy.model import predict_best
 from alphapy.model import predict_blend
 from alphapy.model import save_model
 from alphapy.model import save_predictions
-from alphapy.optimize import hyper_grid_search
-from alphapy.optimize import rfe_search
-from alphapy.optimize import rfecv_search
 from alphapy.plots import generate_plots
+from alphapy.server import serve_predictions
 from alphapy.utilities import np_store_data
 
 import argparse
@@ -105,15 +107,15 @@ def training_pipeline(model):
 
     # Unpack the model specifications
 
-    calibration = model.specs['calibration']
+    directory = model.specs['directory']
     drop = model.specs['drop']
     feature_selection = model.specs['feature_selection']
-    grid_search = model.specs['grid_search']
+    memory_map = model.specs['memory_map']
     model_type = model.specs['model_type']
     predict_mode = model.specs['predict_mode']
-    rfe = model.specs['rfe']
     sampling = model.specs['sampling']
     scorer = model.specs['scorer']
+    stage_cache = model.specs['stage_cache']
     target = model.specs['target']
 
     # Get train and test data
@@ -160,9 +162,18 @@ def training_pipeline(model):
         raise IndexError("The number of training and test columns [%d, %d] must match." %
                          (X_train.shape[1], X_test.shape[1]))
 
+    # Reuse the output of any unchanged stages [if specified]
+
+    if stage_cache:
+        cache = StageCache(SSEP.join([directory, 'data']), stage_cache)
+        key = data_fingerprint(X, y_train, split_point)
+    else:
+        cache = key = None
+
     # Apply treatments to the feature matrix
 
-    all_features = apply_treatments(model, X)
+    all_features, key = run_stage(cache, key, model, 'treatments',
+                                  apply_treatments, X)
     X_train, X_test = np.array_split(all_features, [split_point])
     model = save_features(model, X_train, X_test)
 
@@ -171,22 +182,31 @@ def training_pipeline(model):
     if model_type == ModelType.classification:
         create_crosstabs(model)
 
+    # Allocate the feature matrix. Each stage appends its columns
+    # in place, and the train and test partitions are views.
+
+    data_dir = SSEP.join([directory, 'data']) if memory_map else None
+    fm = FeatureMatrix(all_features.shape[0], split_point, directory=data_dir)
+
     # Create initial features
 
-    all_features = create_features(model, all_features)
-    X_train, X_test = np.array_split(all_features, [split_point])
+    all_features, key = run_stage(cache, key, model, 'features',
+                                  create_features, all_features, fm)
+    X_train, X_test = fm.split()
     model = save_features(model, X_train, X_test)
 
     # Generate interactions
 
-    all_features = create_interactions(model, all_features)
-    X_train, X_test = np.array_split(all_features, [split_point])
+    all_features, key = run_stage(cache, key, model, 'interactions',
+                                  create_interactions, all_features, fm)
+    X_train, X_test = fm.split()
     model = save_features(model, X_train, X_test)
 
     # Remove low-variance features
 
-    all_features = remove_lv_features(model, all_features)
-    X_train, X_test = np.array_split(all_features, [split_point])
+    all_features, key = run_stage(cache, key, model, 'variance',
+                                  remove_lv_features, all_features, fm)
+    X_train, X_test = fm.split()
     model = save_features(model, X_train, X_test)
 
     # Shuffle the data [if specified]
@@ -218,33 +238,7 @@ def training_pipeline(model):
         raise KeyError("Scorer function %s not found" % scorer)
 
     # Model Selection
-
-    logger.info("Selecting Models")
-
-    for algo in model.algolist:
-        logger.info("Algorithm: %s", algo)
-        # select estimator
-        try:
-            estimator = estimators[algo]
-            scoring = estimator.scoring
-            est = estimator.estimator
-        except KeyError:
-            logger.info("Algorithm %s not found", algo)
-        # initial fit
-        model = first_fit(model, algo, est)
-        # recursive feature elimination
-        if rfe:
-            if scoring:
-                model = rfecv_search(model, algo)
-            elif hasattr(est, "coef_"):
-                model = rfe_search(model, algo)
-            else:
-                logger.info("No RFE Available for %s", algo)
-        # grid search
-        if grid_search:
-            model = hyper_grid_search(model, estimator)
-        # predictions
-        model = make_predictions(model, algo, calibration)
+    model = fit_algorithms(model, estimators)
 
     # Create a blended estimator
 
@@ -268,6 +262,9 @@ def training_pipeline(model):
     # Save best features and predictions
     save_model(model, 'BEST', Partition.test)
 
+    # Delete the file of any memory-mapped feature matrix
+    fm.close()
+
     # Return the model
     return model
 
@@ -300,12 +297,7 @@ def prediction_pipeline(model):
     # Unpack the model specifications
 
     directory = model.specs['directory']
-    drop = model.specs['drop']
-    extension = model.specs['extension']
-    feature_selection = model.specs['feature_selection']
     model_type = model.specs['model_type']
-    rfe = model.specs['rfe']
-    separator = model.specs['separator']
 
     # Get all data. We need original train and test for interactions.
 
@@ -315,50 +307,8 @@ def prediction_pipeline(model):
     # Load feature_map
     model = load_feature_map(model, directory)
 
-    # Drop features
-
-    logger.info("Dropping Features: %s", drop)
-    X_predict = drop_features(X_predict, drop)
-
-    # Log feature statistics
-
-    logger.info("Feature Statistics")
-    logger.info("Number of Prediction Rows    : %d", X_predict.shape[0])
-    logger.info("Number of Prediction Columns : %d", X_predict.shape[1])
-
-    # Apply treatments to the feature matrix
-    all_features = apply_treatments(model, X_predict)
-
-    # Create initial features
-    all_features = create_features(model, all_features)
-
-    # Generate interactions
-    all_features = create_interactions(model, all_features)
-
-    # Remove low-variance features
-    all_features = remove_lv_features(model, all_features)
-
-    # Load the univariate support vector, if any
-
-    if feature_selection:
-        logger.info("Getting Univariate Support")
-        try:
-            support = model.feature_map['uni_support']
-            all_features = all_features[:, support]
-            logger.info("New Feature Count : %d", all_features.shape[1])
-        except:
-            logger.info("No Univariate Support")
-
-    # Load the RFE support vector, if any
-
-    if rfe:
-        logger.info("Getting RFE Support")
-        try:
-            support = model.feature_map['rfe_support']
-            all_features = all_features[:, support]
-            logger.info("New Feature Count : %d", all_features.shape[1])
-        except:
-            logger.info("No RFE Support")
+    # Transform the data into the features of the trained model
+    all_features = get_predict_features(model, X_predict)
 
     # Load predictor
     predictor = load_predictor(directory)
@@ -427,7 +377,7 @@ def main(args=None):
     (2) Parse the command line arguments.
     (3) Get the model configuration.
     (4) Create the model object.
-    (5) Call the main AlphaPy pipeline.
+    (5) Call the main AlphaPy pipeline, or serve predictions.
 
     """
 
@@ -455,13 +405,16 @@ def main(args=None):
     parser.add_mutually_exclusive_group(required=False)
     parser.add_argument('--predict', dest='predict_mode', action='store_true')
     parser.add_argument('--train', dest='predict_mode', action='store_false')
-    parser.set_defaults(predict_mode=False)
+    parser.add_argument('--serve', dest='serve_mode', action='store_true')
+    parser.add_argument('--host', dest='host', default='localhost')
+    parser.add_argument('--port', dest='port', type=int, default=8765)
+    parser.set_defaults(predict_mode=False, serve_mode=False)
     args = parser.parse_args()
 
     # Read configuration file
 
     specs = get_model_config()
-    specs['predict_mode'] = args.predict_mode
+    specs['predict_mode'] = args.predict_mode or args.serve_mode
 
     # Create directories if necessary
 
@@ -477,10 +430,13 @@ def main(args=None):
     logger.info("Creating Model")
     model = Model(specs)
 
-    # Start the pipeline
+    # Start the pipeline, or serve predictions from the saved model
 
-    logger.info("Calling Pipeline")
-    model = main_pipeline(model)
+    if args.serve_mode:
+        serve_predictions(model, args.host, args.port)
+    else:
+        logger.info("Calling Pipeline")
+        model = main_pipeline(model)
 
     # Complete the pipeline
 
@@ -29,7 +29,10 @@
 from alphapy.__main__ import main_pipeline
 from alphapy.frame import load_frames
 from alphapy.frame import write_frame
+from alphapy.globals import Partition, datasets
 from alphapy.globals import SSEP, USEP
+from alphapy.panel import group_panel
+from alphapy.panel import Panel
 from alphapy.utilities import subtract_days
 
 from datetime import timedelta
@@ -129,19 +132,44 @@ class Analysis(object):
         return self.name
 
 
+#
+# Function input_frame
+#
+
+def input_frame(df):
+    r"""Convert a frame to the layout of an input file.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The frame indexed by date.
+
+    Returns
+    -------
+    input_df : pandas.DataFrame
+        The frame with the ``date`` as its first column, in the same
+        types as the frame read back from the input file.
+
+    """
+    input_df = df.rename_axis('date').reset_index()
+    input_df['date'] = input_df['date'].astype(str)
+    return input_df.infer_objects()
+
+
 #
 # Function run_analysis
 #
 
 def run_analysis(analysis, forecast_period, leaders,
-                 predict_history, splits=True):
+                 predict_history, splits=True, write_input=True):
     r"""Run an analysis for a given model and group.
 
     First, the data are loaded for each member of the analysis group.
     Then, the target value is lagged for the ``forecast_period``, and
     any ``leaders`` are lagged as well. Each frame is split along
     the ``predict_date`` from the ``analysis``, and finally the
-    train and test files are generated.
+    train and test files are generated. The same frames are passed
+    to the model pipeline in memory, so they are not read back.
 
     Parameters
     ----------
@@ -154,6 +182,10 @@ def run_analysis(analysis, forecast_period, leaders,
     splits : bool, optional
         If ``True``, then the data for each member of the analysis
         group are in separate files.
+    write_input : bool, optional
+        If ``True``, then the train and test frames are also written
+        to the ``input`` directory, e.g., for running ``alphapy``
+        on the same data later.
 
     Returns
     -------
@@ -168,12 +200,6 @@ def run_analysis(analysis, forecast_period, leaders,
     model = analysis.model
     group = analysis.group
 
-    # Unpack model data
-
-    predict_file = model.predict_file
-    test_file = model.test_file
-    train_file = model.train_file
-
     # Unpack model specifications
 
     directory = model.specs['directory']
@@ -187,67 +213,81 @@ def run_analysis(analysis, forecast_period, leaders,
     # Calculate split date
     split_date = subtract_days(predict_date, predict_history)
 
-    # Load the data frames
-    data_frames = load_frames(group, directory, extension, separator, splits)
+    # Stack the member frames into one panel
 
-    # Create dataframes
+    if splits:
+        panel = group_panel(group, directory, extension, separator)
+    else:
+        data_frames = load_frames(group, directory, extension, separator)
+        panel = Panel(data_frames, [group.name][:len(data_frames)], group.space)
+        del data_frames
+
+    # Shift the target and any leading features within each member,
+    # in place, as the stacked rows are only used for this analysis
+
+    shifted = {}
+    if forecast_period > 0:
+        shifted[target] = panel.shift(target, -forecast_period)
+    if leaders:
+        for leader in leaders:
+            shifted[leader] = panel.shift(leader, -1)
+    df = panel.df
+    for column in shifted:
+        df[column] = shifted[column]
+    del shifted
+
+    # Subset all of the members in one pass
+
+    dates = panel.dates
+    recent = (dates >= split_date) & (dates <= panel.last_dates())
+    if predict_mode:
+        predict_frame = df.loc[recent]
+        for i in range(len(panel.tags) - panel.member_count(recent)):
+            logger.info("A prediction frame has zero rows. Check prediction date.")
+    else:
+        # split data into train and test
+        history = (dates >= train_date) & (dates < split_date)
+        trained = panel.member_any(history)
+        n_trained = panel.member_count(history)
+        for i in range(len(panel.tags) - n_trained):
+            logger.warning("A training frame has zero rows. Check data source.")
+        for i in range(n_trained - panel.member_count(recent & trained)):
+            logger.info("A testing frame has zero rows. Check prediction date.")
+        train_frame = df.loc[history].dropna()
+        test_frame = df.loc[recent & trained].dropna(subset=[target])
+
+    # Restore the member name as the first column
 
     if predict_mode:
-        # create predict frame
-        predict_frame = pd.DataFrame()
+        partitions = {Partition.predict : predict_frame}
+        del predict_frame
     else:
-        # create train and test frames
-        train_frame = pd.DataFrame()
-        test_frame = pd.DataFrame()
-
-    # Subset each individual frame and add to the master frame
-
-    for df in data_frames:
-        last_date = df.index[-1]
-        # shift the target for the forecast period
-        if forecast_period > 0:
-            df[target] = df[target].shift(-forecast_period)
-        # shift any leading features if necessary
-        if leaders:
-            df[leaders] = df[leaders].shift(-1)
-        # get frame subsets
-        if predict_mode:
-            new_predict = df.loc[(df.index >= split_date) & (df.index <= last_date)]
-            if len(new_predict) > 0:
-                predict_frame = predict_frame.append(new_predict)
-            else:
-                logger.info("A prediction frame has zero rows. Check prediction date.")
+        partitions = {Partition.train : train_frame,
+                      Partition.test : test_frame}
+        del train_frame, test_frame
+    del panel, df
+    for partition, frame in partitions.items():
+        if splits:
+            partitions[partition] = frame.reset_index(level=0)
         else:
-            # split data into train and test
-            new_train = df.loc[(df.index >= train_date) & (df.index < split_date)]
-            if len(new_train) > 0:
-                new_train = new_train.dropna()
-                train_frame = train_frame.append(new_train)
-                new_test = df.loc[(df.index >= split_date) & (df.index <= last_date)]
-                if len(new_test) > 0:
-                    new_test = new_test.dropna(subset=[target])
-                    test_frame = test_frame.append(new_test)
-                else:
-                    logger.info("A testing frame has zero rows. Check prediction date.")
-            else:
-                logger.warning("A training frame has zero rows. Check data source.")
-
-    # Write out the frames for input into the AlphaPy pipeline
+            partitions[partition] = frame.reset_index(level=0, drop=True)
+
+    # Hand the frames to the AlphaPy pipeline in memory, and write
+    # them out for input into later runs
 
     directory = SSEP.join([directory, 'input'])
-    if predict_mode:
-        # write out the predict frame
-        write_frame(predict_frame, directory, predict_file, extension, separator,
-                    index=True, index_label='date')
-    else:
-        # write out the train and test frames
-        write_frame(train_frame, directory, train_file, extension, separator,
-                    index=True, index_label='date')
-        write_frame(test_frame, directory, test_file, extension, separator,
-                    index=True, index_label='date')
+    for partition in list(partitions):
+        frame = partitions.pop(partition)
+        if write_input:
+            write_frame(frame, directory, datasets[partition], extension,
+                        separator, index=True, index_label='date')
+        model.partitions[partition] = input_frame(frame)
+        del frame
+
+    # Run the AlphaPy pipeline, then release the input frames
 
-    # Run the AlphaPy pipeline
     analysis.model = main_pipeline(model)
+    analysis.model.partitions = {}
 
     # Return the analysis
     return analysis
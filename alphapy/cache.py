@@ -0,0 +1,259 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : cache
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.globals import PSEP, SSEP, USEP
+
+import glob
+import hashlib
+import json
+import logging
+import numpy as np
+import os
+import pandas as pd
+from sklearn.externals import joblib
+
+
+#
+# Initialize logger
+#
+
+logger = logging.getLogger(__name__)
+
+
+#
+# The model specifications that determine the output of each stage,
+# i.e., every specification read by the stage function and the
+# functions that it calls, except for n_jobs and verbosity
+#
+
+stage_specs = {
+    'treatments'   : ['treatments'],
+    'features'     : ['clustering', 'cluster_inc', 'cluster_max',
+                      'cluster_min', 'counts', 'encoder', 'factors',
+                      'isomap', 'iso_components', 'iso_neighbors',
+                      'logtransform', 'model_type', 'ngrams_max', 'numpy',
+                      'pca', 'pca_inc', 'pca_max', 'pca_min', 'pca_whiten',
+                      'pvalue_level', 'rounding', 'scaler_option', 'scaler_type', 'scipy',
+                      'seed', 'sentinel', 'target_value', 'tsne',
+                      'tsne_components', 'tsne_learn_rate',
+                      'tsne_perplexity', 'vectorize'],
+    'interactions' : ['interactions', 'isample_pct', 'model_type',
+                      'poly_degree', 'seed'],
+    'variance'     : ['lv_remove', 'lv_threshold']
+    }
+
+
+#
+# Function data_fingerprint
+#
+
+def data_fingerprint(*args):
+    r"""Get a digest of the contents of the given data.
+
+    Parameters
+    ----------
+    args : list
+        Any dataframes, series, arrays, or other values.
+
+    Returns
+    -------
+    digest : str
+        The hexadecimal SHA-1 digest of all of the values.
+
+    Notes
+    -----
+    Dataframes are hashed row by row with vectorized pandas hashing,
+    together with their column names and data types.
+
+    """
+    h = hashlib.sha1()
+    for arg in args:
+        if isinstance(arg, np.ndarray):
+            arg = pd.DataFrame(arg) if arg.ndim > 1 else pd.Series(arg)
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            hashes = pd.util.hash_pandas_object(arg, index=False)
+            h.update(hashes.values.tobytes())
+            if isinstance(arg, pd.DataFrame):
+                h.update(repr(list(arg.columns)).encode('utf-8'))
+                h.update(repr(list(arg.dtypes.astype(str))).encode('utf-8'))
+            else:
+                h.update(str(arg.dtype).encode('utf-8'))
+        else:
+            h.update(repr(arg).encode('utf-8'))
+    return h.hexdigest()
+
+
+#
+# Class StageCache
+#
+
+class StageCache(object):
+    """Store the output of the pipeline stages by content.
+
+    The key of each stage combines the key of the previous stage with
+    the model specifications of the stage, so a change to the data or
+    to any earlier stage changes the keys of all later stages.
+
+    Parameters
+    ----------
+    directory : str
+        Full directory specification of the cache files.
+    max_size : float
+        The maximum number of megabytes of all the cache files. When
+        the cache exceeds this size, the least recently used files
+        are removed.
+
+    Examples
+    --------
+
+    >>> cache = StageCache('./data', 500)
+    >>> key = cache.stage_key(data_fingerprint(X), 'treatments', model.specs)
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 directory,
+                 max_size):
+        # code
+        self.directory = directory
+        self.max_bytes = int(max_size * 1e6)
+
+    # __str__
+
+    def __str__(self):
+        return "StageCache(%s)" % self.directory
+
+    # function stage_key
+
+    def stage_key(self, parent_key, stage, specs):
+        r"""Get the key of a stage from its input and its specifications."""
+        stage_values = {k : specs.get(k) for k in stage_specs[stage]}
+        text = json.dumps([parent_key, stage, stage_values],
+                          sort_keys=True, default=str)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    # function filename
+
+    def filename(self, stage, key):
+        file_only = PSEP.join([USEP.join(['stage', stage, key]), 'pkl'])
+        return SSEP.join([self.directory, file_only])
+
+    # function get
+
+    def get(self, stage, key):
+        r"""Get the cached output of a stage, or ``None``."""
+        filename = self.filename(stage, key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            value = joblib.load(filename)
+            # mark the file as the most recently used
+            os.utime(filename, None)
+        except:
+            logger.info("Could not read cache file %s", filename)
+            value = None
+        return value
+
+    # function put
+
+    def put(self, stage, key, value):
+        r"""Store the output of a stage, then enforce the size limit."""
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        joblib.dump(value, self.filename(stage, key))
+        self.evict()
+
+    # function evict
+
+    def evict(self):
+        r"""Remove the least recently used files above the size limit."""
+        search_path = SSEP.join([self.directory, 'stage_*.pkl'])
+        filenames = sorted(glob.glob(search_path), key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in filenames)
+        while total > self.max_bytes and len(filenames) > 1:
+            oldest = filenames.pop(0)
+            logger.info("Evicting cache file %s", oldest)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+
+#
+# Function run_stage
+#
+
+def run_stage(cache, key, model, stage, func, X, fm=None):
+    r"""Run a pipeline stage, or restore its output from the cache.
+
+    Parameters
+    ----------
+    cache : alphapy.StageCache
+        The stage cache, or ``None`` to always run the stage.
+    key : str
+        The key of the previous stage, or the fingerprint of the data.
+    model : alphapy.Model
+        The model object with the specifications.
+    stage : str
+        The name of the stage in ``stage_specs``.
+    func : function
+        The stage function, called as ``func(model, X)``, or as
+        ``func(model, X, fm)`` with a feature matrix.
+    X : pandas.DataFrame or numpy array
+        The input features of the stage.
+    fm : alphapy.FeatureMatrix, optional
+        The feature matrix that holds the output of the stage.
+
+    Returns
+    -------
+    all_features : pandas.DataFrame or numpy array
+        The output features of the stage.
+    key : str
+        The key of this stage.
+
+    Notes
+    -----
+    The feature map is cached with the features, because the fitted
+    transformers are needed to transform the prediction data.
+
+    """
+    if cache is None:
+        return func(model, X) if fm is None else func(model, X, fm), key
+    key = cache.stage_key(key, stage, model.specs)
+    value = cache.get(stage, key)
+    if value is not None:
+        logger.info("Using cached %s stage %s", stage, key)
+        all_features, model.feature_map = value
+        if fm is not None:
+            fm.ncols = 0
+            fm.append(all_features)
+            all_features = fm.values
+    else:
+        all_features = func(model, X) if fm is None else func(model, X, fm)
+        cache.put(stage, key, (all_features, model.feature_map))
+    return all_features, key
@@ -26,22 +26,27 @@
 # Imports
 #
 
+from alphapy.frame import downcast_frame
 from alphapy.frame import Frame
 from alphapy.frame import frame_name
+from alphapy.frame import read_chunked_frame
 from alphapy.frame import read_frame
+from alphapy.frame import write_frame
 from alphapy.globals import ModelType
 from alphapy.globals import Partition, datasets
-from alphapy.globals import PSEP, SSEP
+from alphapy.globals import PSEP, SSEP, USEP
 from alphapy.globals import SamplingMethod
 from alphapy.globals import WILDCARD
+from alphapy.space import Space
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from dateutil.tz import tzlocal
 from datetime import timedelta
 from imblearn.combine import SMOTEENN
 from imblearn.combine import SMOTETomek
 from imblearn.ensemble import BalanceCascade
 from imblearn.ensemble import EasyEnsemble
-from imblearn.over_sampling import RandomOverSampler
 from imblearn.over_sampling import SMOTE
 from imblearn.under_sampling import ClusterCentroids
 from imblearn.under_sampling import CondensedNearestNeighbour
@@ -50,17 +55,20 @@ from imblearn.under_sampling import InstanceHardnessThreshold
 from imblearn.under_sampling import NearMiss
 from imblearn.under_sampling import NeighbourhoodCleaningRule
 from imblearn.under_sampling import OneSidedSelection
-from imblearn.under_sampling import RandomUnderSampler
 from imblearn.under_sampling import RepeatedEditedNearestNeighbours
 from imblearn.under_sampling import TomekLinks
+from io import StringIO
 import logging
 import numpy as np
+import os
 import pandas as pd
 import pandas_datareader.data as web
 import re
 import requests
+import time
 from scipy import sparse
 from sklearn.preprocessing import LabelEncoder
+from sklearn.utils.validation import has_fit_parameter
 
 
 #
@@ -70,6 +78,13 @@ from sklearn.preprocessing import LabelEncoder
 logger = logging.getLogger(__name__)
 
 
+#
+# Sources of the resampled frames, keyed by frame name
+#
+
+resample_cache = {}
+
+
 #
 # Function get_data
 #
@@ -98,6 +113,7 @@ def get_data(model, partition):
     # Extract the model data
 
     directory = model.specs['directory']
+    downcast = model.specs['downcast']
     extension = model.specs['extension']
     features = model.specs['features']
     model_type = model.specs['model_type']
@@ -106,11 +122,29 @@ def get_data(model, partition):
     test_file = model.test_file
     train_file = model.train_file
 
-    # Read in the file
+    # Read in the file, unless the frame is already in memory, and
+    # release the frame of the model once the data are extracted
 
     filename = datasets[partition]
     input_dir = SSEP.join([directory, 'input'])
-    df = read_frame(input_dir, filename, extension, separator)
+    columns = None if features == WILDCARD else list(features) + [target]
+    if partition == Partition.train:
+        df = model.partitions.pop(partition, None)
+    else:
+        # the test and prediction frames are saved with the predictions
+        df = model.partitions.get(partition)
+    if df is not None:
+        logger.info("Found %s data in memory", partition)
+        if downcast:
+            if columns:
+                df = df[[c for c in columns if c in df.columns]]
+            df = downcast_frame(df.copy())
+    elif downcast:
+        # read only the features and the target, in smaller types
+        df = read_chunked_frame(input_dir, filename, extension, separator,
+                                columns=columns)
+    else:
+        df = read_frame(input_dir, filename, extension, separator)
 
     # Assign target and drop it if necessary
 
@@ -145,6 +179,42 @@ def get_data(model, partition):
     return X, y
 
 
+#
+# Function permute_rows
+#
+
+def permute_rows(X, indices, block_size=64):
+    r"""Reorder the rows of a matrix in place.
+
+    Parameters
+    ----------
+    X : numpy array or pandas.DataFrame
+        The matrix to reorder.
+    indices : numpy array
+        The new order of the rows.
+    block_size : int, optional
+        The number of columns to reorder at a time.
+
+    Returns
+    -------
+    X : numpy array or pandas.DataFrame
+        The reordered matrix.
+
+    Notes
+    -----
+    A two-dimensional array, e.g., a view of the feature matrix, is
+    reordered a block of columns at a time, so only one block is
+    copied instead of the whole matrix. Any other type is copied.
+
+    """
+    if isinstance(X, np.ndarray) and X.ndim == 2:
+        for start in range(0, X.shape[1], block_size):
+            end = start + block_size
+            X[:, start:end] = X[indices, start:end]
+        return X
+    return X[indices]
+
+
 #
 # Function shuffle_data
 #
@@ -180,7 +250,7 @@ def shuffle_data(model):
         logger.info("Shuffling Training Data")
         np.random.seed(seed)
         new_indices = np.random.permutation(y_train.size)
-        model.X_train = X_train[new_indices]
+        model.X_train = permute_rows(X_train, new_indices)
         model.y_train = y_train[new_indices]
     else:
         logger.info("Skipping Shuffling")
@@ -188,6 +258,177 @@ def shuffle_data(model):
     return model
 
 
+#
+# Function get_sample_rows
+#
+
+def get_sample_rows(y, seed=None):
+    r"""Get the rows of a random undersample.
+
+    Parameters
+    ----------
+    y : numpy array
+        The training labels.
+    seed : int, optional
+        The seed of the random number generator.
+
+    Returns
+    -------
+    rows : numpy array (int)
+        The indices of the sampled rows, in their original order.
+
+    Notes
+    -----
+    Undersampling keeps as many rows of each class as there are
+    in the minority class.
+
+    """
+    rng = np.random.RandomState(seed)
+    y = np.asarray(y)
+    uv, uc = np.unique(y, return_counts=True)
+    keep = [rng.choice(np.flatnonzero(y == value), uc.min(), replace=False)
+            for value in uv]
+    return np.sort(np.concatenate(keep))
+
+
+#
+# Function get_sample_counts
+#
+
+def get_sample_counts(y, ratio, seed=None):
+    r"""Get the number of copies of each row for a random oversample.
+
+    Parameters
+    ----------
+    y : numpy array
+        The training labels.
+    ratio : float
+        The number of new copies of the minority class as a multiple
+        of its size.
+    seed : int, optional
+        The seed of the random number generator.
+
+    Returns
+    -------
+    counts : numpy array (int)
+        The number of times that each row is in the sample, which
+        is at least one.
+
+    Notes
+    -----
+    Oversampling draws the new rows of the minority class with
+    replacement.
+
+    """
+    rng = np.random.RandomState(seed)
+    y = np.asarray(y)
+    uv, uc = np.unique(y, return_counts=True)
+    counts = np.ones(len(y), dtype=int)
+    rows = np.flatnonzero(y == uv[np.argmin(uc)])
+    extra = rng.choice(rows, int(ratio * len(rows)), replace=True)
+    counts += np.bincount(extra, minlength=len(y))
+    return counts
+
+
+#
+# Function sampled_rows
+#
+
+def sampled_rows(model, X=None):
+    r"""Get the training rows of the sample for fitting an estimator.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object with the training data.
+    X : numpy array, optional
+        The training features, e.g., a subset of the columns of
+        ``model.X_train``.
+
+    Returns
+    -------
+    X : numpy array
+        The features of the sampled rows.
+    y : numpy array
+        The labels of the sampled rows.
+
+    Notes
+    -----
+    Random sampling is stored as the rows of an undersample in
+    ``model.sample_rows``, or as the number of copies of each row of
+    an oversample in ``model.sample_counts``, so the sampled rows are
+    only copied for the duration of a fit. Use ``sampled_fit`` for an
+    estimator that accepts a ``sample_weight``, so that the rows of
+    an oversample are not copied at all.
+
+    """
+    X, y, _ = sampled_fit(model, None, X)
+    return X, y
+
+
+#
+# Function sampled_fit
+#
+
+def sampled_fit(model, est=None, X=None, class_weights=None):
+    r"""Get the training data and sample weights for fitting an estimator.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object with the training data.
+    est : estimator, optional
+        The estimator to fit. If its ``fit`` has no ``sample_weight``,
+        or if no estimator is given, then the rows of an oversample
+        are copied.
+    X : numpy array, optional
+        The training features, e.g., a subset of the columns of
+        ``model.X_train``.
+    class_weights : list, optional
+        The weight of each training row, from ``get_class_weights``.
+
+    Returns
+    -------
+    X : numpy array
+        The training features.
+    y : numpy array
+        The training labels.
+    sample_weight : numpy array
+        The weight of each row of ``X``, or ``None`` for equal weights.
+
+    Notes
+    -----
+    The rows of an undersample are selected from the training data,
+    so the estimator never sees the rows that were left out. The
+    number of copies of each row of an oversample is the same as an
+    integer weight for the row, so an estimator that accepts a
+    ``sample_weight`` is fit on the training data as is, with the
+    counts multiplied by any class weights.
+
+    """
+    X = model.X_train if X is None else X
+    y = model.y_train
+    rows = model.sample_rows
+    counts = model.sample_counts
+    if class_weights is None:
+        weights = None
+    else:
+        weights = np.asarray(class_weights, dtype=float)
+    if rows is not None:
+        if weights is not None:
+            weights = weights[rows]
+        return X[rows], np.asarray(y)[rows], weights
+    if counts is None:
+        return X, y, weights
+    if est is not None and has_fit_parameter(est, 'sample_weight'):
+        weights = counts if weights is None else counts * weights
+        return X, y, weights
+    indices = np.repeat(np.arange(len(counts)), counts)
+    if weights is not None:
+        weights = weights[indices]
+    return X[indices], np.asarray(y)[indices], weights
+
+
 #
 # Function sample_data
 #
@@ -216,6 +457,7 @@ def sample_data(model):
 
     sampling_method = model.specs['sampling_method']
     sampling_ratio = model.specs['sampling_ratio']
+    seed = model.specs['seed']
     target = model.specs['target']
     target_value = model.specs['target_value']
 
@@ -238,8 +480,9 @@ def sample_data(model):
 
     # Choose the sampling method.
 
-    if sampling_method == SamplingMethod.under_random:
-        sampler = RandomUnderSampler()
+    if sampling_method in [SamplingMethod.under_random,
+                           SamplingMethod.over_random]:
+        sampler = None
     elif sampling_method == SamplingMethod.under_tomek:
         sampler = TomekLinks()
     elif sampling_method == SamplingMethod.under_cluster:
@@ -248,8 +491,6 @@ def sample_data(model):
         sampler = NearMiss(version=1)
     elif sampling_method == SamplingMethod.under_ncr:
         sampler = NeighbourhoodCleaningRule(size_ngh=51)
-    elif sampling_method == SamplingMethod.over_random:
-        sampler = RandomOverSampler(ratio=ratio)
     elif sampling_method == SamplingMethod.over_smote:
         sampler = SMOTE(ratio=ratio, kind='regular')
     elif sampling_method == SamplingMethod.over_smoteb:
@@ -267,8 +508,20 @@ def sample_data(model):
     else:
         raise ValueError("Unknown Sampling Method %s" % sampling_method)
 
-    # Get the newly sampled features.
+    # Get the newly sampled features. Random sampling only selects
+    # rows, so just record the rows of an undersample, or the number
+    # of copies of each row of an oversample.
 
+    if sampling_method == SamplingMethod.under_random:
+        model.sample_rows = get_sample_rows(y_train, seed)
+        logger.info("Original Samples : %d", len(y_train))
+        logger.info("New Samples      : %d", len(model.sample_rows))
+        return model
+    if sampling_method == SamplingMethod.over_random:
+        model.sample_counts = get_sample_counts(y_train, ratio, seed)
+        logger.info("Original Samples : %d", len(y_train))
+        logger.info("New Samples      : %d", model.sample_counts.sum())
+        return model
     X, y = sampler.fit_sample(X_train, y_train)
 
     logger.info("Original Samples : %d", X_train.shape[0])
@@ -282,11 +535,112 @@ def sample_data(model):
     return model
 
 
+#
+# Function get_session_fields
+#
+
+def get_session_fields(dt_index):
+    r"""Number the intraday bars within each trading day.
+
+    Parameters
+    ----------
+    dt_index : pandas.DatetimeIndex
+        The times of the intraday bars, in ascending order.
+
+    Returns
+    -------
+    bar_number : numpy array (int)
+        The number of each bar within its day, starting at zero.
+    end_of_day : numpy array (bool)
+        ``True`` for the last bar of each day.
+
+    Notes
+    -----
+    Any source of intraday bars can use this function to derive
+    the session fields required by the trading systems.
+
+    """
+    days = dt_index.normalize().values
+    n = len(days)
+    new_day = np.ones(n, dtype=bool)
+    new_day[1:] = days[1:] != days[:-1]
+    positions = np.arange(n)
+    day_start = np.maximum.accumulate(np.where(new_day, positions, 0))
+    bar_number = positions - day_start
+    end_of_day = np.ones(n, dtype=bool)
+    end_of_day[:-1] = new_day[1:]
+    return bar_number, end_of_day
+
+
+#
+# Function parse_google_text
+#
+
+def parse_google_text(text, interval, toffset=7):
+    r"""Parse the intraday bars of a Google Finance response.
+
+    Parameters
+    ----------
+    text : str
+        The response text.
+    interval : int
+        The number of seconds in each bar.
+    toffset : int, optional
+        The number of header lines before the first bar.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The ``open``, ``high``, ``low``, ``close``, and ``volume`` of
+        each bar, indexed by the local ``datetime`` of the bar.
+
+    Notes
+    -----
+    Each line has the fields ``date,close,high,low,open,volume``.
+    The date is either an anchor, i.e., the letter ``a`` followed by
+    a Unix timestamp, or the number of intervals since the previous
+    anchor. The whole payload is parsed in one call, and the times
+    are calculated as arrays from the anchors and offsets.
+
+    """
+    cols = ['date', 'close', 'high', 'low', 'open', 'volume']
+    bars = pd.read_csv(StringIO(text), skiprows=toffset, header=None,
+                       names=cols, dtype={'date' : str})
+    # keep only the complete bars, e.g., skip timezone offset lines
+    bars = bars.dropna()
+    dates = np.asarray(bars['date'], dtype=str)
+    anchor = np.char.startswith(dates, 'a')
+    stamps = np.where(anchor, np.char.lstrip(dates, 'a'), '0').astype(float)
+    offsets = np.where(anchor, '0', dates).astype(float)
+    # carry each anchor forward to the bars that follow it
+    anchor_pos = np.maximum.accumulate(np.where(anchor, np.arange(len(dates)), 0))
+    seconds = stamps[anchor_pos] + interval * offsets
+    dt = pd.to_datetime(seconds, unit='s', utc=True)
+    dt = dt.tz_convert(tzlocal()).tz_localize(None)
+    # create data frame
+    df = pd.DataFrame({'open' : bars['open'].values.astype(float),
+                       'high' : bars['high'].values.astype(float),
+                       'low' : bars['low'].values.astype(float),
+                       'close' : bars['close'].values.astype(float),
+                       'volume' : bars['volume'].values.astype(int)},
+                      index=pd.DatetimeIndex(dt, name='datetime'),
+                      columns=['open', 'high', 'low', 'close', 'volume'])
+    return df
+
+
+#
+# URL of the Google Finance intraday feed, formatted with the symbol,
+# the number of seconds in each bar, and the number of days
+#
+
+GOOGLE_URL = 'https://www.google.com/finance/getprices?q={}&i={}&p={}d&f=d,o,h,l,c,v'
+
+
 #
 # Function get_google_data
 #
 
-def get_google_data(symbol, lookback_period, fractal):
+def get_google_data(symbol, lookback_period, fractal, base_url=GOOGLE_URL):
     r"""Get Google Finance intraday data.
 
     We get intraday data from the Google Finance API, even though
@@ -302,12 +656,20 @@ def get_google_data(symbol, lookback_period, fractal):
         The number of days of intraday data to retrieve, capped at 50.
     fractal : str
         The intraday frequency, e.g., "5m" for 5-minute data.
+    base_url : str, optional
+        The URL of the feed, with a ``{}`` for each of the symbol,
+        the interval in seconds, and the number of days.
 
     Returns
     -------
     df : pandas.DataFrame
         The dataframe containing the intraday data.
 
+    Raises
+    ------
+    requests.HTTPError
+        The feed returned an error status.
+
     """
 
     # Google requires upper-case symbol, otherwise not found
@@ -320,50 +682,13 @@ def get_google_data(symbol, lookback_period, fractal):
         lookback_period = max_days
     # set Google data constants
     toffset = 7
-    line_length = 6
     # make the request to Google
-    base_url = 'https://www.google.com/finance/getprices?q={}&i={}&p={}d&f=d,o,h,l,c,v'
     url = base_url.format(symbol, interval, lookback_period)
     response = requests.get(url)
-    # process the response
-    text = response.text.split('\n')
-    records = []
-    for line in text[toffset:]:
-        items = line.split(',')
-        if len(items) == line_length:
-            dt_item = items[0]
-            close_item = items[1]
-            high_item = items[2]
-            low_item = items[3]
-            open_item = items[4]
-            volume_item = items[5]
-            if dt_item[0] == 'a':
-                day_item = float(dt_item[1:])
-                offset = 0
-            else:
-                offset = float(dt_item)
-            dt = datetime.fromtimestamp(day_item + (interval * offset))
-            dt = pd.to_datetime(dt)
-            dt_date = dt.strftime('%Y-%m-%d')
-            record = (dt, dt_date, open_item, high_item, low_item, close_item, volume_item)
-            records.append(record)
-    # create data frame
-    cols = ['datetime', 'date', 'open', 'high', 'low', 'close', 'volume']
-    df = pd.DataFrame.from_records(records, columns=cols)
-    # convert to proper data types
-    cols_float = ['open', 'high', 'low', 'close']
-    df[cols_float] = df[cols_float].astype(float)
-    df['volume'] = df['volume'].astype(int)
-    # number the intraday bars
-    date_group = df.groupby('date')
-    df['bar_number'] = date_group.cumcount()
-    # mark the end of the trading day
-    df['end_of_day'] = False
-    del df['date']
-    df.loc[date_group.tail(1).index, 'end_of_day'] = True
-    # set the index to datetime
-    df.index = df['datetime']
-    del df['datetime']
+    response.raise_for_status()
+    # parse the bars and number them within each trading day
+    df = parse_google_text(response.text, interval, toffset)
+    df['bar_number'], df['end_of_day'] = get_session_fields(df.index)
     # return the dataframe
     return df
 
@@ -408,11 +733,147 @@ def get_pandas_data(schema, symbol, lookback_period):
     return df
 
 
+#
+# Function fetch_feed_data
+#
+
+def fetch_feed_data(schema, fractal, symbol, lookback_period,
+                    retries=3, backoff=1.0, base_url=GOOGLE_URL):
+    r"""Get data for one symbol from an external feed, with retries.
+
+    Parameters
+    ----------
+    schema : str
+        The source of the daily data.
+    fractal : str
+        The frequency of the data, e.g., "1d" or "5m".
+    symbol : str
+        A valid stock symbol.
+    lookback_period : int
+        The number of days of data to retrieve.
+    retries : int, optional
+        The number of attempts after the first one fails.
+    backoff : float, optional
+        The number of seconds before the first retry, doubled
+        for each subsequent retry.
+    base_url : str, optional
+        The URL of the intraday feed (see ``get_google_data``).
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe containing the data, or ``None``.
+
+    """
+    df = None
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            delay = backoff * 2 ** (attempt - 1)
+            logger.info("Retrying %s in %.1f seconds", symbol, delay)
+            time.sleep(delay)
+        try:
+            if 'd' in fractal:
+                df = get_pandas_data(schema, symbol, lookback_period)
+            else:
+                df = get_google_data(symbol, lookback_period, fractal,
+                                     base_url)
+        except:
+            logger.info("Request for %s failed", symbol)
+            df = None
+        if df is not None and not df.empty:
+            break
+    return df
+
+
+#
+# Function get_cached_data
+#
+
+def get_cached_data(schema, fractal, symbol, lookback_period, cache_dir,
+                    extension, separator, retries=3, backoff=1.0,
+                    base_url=GOOGLE_URL):
+    r"""Get data for one symbol from the feed cache and the external feed.
+
+    Parameters
+    ----------
+    schema : str
+        The source of the daily data.
+    fractal : str
+        The frequency of the data, e.g., "1d" or "5m".
+    symbol : str
+        A valid stock symbol.
+    lookback_period : int
+        The number of days of data to retrieve.
+    cache_dir : str
+        Full directory specification of the feed cache.
+    extension : str
+        File name extension of the cache files, e.g., ``parquet``.
+    separator : str
+        The delimiter between fields in the file.
+    retries : int, optional
+        The number of attempts after the first one fails.
+    backoff : float, optional
+        The number of seconds before the first retry.
+    base_url : str, optional
+        The URL of the intraday feed (see ``get_google_data``).
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe containing the data for the lookback period.
+
+    Notes
+    -----
+    The cache holds one file per symbol, schema, and fractal. If the
+    cache already covers the start of the lookback period, then only
+    the days since the last cached date are requested from the feed,
+    and the new rows replace any overlapping cached rows.
+
+    """
+    cache_name = USEP.join(['feed', symbol.lower(), schema, fractal])
+    start = pd.Timestamp(datetime.now() - timedelta(lookback_period)).normalize()
+    # read the cached data, if any
+    cached = None
+    if os.path.exists(SSEP.join([cache_dir, PSEP.join([cache_name, extension])])):
+        cached = read_frame(cache_dir, cache_name, extension, separator,
+                            index_col='datetime')
+    if cached is not None and not cached.empty:
+        cached.index = pd.to_datetime(cached.index)
+        # allow a week for weekends and holidays at the start
+        if cached.index[0] > start + timedelta(7):
+            cached = None
+    # request only the missing date span
+    if cached is not None and not cached.empty:
+        last_date = cached.index[-1].normalize()
+        fetch_period = (pd.Timestamp(datetime.now()).normalize() - last_date).days + 1
+        logger.info("Found %s data in cache through %s", symbol, last_date.date())
+    else:
+        fetch_period = lookback_period
+    df = fetch_feed_data(schema, fractal, symbol, fetch_period, retries,
+                         backoff, base_url)
+    # merge the new data into the cache
+    if cached is not None and not cached.empty:
+        if df is not None and not df.empty:
+            df.index = pd.to_datetime(df.index)
+            cached = cached[cached.index < df.index[0].normalize()]
+            cached.index.name = df.index.name
+            df = pd.concat([cached, df])
+        else:
+            df = cached
+    if df is not None and not df.empty:
+        write_frame(df, cache_dir, cache_name, extension, separator,
+                    index=True, index_label='datetime')
+        df = df[df.index >= start]
+    return df
+
+
 #
 # Function get_feed_data
 #
 
-def get_feed_data(group, lookback_period):
+def get_feed_data(group, lookback_period, cache_dir=None, extension='csv',
+                  separator=',', max_workers=8, retries=3, backoff=1.0,
+                  base_url=GOOGLE_URL):
     r"""Get data from an external feed.
 
     Parameters
@@ -421,6 +882,22 @@ def get_feed_data(group, lookback_period):
         The group of symbols.
     lookback_period : int
         The number of days of data to retrieve.
+    cache_dir : str, optional
+        Full directory specification of the feed cache. If not
+        specified, all of the data are requested from the feed.
+    extension : str, optional
+        File name extension of the cache files, e.g., ``parquet``.
+    separator : str, optional
+        The delimiter between fields in the cache files.
+    max_workers : int, optional
+        The maximum number of concurrent requests.
+    retries : int, optional
+        The number of attempts after the first one fails.
+    backoff : float, optional
+        The number of seconds before the first retry, doubled
+        for each subsequent retry.
+    base_url : str, optional
+        The URL of the intraday feed (see ``get_google_data``).
 
     Returns
     -------
@@ -442,12 +919,23 @@ def get_feed_data(group, lookback_period):
         logger.info("Getting Intraday Data (Google 50-day limit)")
         daily_data = False
     # Get the data from the relevant feed
-    for item in group.members:
+    if cache_dir and not os.path.exists(cache_dir):
+        logger.info("Creating directory %s", cache_dir)
+        os.makedirs(cache_dir)
+    def get_item(item):
         logger.info("Getting %s data for last %d days", item, lookback_period)
-        if daily_data:
-            df = get_pandas_data(schema, item, lookback_period)
+        if cache_dir:
+            df = get_cached_data(schema, fractal, item, lookback_period,
+                                 cache_dir, extension, separator,
+                                 retries, backoff, base_url)
         else:
-            df = get_google_data(item, lookback_period, fractal)
+            df = fetch_feed_data(schema, fractal, item, lookback_period,
+                                 retries, backoff, base_url)
+        return df
+    n_workers = max(1, min(max_workers, len(group.members)))
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        all_data = list(executor.map(get_item, group.members))
+    for item, df in zip(group.members, all_data):
         if df is not None and not df.empty:
             # allocate global Frame
             newf = Frame(item.lower(), gspace, df)
@@ -457,3 +945,162 @@ def get_feed_data(group, lookback_period):
             logger.info("No DataFrame for %s", item)
     # Indicate whether or not data is daily
     return daily_data
+
+
+#
+# Function fractal_parts
+#
+
+def fractal_parts(fractal):
+    r"""Split a fractal into its number of units and its unit.
+
+    Parameters
+    ----------
+    fractal : str
+        The frequency of the data, e.g., "5m", "1h", "1d", or "1w".
+
+    Returns
+    -------
+    n : int
+        The number of units.
+    unit : str
+        The unit code: ``m`` (minutes), ``h`` (hours), ``d`` (trading
+        days), or ``w`` (weeks).
+
+    Raises
+    ------
+    ValueError
+        The fractal is not a positive integer followed by a unit code.
+
+    """
+    match = re.match(r'^(\d+)([mhdw])$', fractal)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError("Invalid fractal %s" % fractal)
+    return int(match.group(1)), match.group(2)
+
+
+#
+# Function resample_bars
+#
+
+def resample_bars(df, fractal):
+    r"""Aggregate bars into the coarser bars of the given fractal.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The bars, indexed by time in ascending order.
+    fractal : str
+        The frequency of the new bars, e.g., "15m", "1h", or "1d".
+
+    Returns
+    -------
+    new_df : pandas.DataFrame
+        The aggregated bars, indexed by the start of each bar.
+
+    Notes
+    -----
+    The ``open`` is the first value of each bar, the ``high`` is the
+    maximum, the ``low`` is the minimum, the ``close`` is the last
+    value, and the ``volume`` is the sum. Any other column takes the
+    last value of each bar.
+
+    Intraday bars are anchored to the first bar of each trading day,
+    so that no bar spans two sessions, e.g., the first hourly bar
+    starts at the open, not on the hour. For intraday fractals, the
+    ``bar_number`` and ``end_of_day`` fields are renumbered, and for
+    daily and weekly fractals, they are dropped.
+
+    """
+    n, unit = fractal_parts(fractal)
+    index = pd.DatetimeIndex(df.index)
+    days = index.normalize()
+    positions = np.arange(len(index))
+    new_day = np.ones(len(index), dtype=bool)
+    new_day[1:] = days.values[1:] != days.values[:-1]
+    # assign each row to the start of its new bar
+    if unit in ['m', 'h']:
+        delta = np.timedelta64(n * (60 if unit == 'h' else 1), 'm')
+        times = index.values
+        day_start = np.maximum.accumulate(np.where(new_day, positions, 0))
+        session_open = times[day_start]
+        labels = session_open + (times - session_open) // delta * delta
+        index_name = df.index.name
+    elif unit == 'd':
+        day_number = np.cumsum(new_day) - 1
+        new_block = new_day & (day_number % n == 0)
+        block_start = np.maximum.accumulate(np.where(new_block, positions, 0))
+        labels = days.values[block_start]
+        index_name = 'date'
+    else:
+        monday = days - pd.to_timedelta(days.weekday, unit='D')
+        week_number = np.cumsum(np.r_[True, monday.values[1:] != monday.values[:-1]]) - 1
+        new_block = np.r_[True, np.diff(week_number // n) != 0]
+        block_start = np.maximum.accumulate(np.where(new_block, positions, 0))
+        labels = monday.values[block_start]
+        index_name = 'date'
+    # aggregate all of the columns in one pass
+    session_fields = ['bar_number', 'end_of_day']
+    ohlcv = {'open' : 'first', 'high' : 'max', 'low' : 'min',
+             'close' : 'last', 'volume' : 'sum'}
+    columns = [c for c in df.columns if c not in session_fields]
+    agg_map = {c : ohlcv.get(c, 'last') for c in columns}
+    new_df = df[columns].groupby(labels, sort=False).agg(agg_map)
+    new_df.index = pd.DatetimeIndex(new_df.index, name=index_name)
+    if unit in ['m', 'h'] and 'bar_number' in df.columns:
+        new_df['bar_number'], new_df['end_of_day'] = get_session_fields(new_df.index)
+    return new_df
+
+
+#
+# Function resample_frames
+#
+
+def resample_frames(group, fractals):
+    r"""Derive the frames of coarser fractals from the frames of a group.
+
+    Parameters
+    ----------
+    group : alphapy.Group
+        The group of symbols, whose frames are in the group's space.
+    fractals : list
+        The fractals of the derived frames, e.g., ['15m', '1h', '1d'].
+
+    Returns
+    -------
+    None : None
+
+    Notes
+    -----
+    Each derived frame is registered in ``Frame.frames`` under the
+    ``frame_name`` of its own space, which has the same subject and
+    schema as the group. A derived frame is cached with the length
+    and the last time of its source, so it is only recalculated when
+    its source frame has changed.
+
+    """
+    gspace = group.space
+    for fractal in fractals:
+        if fractal == gspace.fractal:
+            continue
+        rspace = Space(gspace.subject, gspace.schema, fractal)
+        logger.info("Resampling %s frames to %s", gspace.fractal, fractal)
+        for item in group.members:
+            fname = frame_name(item.lower(), gspace)
+            if fname not in Frame.frames:
+                logger.info("Data Frame for %s not found", fname)
+                continue
+            df = Frame.frames[fname].df
+            if df is None or df.empty:
+                continue
+            rname = frame_name(item.lower(), rspace)
+            source = (fname, len(df), df.index[-1])
+            if resample_cache.get(rname) == source and rname in Frame.frames:
+                logger.debug("Using cached frame %s", rname)
+                continue
+            new_df = resample_bars(df, fractal)
+            if rname in Frame.frames:
+                Frame.frames[rname].df = new_df
+            else:
+                Frame(item.lower(), rspace, new_df)
+            resample_cache[rname] = source
@@ -140,6 +140,12 @@ class Estimator:
         self.estimator = estimator
         self.grid = grid
         self.scoring = scoring
+
+    # __getnewargs__
+
+    def __getnewargs__(self):
+        return (self.algorithm, self.model_type, self.estimator, self.grid,
+                self.scoring)
         
     # __str__
 
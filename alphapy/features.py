@@ -26,11 +26,13 @@
 # Imports
 #
 
+from alphapy.data import sampled_rows
 from alphapy.globals import BSEP, NULLTEXT, PSEP, SSEP, USEP
 from alphapy.globals import Encoders
 from alphapy.globals import ModelType
 from alphapy.globals import Scalers
 from alphapy.market_variables import Variable
+from alphapy.matrix import FeatureMatrix
 
 import category_encoders as ce
 from importlib import import_module
@@ -209,7 +211,78 @@ def zscore(vec):
         zscore = 0
     return zscore
 
-    
+
+#
+# Function rolling_runs
+#
+
+def rolling_runs(vec, window):
+    r"""Calculate all of the runs statistics of every window in one pass.
+
+    Parameters
+    ----------
+    vec : pandas.Series or numpy array
+        The input array, usually binary.
+    window : int
+        The rolling period.
+
+    Returns
+    -------
+    stats : dict
+        The array of each statistic ``rtotal``, ``runs``, ``streak``,
+        and ``zscore``, with ``NaN`` until the window is full or when
+        the window contains a ``NaN``.
+
+    Notes
+    -----
+    A new run starts wherever a value differs from the previous one,
+    so the counts of each window are differences of the cumulative
+    sums of the nonzero values and of the run starts. The result for
+    each row is the same as ``rtotal``, ``runs``, ``streak``, and
+    ``zscore`` applied to the window that ends at the row.
+
+    """
+    values = np.asarray(vec, dtype=float)
+    n = len(values)
+    stats = {k : np.full(n, np.nan) for k in ['rtotal', 'runs', 'streak', 'zscore']}
+    if window < 1 or window > n:
+        return stats
+    w = window
+    isnan = np.isnan(values)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = values[1:] != values[:-1]
+    # cumulative sums with a leading zero for the window differences
+    cnan = np.concatenate(([0], np.cumsum(isnan)))
+    cnonzero = np.concatenate(([0], np.cumsum(values != 0)))
+    cstarts = np.concatenate(([0], np.cumsum(starts)))
+    ends = np.arange(w - 1, n)
+    valid = (cnan[ends + 1] - cnan[ends + 1 - w]) == 0
+    # running total
+    n1 = (cnonzero[ends + 1] - cnonzero[ends + 1 - w]).astype(float)
+    n2 = w - n1
+    # the first row of each window always starts a run
+    nruns = 1.0 + cstarts[ends + 1] - cstarts[ends + 2 - w]
+    # the latest streak is the current run, cut off by the window
+    rows = np.arange(n)
+    run_start = np.maximum.accumulate(np.where(starts, rows, 0))
+    streaks = np.minimum(rows - run_start + 1, w)[ends].astype(float)
+    # Wald-Wolfowitz Z-Score
+    fac1 = 2.0 * n1 * n2
+    fac2 = float(w)
+    rbar = fac1 / fac2 + 1
+    sr2den = fac2 * fac2 * (fac2 - 1)
+    if sr2den:
+        sr = np.sqrt(np.maximum(fac1 * (fac1 - fac2), 0) / sr2den)
+    else:
+        sr = np.zeros(len(ends))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscores = np.where(sr > 0, (nruns - rbar) / sr, 0.0)
+    for k, v in zip(['rtotal', 'runs', 'streak', 'zscore'],
+                    [n1 - n2, nruns, streaks, zscores]):
+        stats[k][ends] = np.where(valid, v, np.nan)
+    return stats
+
+
 #
 # Function runs_test
 #
@@ -261,11 +334,12 @@ def runs_test(f, c, wfuncs, window):
     # use all functions
     if 'all' in wfuncs:
         wfuncs = list(all_funcs.keys())
-    # apply each of the runs functions
+    # calculate all of the runs functions together
+    stats = rolling_runs(fc, window)
     new_features = pd.DataFrame()
     for w in wfuncs:
         if w in all_funcs:
-            new_feature = fc.rolling(window=window).apply(all_funcs[w])
+            new_feature = pd.Series(stats[w], index=fc.index)
             new_feature.fillna(0, inplace=True)
             new_column_name = PSEP.join([c, w])
             new_feature = new_feature.rename(new_column_name)
@@ -494,11 +568,64 @@ def apply_treatments(model, X):
     return all_features
 
 
+#
+# Function transform_features
+#
+
+def transform_features(model, key, transformer, features):
+    r"""Fit and apply a transformer, or apply a previously fitted one.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        Model object with the feature map.
+    key : tuple
+        The key of the transformer in the feature map.
+    transformer : object
+        A new transformer with ``fit_transform`` and ``transform``
+        methods, e.g., a scikit-learn scaler. This transformer is
+        ignored in prediction mode.
+    features : array-like
+        The features to transform.
+
+    Returns
+    -------
+    new_features : array-like
+        The transformed features.
+
+    Raises
+    ------
+    KeyError
+        In prediction mode, the transformer must be in the feature map.
+
+    Notes
+    -----
+    In training mode, the transformer is fitted and stored in the
+    feature map (key: ``transformers``), so that it is saved with
+    the model. In prediction mode, the stored transformer is only
+    applied, so the prediction data are transformed exactly like
+    the training data, regardless of the batch size.
+
+    """
+    predict_mode = model.specs['predict_mode']
+    transformers = model.feature_map.setdefault('transformers', {})
+    if predict_mode:
+        try:
+            transformer = transformers[key]
+        except KeyError:
+            raise KeyError("Transformer %s not found in feature map" % (key,))
+        new_features = transformer.transform(features)
+    else:
+        new_features = transformer.fit_transform(features)
+        transformers[key] = transformer
+    return new_features
+
+
 #
 # Function impute_values
 #
 
-def impute_values(features, dt, sentinel):
+def impute_values(features, dt, sentinel, model=None, key=None):
     r"""Impute values for a given data type. The *median* strategy
     is applied for floating point values, and the *most frequent*
     strategy is applied for integer or Boolean values.
@@ -511,6 +638,11 @@ def impute_values(features, dt, sentinel):
         The values ``'float64'``, ``'int64'``, or ``'bool'``.
     sentinel : float
         The number to be imputed for NaN values.
+    model : alphapy.Model, optional
+        If specified, the fitted imputer is stored in the feature map
+        for training, or reused from the feature map for prediction.
+    key : tuple, optional
+        The key of the imputer in the feature map.
 
     Returns
     -------
@@ -539,7 +671,10 @@ def impute_values(features, dt, sentinel):
         imp = Imputer(missing_values='NaN', strategy='most_frequent', axis=0)
     else:
         raise TypeError("Data Type %s is invalid for imputation" % dt)
-    imputed = imp.fit_transform(features)
+    if model is not None:
+        imputed = transform_features(model, key, imp, features)
+    else:
+        imputed = imp.fit_transform(features)
     if imputed.shape[1] == 0:
         nans = np.isnan(features)
         features[nans] = sentinel
@@ -554,7 +689,7 @@ def impute_values(features, dt, sentinel):
 #
 
 def get_numerical_features(fnum, fname, df, nvalues, dt,
-                           sentinel, logt, plevel):
+                           sentinel, logt, plevel, model=None):
     r"""Transform numerical features with imputation and possibly
     log-transformation.
 
@@ -576,6 +711,9 @@ def get_numerical_features(fnum, fname, df, nvalues, dt,
         If ``True``, then log-transform numerical values.
     plevel : float
         The p-value threshold to test if a feature is normally distributed.
+    model : alphapy.Model, optional
+        If specified, the imputer and the log-transformation decision
+        are stored in or reused from the feature map.
 
     Returns
     -------
@@ -591,14 +729,21 @@ def get_numerical_features(fnum, fname, df, nvalues, dt,
         logger.info("Feature %d: %s is a numerical feature of type %s with %d unique values",
                     fnum, fname, dt, nvalues)
     # imputer for float, integer, or boolean data types
-    new_values = impute_values(feature, dt, sentinel)
+    new_values = impute_values(feature, dt, sentinel, model, (fname, 'imputer'))
     # log-transform any values that do not fit a normal distribution
-    if logt and np.all(new_values > 0):
+    if model is not None and model.specs['predict_mode']:
+        transformers = model.feature_map.get('transformers', {})
+        if transformers.get((fname, 'log'), False):
+            new_values = np.log(new_values)
+    elif logt and np.all(new_values > 0):
         stat, pvalue = sps.normaltest(new_values)
-        if pvalue <= plevel:
+        logged = pvalue <= plevel
+        if logged:
             logger.info("Feature %d: %s is not normally distributed [p-value: %f]",
                         fnum, fname, pvalue)
             new_values = np.log(new_values)
+        if model is not None:
+            model.feature_map.setdefault('transformers', {})[(fname, 'log')] = logged
     return new_values
 
 
@@ -639,7 +784,8 @@ def get_polynomials(features, poly_degree):
 # Function get_text_features
 #
 
-def get_text_features(fnum, fname, df, nvalues, vectorize, ngrams_max):
+def get_text_features(fnum, fname, df, nvalues, vectorize, ngrams_max,
+                      model=None):
     r"""Transform text features with count vectorization and TF-IDF,
     or alternatively factorization.
 
@@ -657,6 +803,9 @@ def get_text_features(fnum, fname, df, nvalues, vectorize, ngrams_max):
         If ``True``, then attempt count vectorization.
     ngrams_max : int
         The maximum number of n-grams for count vectorization.
+    model : alphapy.Model, optional
+        If specified, the fitted vectorizer or the factor levels are
+        stored in or reused from the feature map.
 
     Returns
     -------
@@ -680,24 +829,77 @@ def get_text_features(fnum, fname, df, nvalues, vectorize, ngrams_max):
                     fnum, fname, min_length, max_length, nvalues)
     # need a null text placeholder for vectorization
     feature.fillna(value=NULLTEXT, inplace=True)
+    # in prediction mode, use the method chosen during training
+    if model is not None and model.specs['predict_mode']:
+        transformers = model.feature_map.get('transformers', {})
+        vectorize = (fname, 'vectorizer') in transformers
     # vectorization creates many columns, otherwise just factorize
+    new_features = None
     if vectorize:
         logger.info("Feature %d: %s => Attempting Vectorization", fnum, fname)
         count_vect = CountVectorizer(ngram_range=[1, ngrams_max])
         try:
-            count_feature = count_vect.fit_transform(feature)
-            tfidf_transformer = TfidfTransformer()
-            new_features = tfidf_transformer.fit_transform(count_feature).todense()
+            if model is not None:
+                count_feature = transform_features(model, (fname, 'vectorizer'),
+                                                   count_vect, feature)
+                new_features = transform_features(model, (fname, 'tfidf'),
+                                                  TfidfTransformer(),
+                                                  count_feature).todense()
+            else:
+                count_feature = count_vect.fit_transform(feature)
+                tfidf_transformer = TfidfTransformer()
+                new_features = tfidf_transformer.fit_transform(count_feature).todense()
             logger.info("Feature %d: %s => Vectorization Succeeded", fnum, fname)
         except:
             logger.info("Feature %d: %s => Vectorization Failed", fnum, fname)
-            new_features, uniques = pd.factorize(feature)
+            if model is not None:
+                model.feature_map['transformers'].pop((fname, 'vectorizer'), None)
     else:
         logger.info("Feature %d: %s => Factorization", fnum, fname)
-        new_features, uniques = pd.factorize(feature)
+    if new_features is None:
+        new_features = factorize_feature(model, fname, feature)
     return new_features
 
 
+#
+# Function factorize_feature
+#
+
+def factorize_feature(model, fname, feature):
+    r"""Encode a feature as integer codes of its unique values.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        Model object with the feature map, or ``None``.
+    fname : str
+        Name of the feature.
+    feature : pandas.Series
+        The values to encode.
+
+    Returns
+    -------
+    codes : numpy array
+        The integer codes of the feature values.
+
+    Notes
+    -----
+    The unique values found in training are stored in the feature
+    map, so the same value gets the same code in prediction. Values
+    not seen in training are coded as -1.
+
+    """
+    if model is not None and model.specs['predict_mode']:
+        uniques = model.feature_map['transformers'][(fname, 'factors')]
+        codes = uniques.get_indexer(feature)
+    else:
+        codes, uniques = pd.factorize(feature)
+        if model is not None:
+            transformers = model.feature_map.setdefault('transformers', {})
+            transformers[(fname, 'factors')] = pd.Index(uniques)
+    return codes
+
+
 #
 # Function float_factor
 #
@@ -824,11 +1026,19 @@ def get_factors(model, df, fnum, fname, nvalues, dtype,
     # encoders
     enc = None
     ef = pd.DataFrame(feature)
+    pd_features = pd.DataFrame()
     if encoder == Encoders.factorize:
-        pd_factors = pd.factorize(feature)[0]
+        pd_factors = factorize_feature(model, fname, feature)
         pd_features = pd.DataFrame(pd_factors)
     elif encoder == Encoders.onehot:
         pd_features = pd.get_dummies(feature)
+        key = (fname, 'dummies')
+        transformers = model.feature_map.setdefault('transformers', {})
+        if model.specs['predict_mode']:
+            pd_features = pd_features.reindex(columns=transformers[key],
+                                              fill_value=0)
+        else:
+            transformers[key] = pd_features.columns
     elif encoder == Encoders.ordinal:
         enc = ce.OrdinalEncoder(cols=[fname])
     elif encoder == Encoders.binary:
@@ -851,7 +1061,7 @@ def get_factors(model, df, fnum, fname, nvalues, dtype,
         if pd_exists:
             all_features = pd_features
         elif enc_exists:
-            all_features = enc.fit_transform(ef, None)
+            all_features = transform_features(model, (fname, 'encoder'), enc, ef)
         # Calculate target percentages for factors
         if (model_type == ModelType.classification and
            fname in feature_map['crosstabs']):
@@ -874,7 +1084,7 @@ def get_factors(model, df, fnum, fname, nvalues, dtype,
 # Function create_numpy_features
 #
 
-def create_numpy_features(base_features, sentinel):
+def create_numpy_features(base_features, sentinel, model=None):
     r"""Calculate the sum, mean, standard deviation, and variance
     of each row.
 
@@ -884,6 +1094,9 @@ def create_numpy_features(base_features, sentinel):
         The feature dataframe.
     sentinel : float
         The number to be imputed for NaN values.
+    model : alphapy.Model, optional
+        If specified, the imputer and scaler are stored in or reused
+        from the feature map.
 
     Returns
     -------
@@ -908,8 +1121,13 @@ def create_numpy_features(base_features, sentinel):
     # Impute, scale, and stack all new features.
 
     np_features = np.column_stack((row_sum, row_mean, row_std, row_var))
-    np_features = impute_values(np_features, 'float64', sentinel)
-    np_features = StandardScaler().fit_transform(np_features)
+    np_features = impute_values(np_features, 'float64', sentinel,
+                                model, ('numpy', 'imputer'))
+    if model is not None:
+        np_features = transform_features(model, ('numpy', 'scaler'),
+                                         StandardScaler(), np_features)
+    else:
+        np_features = StandardScaler().fit_transform(np_features)
 
     # Return new NumPy features
 
@@ -921,7 +1139,7 @@ def create_numpy_features(base_features, sentinel):
 # Function create_scipy_features
 #
 
-def create_scipy_features(base_features, sentinel):
+def create_scipy_features(base_features, sentinel, model=None):
     r"""Calculate the skew, kurtosis, and other statistical features
     for each row.
 
@@ -931,6 +1149,9 @@ def create_scipy_features(base_features, sentinel):
         The feature dataframe.
     sentinel : float
         The number to be imputed for NaN values.
+    model : alphapy.Model, optional
+        If specified, the imputer and scaler are stored in or reused
+        from the feature map.
 
     Returns
     -------
@@ -965,8 +1186,13 @@ def create_scipy_features(base_features, sentinel):
     sp_features = np.column_stack((row_gmean, row_kurtosis, row_ktest,
                                    row_normal, row_skew, row_stest,
                                    row_var, row_stn, row_sem))
-    sp_features = impute_values(sp_features, 'float64', sentinel)
-    sp_features = StandardScaler().fit_transform(sp_features)
+    sp_features = impute_values(sp_features, 'float64', sentinel,
+                                model, ('scipy', 'imputer'))
+    if model is not None:
+        sp_features = transform_features(model, ('scipy', 'scaler'),
+                                         StandardScaler(), sp_features)
+    else:
+        sp_features = StandardScaler().fit_transform(sp_features)
 
     # Return new SciPy features
 
@@ -1019,15 +1245,21 @@ def create_clusters(features, model):
 
     # Generate clustering features
 
-    cfeatures = np.zeros((features.shape[0], 1))
+    predict_mode = model.specs['predict_mode']
+    transformers = model.feature_map.setdefault('transformers', {})
+    clist = []
     for i in range(cluster_min, cluster_max+1, cluster_inc):
         logger.info("k = %d", i)
-        km = MiniBatchKMeans(n_clusters=i, random_state=seed)
-        km.fit(features)
+        key = ('clusters', i)
+        if predict_mode:
+            km = transformers[key]
+        else:
+            km = MiniBatchKMeans(n_clusters=i, random_state=seed)
+            km.fit(features)
+            transformers[key] = km
         labels = km.predict(features)
-        labels = labels.reshape(-1, 1)
-        cfeatures = np.column_stack((cfeatures, labels))
-    cfeatures = np.delete(cfeatures, 0, axis=1)
+        clist.append(labels)
+    cfeatures = np.column_stack(clist)
 
     # Return new clustering features
 
@@ -1080,12 +1312,13 @@ def create_pca_features(features, model):
 
     # Generate clustering features
 
-    pfeatures = np.zeros((features.shape[0], 1))
+    plist = []
     for i in range(pca_min, pca_max+1, pca_inc):
         logger.info("n_components = %d", i)
-        X_pca = PCA(n_components=i, whiten=pca_whiten).fit_transform(features)
-        pfeatures = np.column_stack((pfeatures, X_pca))
-    pfeatures = np.delete(pfeatures, 0, axis=1)
+        pca = PCA(n_components=i, whiten=pca_whiten)
+        X_pca = transform_features(model, ('pca', i), pca, features)
+        plist.append(X_pca)
+    pfeatures = np.column_stack(plist)
 
     # Return new clustering features
 
@@ -1141,9 +1374,9 @@ def create_isomap_features(features, model):
 
     # Generate Isomap features
 
-    model = Isomap(n_neighbors=iso_neighbors, n_components=iso_components,
-                   n_jobs=n_jobs)
-    ifeatures = model.fit_transform(features)
+    isomap = Isomap(n_neighbors=iso_neighbors, n_components=iso_components,
+                    n_jobs=n_jobs)
+    ifeatures = transform_features(model, ('isomap',), isomap, features)
 
     # Return new Isomap features
 
@@ -1193,7 +1426,8 @@ def create_tsne_features(features, model):
     logger.info("T-SNE Learning Rate : %d", tsne_learn_rate)
     logger.info("T-SNE Perplexity    : %d", tsne_perplexity)
 
-    # Generate T-SNE features
+    # Generate T-SNE features. T-SNE cannot transform new data,
+    # so the embedding is always fitted on the given features.
 
     model = TSNE(n_components=tsne_components, perplexity=tsne_perplexity,
                  learning_rate=tsne_learn_rate, random_state=seed)
@@ -1209,7 +1443,7 @@ def create_tsne_features(features, model):
 # Function create_features
 #
 
-def create_features(model, X):
+def create_features(model, X, fm=None):
     r"""Create features for the train and test set.
 
     Parameters
@@ -1218,11 +1452,14 @@ def create_features(model, X):
         Model object with the feature specifications.
     X : pandas.DataFrame
         Combined train and test data.
+    fm : alphapy.FeatureMatrix, optional
+        The feature matrix to fill with the new features. If not
+        specified, then a new matrix is allocated in memory.
 
     Returns
     -------
     all_features : numpy array
-        The new features.
+        The new features, a view of the feature matrix.
 
     Raises
     ------
@@ -1277,11 +1514,20 @@ def create_features(model, X):
     # Iterate through columns, dispatching and transforming each feature.
 
     logger.info("Creating Base Features")
-    all_features = np.zeros((X.shape[0], 1))
+    if fm is None:
+        fm = FeatureMatrix(X.shape[0])
 
     for i, fc in enumerate(X):
         fnum = i + 1
         dtype = X[fc].dtypes
+        # downcast columns are processed like their full-size types
+        if dtype.name == 'category':
+            X[fc] = X[fc].astype(object)
+            dtype = X[fc].dtypes
+        elif dtype.kind == 'f':
+            dtype = np.dtype('float64')
+        elif dtype.kind in 'iu':
+            dtype = np.dtype('int64')
         nunique = len(X[fc].unique())
         # standard processing of numerical, categorical, and text features
         if fc in factors:
@@ -1289,80 +1535,88 @@ def create_features(model, X):
                                    encoder, rounding, sentinel)            
         elif dtype == 'float64' or dtype == 'int64' or dtype == 'bool':
             features = get_numerical_features(fnum, fc, X, nunique, dtype,
-                                              sentinel, logtransform, pvalue_level)
+                                              sentinel, logtransform, pvalue_level,
+                                              model)
         elif dtype == 'object':
-            features = get_text_features(fnum, fc, X, nunique, vectorize, ngrams_max)
+            features = get_text_features(fnum, fc, X, nunique, vectorize, ngrams_max,
+                                         model)
         else:
             raise TypeError("Base Feature Error with unrecognized type %s" % dtype)
-        if features.shape[0] == all_features.shape[0]:
-            all_features = np.column_stack((all_features, features))
+        if features.shape[0] == fm.nrows:
+            fm.append(features)
         else:
             logger.info("Feature %s has the wrong number of rows: %d",
                         fc, features.shape[0])
-    all_features = np.delete(all_features, 0, axis=1)
 
-    logger.info("New Feature Count : %d", all_features.shape[1])
+    logger.info("New Feature Count : %d", fm.ncols)
 
-    # Call standard scaler for all features
+    # Call standard scaler for all features, storing the result in place,
+    # as the scaler copies the features if their type or layout differ
 
     if scaling:
         logger.info("Scaling Base Features")
         if scaler == Scalers.standard:
-            all_features = StandardScaler().fit_transform(all_features)
+            fm.values[:] = transform_features(model, ('base', 'scaler'),
+                                              StandardScaler(copy=False),
+                                              fm.values)
         elif scaler == Scalers.minmax:
-            all_features = MinMaxScaler().fit_transform(all_features)
+            fm.values[:] = transform_features(model, ('base', 'scaler'),
+                                              MinMaxScaler(copy=False),
+                                              fm.values)
         else:
             logger.info("Unrecognized scaler: %s", scaler)
     else:
         logger.info("Skipping Scaling")
 
-    # Perform dimensionality reduction only on base feature set
-    base_features = all_features
+    # Perform dimensionality reduction only on base feature set. The
+    # base columns are sliced for each stage, as appending may move
+    # the matrix to a new buffer.
+    nbase = fm.ncols
 
     # Calculate the total, mean, standard deviation, and variance
 
     if numpy_flag:
-        np_features = create_numpy_features(base_features, sentinel)
-        all_features = np.column_stack((all_features, np_features))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        np_features = create_numpy_features(fm.values[:, :nbase], sentinel, model)
+        fm.append(np_features)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Generate scipy features
 
     if scipy_flag:
-        sp_features = create_scipy_features(base_features, sentinel)
-        all_features = np.column_stack((all_features, sp_features))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        sp_features = create_scipy_features(fm.values[:, :nbase], sentinel, model)
+        fm.append(sp_features)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Create clustering features
 
     if clustering:
-        cfeatures = create_clusters(base_features, model)
-        all_features = np.column_stack((all_features, cfeatures))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        cfeatures = create_clusters(fm.values[:, :nbase], model)
+        fm.append(cfeatures)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Create PCA features
 
     if pca:
-        pfeatures = create_pca_features(base_features, model)
-        all_features = np.column_stack((all_features, pfeatures))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        pfeatures = create_pca_features(fm.values[:, :nbase], model)
+        fm.append(pfeatures)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Create Isomap features
 
     if isomap:
-        ifeatures = create_isomap_features(base_features, model)
-        all_features = np.column_stack((all_features, ifeatures))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        ifeatures = create_isomap_features(fm.values[:, :nbase], model)
+        fm.append(ifeatures)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Create T-SNE features
 
     if tsne:
-        tfeatures = create_tsne_features(base_features, model)
-        all_features = np.column_stack((all_features, tfeatures))
-        logger.info("New Feature Count : %d", all_features.shape[1])
+        tfeatures = create_tsne_features(fm.values[:, :nbase], model)
+        fm.append(tfeatures)
+        logger.info("New Feature Count : %d", fm.ncols)
 
     # Return all transformed training and test features
-    return all_features
+    return fm.values
 
 
 #
@@ -1392,10 +1646,9 @@ def select_features(model):
 
     logger.info("Feature Selection")
 
-    # Extract model data.
+    # Extract model data, including any sampled rows.
 
-    X_train = model.X_train
-    y_train = model.y_train
+    X_train, y_train = sampled_rows(model)
 
     # Extract model parameters.
 
@@ -1479,7 +1732,7 @@ def save_features(model, X_train, X_test, y_train=None, y_test=None):
 # Function create_interactions
 #
 
-def create_interactions(model, X):
+def create_interactions(model, X, fm=None):
     r"""Create feature interactions based on the model specifications.
 
     Parameters
@@ -1488,6 +1741,9 @@ def create_interactions(model, X):
         Model object with train and test data.
     X : numpy array
         Feature Matrix.
+    fm : alphapy.FeatureMatrix, optional
+        If specified, the interactions are appended to this matrix,
+        which holds the features ``X``.
 
     Returns
     -------
@@ -1545,8 +1801,13 @@ def create_interactions(model, X):
             support = model.feature_map['poly_support']
         pfeatures = get_polynomials(X[:, support], poly_degree)
         logger.info("Polynomial Feature Count : %d", pfeatures.shape[1])
-        pfeatures = StandardScaler().fit_transform(pfeatures)
-        all_features = np.hstack((all_features, pfeatures))
+        pfeatures = transform_features(model, ('interactions', 'scaler'),
+                                       StandardScaler(copy=False), pfeatures)
+        if fm is not None:
+            fm.append(pfeatures)
+            all_features = fm.values
+        else:
+            all_features = np.hstack((all_features, pfeatures))
         logger.info("New Total Feature Count  : %d", all_features.shape[1])
     else:
         logger.info("Skipping Interactions")
@@ -1583,7 +1844,7 @@ def drop_features(X, drop):
 # Function remove_lv_features
 #
 
-def remove_lv_features(model, X):
+def remove_lv_features(model, X, fm=None):
     r"""Remove low-variance features.
 
     Parameters
@@ -1592,6 +1853,9 @@ def remove_lv_features(model, X):
         Model specifications for removing features.
     X : numpy array
         The feature matrix.
+    fm : alphapy.FeatureMatrix, optional
+        If specified, the low-variance features are removed in place
+        from this matrix, which holds the features ``X``.
 
     Returns
     -------
@@ -1626,10 +1890,96 @@ def remove_lv_features(model, X):
             model.feature_map['lv_support'] = support
         else:
             support = model.feature_map['lv_support']
-        X_reduced = X[:, support]
+        if fm is not None:
+            fm.select(support)
+            X_reduced = fm.values
+        else:
+            X_reduced = X[:, support]
         logger.info("Reduced Feature Count   : %d", X_reduced.shape[1])
     else:
         X_reduced = X
         logger.info("Skipping Low-Variance Features")
 
     return X_reduced
+
+
+#
+# Function get_predict_features
+#
+
+def get_predict_features(model, X_predict):
+    r"""Transform new data into the features of a trained model.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        Model object with the feature map of the trained model.
+    X_predict : pandas.DataFrame
+        The raw prediction data.
+
+    Returns
+    -------
+    all_features : numpy array
+        The features to pass to the model predictor.
+
+    Notes
+    -----
+    The features are created with the transformers stored in the
+    feature map, and the univariate and RFE supports found during
+    training are applied, so the features line up with the
+    columns of the predictor.
+
+    """
+
+    # Extract model parameters
+
+    drop = model.specs['drop']
+    feature_selection = model.specs['feature_selection']
+    rfe = model.specs['rfe']
+
+    # Drop features
+
+    logger.info("Dropping Features: %s", drop)
+    X_predict = drop_features(X_predict, drop)
+
+    # Log feature statistics
+
+    logger.info("Feature Statistics")
+    logger.info("Number of Prediction Rows    : %d", X_predict.shape[0])
+    logger.info("Number of Prediction Columns : %d", X_predict.shape[1])
+
+    # Apply treatments to the feature matrix
+    all_features = apply_treatments(model, X_predict)
+
+    # Create initial features
+    all_features = create_features(model, all_features)
+
+    # Generate interactions
+    all_features = create_interactions(model, all_features)
+
+    # Remove low-variance features
+    all_features = remove_lv_features(model, all_features)
+
+    # Load the univariate support vector, if any
+
+    if feature_selection:
+        logger.info("Getting Univariate Support")
+        try:
+            support = model.feature_map['uni_support']
+            all_features = all_features[:, support]
+            logger.info("New Feature Count : %d", all_features.shape[1])
+        except:
+            logger.info("No Univariate Support")
+
+    # Load the RFE support vector, if any
+
+    if rfe:
+        logger.info("Getting RFE Support")
+        try:
+            support = model.feature_map['rfe_support']
+            all_features = all_features[:, support]
+            logger.info("New Feature Count : %d", all_features.shape[1])
+        except:
+            logger.info("No RFE Support")
+
+    return all_features
@@ -28,7 +28,9 @@
 
 from alphapy.globals import PSEP, SSEP, USEP
 
+from collections import OrderedDict
 import logging
+import numpy as np
 import pandas as pd
 
 
@@ -39,6 +41,29 @@ import pandas as pd
 logger = logging.getLogger(__name__)
 
 
+#
+# Keys for the members of an npz frame archive
+#
+
+NPZ_COLUMNS = '__columns__'
+NPZ_DTYPES = '__dtypes__'
+NPZ_PREFIX = 'col_'
+
+
+#
+# Labels of the date index in stored frames
+#
+
+INDEX_LABELS = ['date', 'Date', 'datetime']
+
+
+#
+# Column name of the index in a spilled frame
+#
+
+SPILL_INDEX = '__index__'
+
+
 #
 # Function frame_name
 #
@@ -89,18 +114,42 @@ class Frame(object):
     ----------
     frames : dict
         Class variable for storing all known frames
+    memory_budget : int
+        Class variable for the maximum number of bytes of the
+        dataframes in memory, or ``None`` for no limit
+    spill_directory : str
+        Class variable for the directory of the spilled dataframes
+    spill_extension : str
+        Class variable for the binary store of the spilled dataframes
+    lru : collections.OrderedDict
+        Class variable for the memory size of each dataframe in memory,
+        from the least to the most recently used
 
     Examples
     --------
     
     >>> Frame('tech', Space('stock', 'prices', '5m'), df)
 
+    Notes
+    -----
+    If there is a ``memory_budget`` (see ``set_frame_budget``), the
+    least recently used dataframes are spilled to disk when the budget
+    is exceeded, and they are reloaded the next time that ``df`` is
+    accessed, so ``Frame.frames[name].df`` works as usual.
+
     """
 
     # class variable to track all frames
 
     frames = {}
 
+    # class variables to bound the memory of all frames
+
+    memory_budget = None
+    spill_directory = None
+    spill_extension = 'npz'
+    lru = OrderedDict()
+
     # __init__
 
     def __init__(self,
@@ -113,27 +162,530 @@ class Frame(object):
             if not fn in Frame.frames:
                 self.name = name
                 self.space = space
-                self.df = df
+                self.index_name = None
+                self.spilled = False
+                self._df = None
                 # add frame to frames list
                 Frame.frames[fn] = self
+                self.df = df
             else:
                 logger.info("Frame ", fn, " already exists")
         else:
             logger.info("df must be of type Pandas DataFrame")
+
+    # df
+
+    @property
+    def df(self):
+        if self.spilled:
+            self.load()
+        self.touch()
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+        self.spilled = False
+        self.touch()
         
     # __str__
 
     def __str__(self):
         return frame_name(self.name, self.space)
 
+    # function memory
+
+    def memory(self):
+        r"""Get the number of bytes of the dataframe in memory."""
+        if self._df is None:
+            return 0
+        return int(self._df.memory_usage(index=True, deep=True).sum())
+
+    # function touch
+
+    def touch(self):
+        r"""Mark the dataframe as the most recently used, and spill the
+        least recently used dataframes if the memory budget is exceeded.
+
+        The size of a dataframe is recorded when it is touched. Columns
+        are added to the dataframes in place, e.g., by ``vmapply``, so
+        a dataframe is measured again before it is spilled.
+        """
+        if Frame.memory_budget is None or self._df is None:
+            return
+        fn = str(self)
+        Frame.lru.pop(fn, None)
+        Frame.lru[fn] = self.memory()
+        # forget the frames that were removed or released
+        for name in list(Frame.lru):
+            if name not in Frame.frames or Frame.frames[name]._df is None:
+                del Frame.lru[name]
+        total = sum(Frame.lru.values())
+        # the most recently used dataframe always stays in memory
+        for lru_name in list(Frame.lru)[:-1]:
+            if total <= Frame.memory_budget:
+                break
+            frame = Frame.frames[lru_name]
+            size = frame.memory()
+            total += size - Frame.lru[lru_name]
+            Frame.lru[lru_name] = size
+            if frame.spill():
+                total -= size
+
+    # function spill
+
+    def spill(self):
+        r"""Write the dataframe to the spill directory and release it.
+
+        Returns
+        -------
+        spilled : bool
+            ``True`` if the dataframe was written and released, or
+            ``False`` if it could not be written and stays in memory.
+
+        """
+        fn = str(self)
+        spill_name = USEP.join(['spill', fn])
+        logger.debug("Spilling frame %s", fn)
+        self.index_name = self._df.index.name
+        written = write_frame(self._df, Frame.spill_directory, spill_name,
+                              Frame.spill_extension, ',', index=True,
+                              index_label=SPILL_INDEX)
+        if not written:
+            logger.info("Could not spill frame %s, keeping it in memory", fn)
+            return False
+        self._df = None
+        self.spilled = True
+        Frame.lru.pop(fn, None)
+        return True
+
+    # function load
+
+    def load(self):
+        r"""Read the dataframe back from the spill directory."""
+        self._df = self.read()
+        self.spilled = False
+
+    # function read
+
+    def read(self):
+        r"""Get the dataframe without reloading it into memory.
+
+        A spilled dataframe is read from the spill directory, but it
+        stays spilled, so reading all the frames of a large group,
+        e.g., for a ``Panel``, does not exceed the memory budget.
+        """
+        if not self.spilled:
+            return self.df
+        fn = str(self)
+        spill_name = USEP.join(['spill', fn])
+        logger.debug("Reading spilled frame %s", fn)
+        df = read_frame(Frame.spill_directory, spill_name,
+                        Frame.spill_extension, ',', index_col=SPILL_INDEX)
+        if df is None:
+            raise IOError("Could not reload spilled frame %s" % fn)
+        df.index.name = self.index_name
+        return df
+
+
+#
+# Function set_frame_budget
+#
+
+def set_frame_budget(memory_budget, directory, extension='npz'):
+    r"""Bound the memory of the dataframes in ``Frame.frames``.
+
+    Parameters
+    ----------
+    memory_budget : int
+        The maximum number of megabytes of the dataframes in memory,
+        or ``None`` for no limit.
+    directory : str
+        Full directory specification for the spilled dataframes.
+    extension : str, optional
+        The binary store for the spilled dataframes, e.g., ``npz``.
+
+    Returns
+    -------
+    None : None
+
+    """
+    if extension not in frame_stores:
+        raise ValueError("Frames cannot be spilled to %s files" % extension)
+    Frame.memory_budget = None if memory_budget is None else int(memory_budget * 1e6)
+    Frame.spill_directory = directory
+    Frame.spill_extension = extension
+    logger.info("Frame memory budget: %s MB", memory_budget)
+    for f in list(Frame.frames.values()):
+        f.touch()
+
+
+#
+# Function read_feather_frame
+#
+
+def read_feather_frame(file_all, columns=None, filters=None):
+    r"""Read a Feather file into a data frame.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+    columns : list, optional
+        The subset of columns to read from the file.
+    filters : list, optional
+        Unused, as Feather files cannot skip rows while reading.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe stored in the Feather file.
+
+    """
+    return pd.read_feather(file_all, columns=columns)
+
+
+#
+# Function write_feather_frame
+#
+
+def write_feather_frame(df, file_all):
+    r"""Write a data frame into a Feather file.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The pandas dataframe to save, with a default index.
+    file_all : str
+        Full path of the file to write.
+
+    Returns
+    -------
+    None : None
+
+    """
+    df.to_feather(file_all)
+
+
+#
+# Function read_feather_columns
+#
+
+def read_feather_columns(file_all):
+    r"""Read the column names of a Feather file.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+
+    Returns
+    -------
+    columns : list
+        The names of the stored columns.
+
+    """
+    import pyarrow.ipc
+    return pyarrow.ipc.open_file(file_all).schema.names
+
+
+#
+# Function read_npz_frame
+#
+
+def read_npz_frame(file_all, columns=None, filters=None):
+    r"""Read a NumPy ``npz`` archive into a data frame.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+    columns : list, optional
+        The subset of columns to read from the file.
+    filters : list, optional
+        Unused, as ``npz`` archives cannot skip rows while reading.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe stored in the archive.
+
+    Notes
+    -----
+    Each column is a separate member of the archive, so only the
+    members for the requested ``columns`` are decompressed. The
+    data types are restored from the archive, e.g., ``category``
+    and time zones.
+
+    """
+    with np.load(file_all, allow_pickle=True) as npz:
+        all_columns = list(npz[NPZ_COLUMNS])
+        if columns is None:
+            columns = all_columns
+        members = {c : i for i, c in enumerate(all_columns)}
+        # older archives do not store the data types
+        dtypes = npz[NPZ_DTYPES] if NPZ_DTYPES in npz.files else None
+        data = OrderedDict()
+        for c in columns:
+            i = members[c]
+            values = npz[NPZ_PREFIX + str(i)]
+            if dtypes is not None:
+                values = npz_values(values, dtypes[i])
+            data[c] = values
+    df = pd.DataFrame(data, columns=columns)
+    return df
+
+
+#
+# Function npz_values
+#
+
+def npz_values(values, dtype):
+    r"""Restore the data type of an array stored in an ``npz`` archive.
+
+    Parameters
+    ----------
+    values : numpy array
+        The stored values, as written by ``write_npz_frame``.
+    dtype : object
+        The original data type of the column.
+
+    Returns
+    -------
+    values : array-like
+        The values in their original data type.
+
+    """
+    if isinstance(dtype, pd.api.types.CategoricalDtype):
+        values = pd.Categorical.from_codes(values, dtype.categories,
+                                           dtype.ordered)
+    elif getattr(dtype, 'tz', None) is not None:
+        values = pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(dtype.tz)
+    elif not isinstance(dtype, np.dtype):
+        values = pd.Series(values).astype(dtype).values
+    return values
+
+
+#
+# Function write_npz_frame
+#
+
+def write_npz_frame(df, file_all):
+    r"""Write a data frame into a NumPy ``npz`` archive.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The pandas dataframe to save, with a default index.
+    file_all : str
+        Full path of the file to write.
+
+    Returns
+    -------
+    None : None
+
+    Notes
+    -----
+    The data types of the columns are stored in the archive as well,
+    because NumPy arrays cannot hold them all. A ``category`` column
+    is stored as its codes, and a column with a time zone is stored
+    in UTC.
+
+    """
+    arrays = {NPZ_COLUMNS : np.array([str(c) for c in df.columns], dtype=object)}
+    dtypes = np.empty(len(df.columns), dtype=object)
+    for i, c in enumerate(df.columns):
+        values = df.iloc[:, i]
+        dtypes[i] = values.dtype
+        if isinstance(values.dtype, pd.api.types.CategoricalDtype):
+            values = values.cat.codes
+        elif getattr(values.dtype, 'tz', None) is not None:
+            values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+        arrays[NPZ_PREFIX + str(i)] = np.asarray(values)
+    arrays[NPZ_DTYPES] = dtypes
+    # np.savez appends its own suffix to a file name, so pass a handle
+    with open(file_all, 'wb') as npzfile:
+        np.savez(npzfile, **arrays)
+
+
+#
+# Function read_npz_columns
+#
+
+def read_npz_columns(file_all):
+    r"""Read the column names of a NumPy ``npz`` archive.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+
+    Returns
+    -------
+    columns : list
+        The names of the stored columns.
+
+    """
+    with np.load(file_all, allow_pickle=True) as npz:
+        columns = list(npz[NPZ_COLUMNS])
+    return columns
+
+
+#
+# Function read_parquet_frame
+#
+
+def read_parquet_frame(file_all, columns=None, filters=None):
+    r"""Read a Parquet file into a data frame.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+    columns : list, optional
+        The subset of columns to read from the file.
+    filters : list, optional
+        Row predicates in the form ``(column, op, value)``, which
+        are pushed down so that non-matching row groups are skipped.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe stored in the Parquet file.
+
+    """
+    if filters:
+        df = pd.read_parquet(file_all, columns=columns, filters=filters)
+    else:
+        df = pd.read_parquet(file_all, columns=columns)
+    return df
+
+
+#
+# Function write_parquet_frame
+#
+
+def write_parquet_frame(df, file_all):
+    r"""Write a data frame into a Parquet file.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The pandas dataframe to save, with a default index.
+    file_all : str
+        Full path of the file to write.
+
+    Returns
+    -------
+    None : None
+
+    """
+    df.to_parquet(file_all, index=False)
+
+
+#
+# Function read_parquet_columns
+#
+
+def read_parquet_columns(file_all):
+    r"""Read the column names of a Parquet file.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+
+    Returns
+    -------
+    columns : list
+        The names of the stored columns.
+
+    """
+    import pyarrow.parquet
+    return pyarrow.parquet.read_schema(file_all).names
+
+
+#
+# Define the binary frame stores (key: file extension)
+#
+# Each store is a (reader, writer, column reader) triple. Parquet
+# and Feather require the optional pyarrow package.
+#
+
+frame_stores = {'feather' : (read_feather_frame, write_feather_frame,
+                             read_feather_columns),
+                'npz'     : (read_npz_frame, write_npz_frame,
+                             read_npz_columns),
+                'parquet' : (read_parquet_frame, write_parquet_frame,
+                             read_parquet_columns)}
+
+
+#
+# Function read_columns
+#
+
+def read_columns(file_all, extension, separator):
+    r"""Read the column names of a file without reading its rows.
+
+    Parameters
+    ----------
+    file_all : str
+        Full path of the file to read.
+    extension : str
+        File name extension, e.g., ``csv`` or ``parquet``.
+    separator : str
+        The delimiter between fields in a delimited file.
+
+    Returns
+    -------
+    columns : list
+        The names of the columns in the file.
+
+    """
+    if extension in frame_stores:
+        columns = frame_stores[extension][2](file_all)
+    else:
+        columns = list(pd.read_csv(file_all, sep=separator, nrows=0).columns)
+    return columns
+
+
+#
+# Function select_rows
+#
+
+def select_rows(df, start=None, end=None):
+    r"""Select the rows of a data frame within a range of row labels.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe to subset.
+    start : object, optional
+        The first row label to keep, inclusive.
+    end : object, optional
+        The last row label to keep, inclusive.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The rows of the dataframe between ``start`` and ``end``.
+
+    """
+    if start is not None:
+        df = df.loc[df.index >= start]
+    if end is not None:
+        df = df.loc[df.index <= end]
+    return df
+
 
 #
 # Function read_frame
 #
 
 def read_frame(directory, filename, extension, separator,
-               index_col=None, squeeze=False):
-    r"""Read a delimiter-separated file into a data frame.
+               index_col=None, squeeze=False, columns=None,
+               start=None, end=None):
+    r"""Read a delimiter-separated or binary file into a data frame.
 
     Parameters
     ----------
@@ -142,13 +694,21 @@ def read_frame(directory, filename, extension, separator,
     filename : str
         Name of the file to read, excluding the ``extension``.
     extension : str
-        File name extension, e.g., ``csv``.
+        File name extension, e.g., ``csv``. Any extension found in
+        ``frame_stores``, e.g., ``parquet``, ``feather``, or ``npz``,
+        is read with the corresponding binary store.
     separator : str
         The delimiter between fields in the file.
     index_col : str, optional
         Column to use as the row labels in the dataframe.
     squeeze : bool, optional
         If the data contains only one column, then return a pandas Series.
+    columns : list, optional
+        The subset of columns to read from the file.
+    start : object, optional
+        The first row label to read, inclusive.
+    end : object, optional
+        The last row label to read, inclusive.
 
     Returns
     -------
@@ -156,16 +716,222 @@ def read_frame(directory, filename, extension, separator,
         The pandas dataframe loaded from the file location. If the file
         cannot be located, then ``None`` is returned.
 
+    Notes
+    -----
+    The row range [``start``, ``end``] applies to the row labels, so
+    normally ``index_col`` is given as well, e.g., ``'date'``. If
+    ``index_col`` is one of ``INDEX_LABELS`` but is not in the file,
+    then the header is checked for the other labels, so files indexed
+    by ``Date`` or ``datetime`` are still read, and files with none of
+    them are read with a default index.
+
     """
     file_only = PSEP.join([filename, extension])
     file_all = SSEP.join([directory, file_only])
     logger.info("Loading data from %s", file_all)
     try:
+        # older files label the date index differently, e.g., Date
+        if index_col in INDEX_LABELS:
+            header = read_columns(file_all, extension, separator)
+            labels = [index_col] + INDEX_LABELS
+            index_col = next((c for c in labels if c in header), None)
+            if index_col is None:
+                logger.info("No date index in %s", file_all)
+        df = read_store(file_all, extension, separator, index_col,
+                        squeeze, columns, start, end)
+    except (FileNotFoundError, KeyError) as e:
+        logger.info("Could not find or access %s: %s", file_all, e)
+        df = None
+    return df
+
+
+#
+# Function read_store
+#
+
+def read_store(file_all, extension, separator, index_col=None,
+               squeeze=False, columns=None, start=None, end=None):
+    r"""Read a file with the store of its extension.
+
+    The parameters are those of ``read_frame``, except that the file
+    is given by its full path, and any error is raised.
+
+    """
+    if columns is not None and index_col and index_col not in columns:
+        columns = [index_col] + list(columns)
+    if extension in frame_stores:
+        filters = []
+        if index_col and start is not None:
+            filters.append((index_col, '>=', start))
+        if index_col and end is not None:
+            filters.append((index_col, '<=', end))
+        reader = frame_stores[extension][0]
+        df = reader(file_all, columns, filters)
+        if index_col:
+            df = df.set_index(index_col)
+    else:
         df = pd.read_csv(file_all, sep=separator, index_col=index_col,
-                         squeeze=squeeze)
-    except:
+                         usecols=columns)
+    # squeeze here, as newer versions of read_csv do not
+    if squeeze and df.shape[1] == 1:
+        df = df[df.columns[0]]
+    df = select_rows(df, start, end)
+    return df
+
+
+#
+# Function downcast_frame
+#
+
+def downcast_frame(df, categories=None):
+    r"""Convert the columns of a dataframe to smaller data types.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe to downcast.
+    categories : list, optional
+        The text columns to store as ``category``.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The dataframe with ``float32`` and the smallest integer
+        columns that hold the values.
+
+    """
+    for col in df.columns:
+        kind = df[col].dtype.kind
+        if kind == 'f':
+            df[col] = pd.to_numeric(df[col], downcast='float')
+        elif kind in 'iu':
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif categories and col in categories:
+            df[col] = df[col].astype('category')
+    return df
+
+
+#
+# Function sample_categories
+#
+
+def sample_categories(sample, columns, category_ratio):
+    r"""Find the text columns of a sample with few unique values.
+
+    Parameters
+    ----------
+    sample : pandas.DataFrame
+        The first rows of the data.
+    columns : list
+        The columns to check.
+    category_ratio : float
+        A text column is a category if its number of unique values
+        is less than this fraction of its values in the sample.
+
+    Returns
+    -------
+    categories : list
+        The names of the category columns.
+
+    """
+    categories = [c for c in columns
+                  if pd.api.types.is_string_dtype(sample[c].dtype) and
+                  sample[c].nunique() < category_ratio * sample[c].count()]
+    return categories
+
+
+#
+# Function read_chunked_frame
+#
+
+def read_chunked_frame(directory, filename, extension, separator,
+                       columns=None, chunksize=100000, sample_rows=10000,
+                       category_ratio=0.5):
+    r"""Read a file in chunks, downcasting the data types of each chunk.
+
+    Parameters
+    ----------
+    directory : str
+        Full directory specification.
+    filename : str
+        Name of the file to read, excluding the ``extension``.
+    extension : str
+        File name extension, e.g., ``csv``.
+    separator : str
+        The delimiter between fields in the file.
+    columns : list, optional
+        The columns to read. Names that are not in the file are ignored.
+    chunksize : int, optional
+        The number of rows in each chunk of a delimited file.
+    sample_rows : int, optional
+        The number of rows sampled for determining the text columns
+        with few enough unique values to be categories.
+    category_ratio : float, optional
+        A text column is a category if its number of unique values
+        is less than this fraction of its values in the sample.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The downcast dataframe, or ``None`` if the file is not found.
+
+    Notes
+    -----
+    Only one chunk is held with its full-size types at a time, but the
+    downcast chunks are joined with ``pandas.concat``, which copies
+    them, so the peak memory is about twice the size of the downcast
+    dataframe. The memory saved by downcasting is logged.
+
+    """
+    file_only = PSEP.join([filename, extension])
+    file_all = SSEP.join([directory, file_only])
+    logger.info("Loading data in chunks from %s", file_all)
+    try:
+        if extension in frame_stores:
+            # binary stores are already typed, so read them in one chunk,
+            # with only the requested columns that are stored
+            if columns is not None:
+                header = read_columns(file_all, extension, separator)
+                columns = [c for c in header if c in columns]
+            df = read_store(file_all, extension, separator, columns=columns)
+            columns = list(df.columns)
+            sample = df.head(sample_rows)
+            categories = sample_categories(sample, columns, category_ratio)
+            chunks = [df]
+        else:
+            sample = pd.read_csv(file_all, sep=separator, nrows=sample_rows)
+            if columns is not None:
+                columns = [c for c in sample.columns if c in columns]
+            else:
+                columns = list(sample.columns)
+            categories = sample_categories(sample, columns, category_ratio)
+            # a chunk with only missing values would otherwise be float
+            chunks = pd.read_csv(file_all, sep=separator, usecols=columns,
+                                 chunksize=chunksize,
+                                 dtype={c : object for c in categories})
+        mem_before = 0
+        frames = []
+        for chunk in chunks:
+            mem_before += chunk.memory_usage(deep=True).sum()
+            chunk = downcast_frame(chunk, categories)
+            for c in categories:
+                if not isinstance(chunk[c].dtype, pd.api.types.CategoricalDtype):
+                    chunk[c] = chunk[c].astype('category')
+            frames.append(chunk)
+        # share the categories among the chunks, so they stay categorical
+        for c in categories:
+            values = pd.Index(pd.unique(np.concatenate(
+                [np.asarray(f[c].cat.categories, dtype=object) for f in frames])))
+            for f in frames:
+                f[c] = f[c].cat.set_categories(values)
+        df = pd.concat(frames)
+        mem_after = df.memory_usage(deep=True).sum()
+        logger.info("Memory: %.1f MB => %.1f MB [saved %.1f MB]",
+                    mem_before / 1e6, mem_after / 1e6,
+                    (mem_before - mem_after) / 1e6)
+    except (FileNotFoundError, KeyError) as e:
+        logger.info("Could not find or access %s: %s", file_all, e)
         df = None
-        logger.info("Could not find or access %s", file_all)
     return df
 
 
@@ -175,7 +941,7 @@ def read_frame(directory, filename, extension, separator,
 
 def write_frame(df, directory, filename, extension, separator,
                 index=False, index_label=None):
-    r"""Write a dataframe into a delimiter-separated file.
+    r"""Write a dataframe into a delimiter-separated or binary file.
 
     Parameters
     ----------
@@ -186,7 +952,10 @@ def write_frame(df, directory, filename, extension, separator,
     filename : str
         Name of the file to write, excluding the ``extension``.
     extension : str
-        File name extension, e.g., ``csv``.
+        File name extension, e.g., ``csv``. Any extension found in
+        ``frame_stores``, e.g., ``parquet``, ``feather``, or ``npz``,
+        is written with the corresponding binary store, which
+        preserves the data types of all columns.
     separator : str
         The delimiter between fields in the file.
     index : bool, optional
@@ -196,16 +965,35 @@ def write_frame(df, directory, filename, extension, separator,
 
     Returns
     -------
-    None : None
+    written : bool
+        ``True`` if the file was written.
+
+    Notes
+    -----
+    As with a delimited file, the index of a binary file is stored
+    as the column ``index_label``, so it is restored by calling
+    ``read_frame`` with ``index_col``.
 
     """
     file_only = PSEP.join([filename, extension])
     file_all = SSEP.join([directory, file_only])
     logger.info("Writing data frame to %s", file_all)
     try:
-        df.to_csv(file_all, sep=separator, index=index, index_label=index_label)
+        if extension in frame_stores:
+            if index:
+                label = index_label or df.index.name or 'index'
+                df = df.rename_axis(label).reset_index()
+            else:
+                df = df.reset_index(drop=True)
+            df.columns = [str(c) for c in df.columns]
+            writer = frame_stores[extension][1]
+            writer(df, file_all)
+        else:
+            df.to_csv(file_all, sep=separator, index=index, index_label=index_label)
     except:
         logger.info("Could not write data frame to %s", file_all)
+        return False
+    return True
 
 
 #
@@ -249,12 +1037,13 @@ def load_frames(group, directory, extension, separator, splits=False):
             fname = frame_name(gn, gspace)
             if fname in Frame.frames:
                 logger.info("Joining Frame %s", fname)
-                df = Frame.frames[fname].df
+                df = Frame.frames[fname].read()
             else:
                 logger.info("Data Frame for %s not found", fname)
                 # read file for corresponding frame
                 logger.info("Load Data Frame %s from file", fname)
-                df = read_frame(directory, fname, extension, separator)
+                df = read_frame(directory, fname, extension, separator,
+                                index_col='date')
             # add this frame to the consolidated frame list
             if df is not None and not df.empty:
                 # set the name
@@ -302,6 +1091,7 @@ def dump_frames(group, directory, extension, separator):
         if fname in Frame.frames:
             logger.info("Writing Data Frame for %s", fname)
             df = Frame.frames[fname].df
-            write_frame(df, directory, fname, extension, separator, index=True)
+            write_frame(df, directory, fname, extension, separator,
+                        index=True, index_label=df.index.name or 'date')
         else:
             logger.info("Data Frame for %s not found", fname)
@@ -30,10 +30,14 @@ from alphapy.alias import Alias
 from alphapy.analysis import Analysis
 from alphapy.analysis import run_analysis
 from alphapy.data import get_feed_data
+from alphapy.data import resample_frames
+from alphapy.frame import set_frame_budget
 from alphapy.globals import PSEP, SSEP
 from alphapy.group import Group
 from alphapy.market_variables import Variable
 from alphapy.market_variables import vmapply
+from alphapy.market_variables import vmupdate
+from alphapy.market_variables import vregister
 from alphapy.model import get_model_config
 from alphapy.model import Model
 from alphapy.portfolio import gen_portfolio
@@ -91,11 +95,43 @@ def get_market_config():
 
     specs['forecast_period'] = cfg['market']['forecast_period']
     specs['fractal'] = cfg['market']['fractal']
+    try:
+        specs['drop_scratch'] = cfg['market']['drop_scratch']
+    except:
+        specs['drop_scratch'] = False
+    try:
+        specs['feature_jobs'] = cfg['market']['feature_jobs']
+    except:
+        specs['feature_jobs'] = 1
+    try:
+        specs['feed_cache'] = cfg['market']['feed_cache']
+    except:
+        specs['feed_cache'] = False
     specs['leaders'] = cfg['market']['leaders']
+    try:
+        specs['memory_budget'] = cfg['market']['memory_budget']
+    except:
+        specs['memory_budget'] = None
     specs['data_history'] = cfg['market']['data_history']
     specs['predict_history'] = cfg['market']['predict_history']
+    try:
+        specs['resample'] = cfg['market']['resample']
+    except:
+        specs['resample'] = []
     specs['schema'] = cfg['market']['schema']
     specs['target_group'] = cfg['market']['target_group']
+    try:
+        specs['incremental'] = cfg['market']['incremental']
+    except:
+        specs['incremental'] = False
+    try:
+        specs['verify_updates'] = cfg['market']['verify_updates']
+    except:
+        specs['verify_updates'] = False
+    try:
+        specs['write_input'] = cfg['market']['write_input']
+    except:
+        specs['write_input'] = True
 
     # Create the subject/schema/fractal namespace
 
@@ -160,15 +196,23 @@ def get_market_config():
     # Log the stock parameters
 
     logger.info('MARKET PARAMETERS:')
+    logger.info('drop_scratch    = %r', specs['drop_scratch'])
+    logger.info('feature_jobs    = %d', specs['feature_jobs'])
     logger.info('features        = %s', specs['features'])
+    logger.info('feed_cache      = %r', specs['feed_cache'])
     logger.info('forecast_period = %d', specs['forecast_period'])
     logger.info('fractal         = %s', specs['fractal'])
+    logger.info('incremental     = %r', specs['incremental'])
     logger.info('leaders         = %s', specs['leaders'])
+    logger.info('memory_budget   = %s', specs['memory_budget'])
     logger.info('data_history    = %d', specs['data_history'])
     logger.info('predict_history = %s', specs['predict_history'])
+    logger.info('resample        = %s', specs['resample'])
     logger.info('schema          = %s', specs['schema'])
     logger.info('system          = %s', specs['system'])
     logger.info('target_group    = %s', specs['target_group'])
+    logger.info('verify_updates  = %r', specs['verify_updates'])
+    logger.info('write_input     = %r', specs['write_input'])
 
     # Market Specifications
     return specs
@@ -207,18 +251,29 @@ def market_pipeline(model, market_specs):
 
     # Get any model specifications
 
+    directory = model.specs['directory']
+    extension = model.specs['extension']
     predict_mode = model.specs['predict_mode']
+    separator = model.specs['separator']
     target = model.specs['target']
 
     # Get any market specifications
 
     data_history = market_specs['data_history']
+    drop_scratch = market_specs['drop_scratch']
+    feature_jobs = market_specs['feature_jobs']
     features = market_specs['features']
+    feed_cache = market_specs['feed_cache']
     forecast_period = market_specs['forecast_period']
     functions = market_specs['functions']
+    incremental = market_specs['incremental']
     leaders = market_specs['leaders']
+    memory_budget = market_specs['memory_budget']
     predict_history = market_specs['predict_history']
+    resample = market_specs['resample']
     target_group = market_specs['target_group']
+    verify_updates = market_specs['verify_updates']
+    write_input = market_specs['write_input']
 
     # Get the system specifications
 
@@ -244,15 +299,35 @@ def market_pipeline(model, market_specs):
     group = Group.groups[target_group]
     logger.info("All Members: %s", group.members)
 
+    # Bound the memory of the frames [if specified]
+
+    if memory_budget:
+        set_frame_budget(memory_budget, SSEP.join([directory, 'data']))
+
     # Get stock data
 
     lookback = predict_history if predict_mode else data_history
-    daily = get_feed_data(group, lookback)
+    cache_dir = SSEP.join([directory, 'data']) if feed_cache else None
+    daily = get_feed_data(group, lookback, cache_dir, extension, separator)
+
+    # Derive the frames of any coarser fractals from the feed data
 
-    # Apply the features to all of the frames
+    if resample:
+        resample_frames(group, resample)
 
-    vmapply(group, features, functions)
-    vmapply(group, [target], functions)
+    # Apply the features to all of the frames. A system evaluates its
+    # conditions from the frames, so it keeps the intermediate columns.
+
+    vregister(functions)
+    keep_scratch = not drop_scratch or bool(system_specs)
+    if incremental:
+        data_dir = SSEP.join([directory, 'data'])
+        vmupdate(group, features + [target], data_dir, extension,
+                 separator, functions, verify=verify_updates,
+                 keep_scratch=keep_scratch, history=data_history)
+    else:
+        vmapply(group, features + [target], functions, feature_jobs,
+                keep_scratch)
 
     # Run a system or an analysis
 
@@ -269,7 +344,8 @@ def market_pipeline(model, market_specs):
     else:
         # run the analysis, including the model pipeline
         a = Analysis(model, group)
-        results = run_analysis(a, forecast_period, leaders, predict_history)
+        results = run_analysis(a, forecast_period, leaders, predict_history,
+                               write_input=write_input)
 
     # Return the completed model
     return model
@@ -45,18 +45,27 @@
 # Imports
 #
 
+from alphapy.alias import Alias
 from alphapy.alias import get_alias
 from alphapy.frame import Frame
 from alphapy.frame import frame_name
-from alphapy.globals import BSEP, LOFF, ROFF, USEP
+from alphapy.frame import read_frame
+from alphapy.frame import write_frame
+from alphapy.globals import LOFF, ROFF, PSEP, SSEP, USEP
+from alphapy.panel import Panel
 from alphapy.utilities import valid_name
 
+import ast
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from importlib import import_module
+import inspect
 import logging
 import numpy as np
+import os
 import pandas as pd
-import parser
+import pickle
 import re
 import sys
 
@@ -68,6 +77,89 @@ import sys
 logger = logging.getLogger(__name__)
 
 
+#
+# Compiled expressions, keyed by the substituted expression
+#
+
+vexpr_cache = {}
+
+
+#
+# Dispatch table of the variable functions, and the registered
+# external functions
+#
+
+vdispatch = {}
+vregistered = set()
+
+
+#
+# Grammar of variable names and expressions
+#
+
+LAG_REGEX = re.compile(r'^-?[0-9]+$')
+NUMBER_REGEX = re.compile(r'[-+]?[0-9]*\.?[0-9]+')
+WORD_REGEX = re.compile(r'\w+')
+
+
+#
+# Maximum number of entries of each name cache
+#
+
+VCACHE_SIZE = 4096
+
+
+#
+# Rolling windows of the variable functions that are computed as
+# families: function name => list of (kind, column, period), where
+# the column and period are parameter names or literal columns
+#
+
+vkernel_specs = {
+    'abovema' : [('mean', 'c', 'p')],
+    'belowma' : [('mean', 'c', 'p')],
+    'highest' : [('max', 'c', 'p')],
+    'lowest'  : [('min', 'c', 'p')],
+    'ma'      : [('mean', 'c', 'p')],
+    'maratio' : [('mean', 'c', 'p1'), ('mean', 'c', 'p2')],
+    'rsi'     : [('mean', 'pval', 'p'), ('mean', 'mval', 'p')]
+    }
+
+
+#
+# Cross-sectional variable functions, which compare a column across
+# all the members of a group on each date, e.g., ``xrank_roi_5``
+#
+
+vcross_names = ['xdemean', 'xpercentile', 'xrank', 'xzscore']
+
+
+#
+# Variable functions that depend on all of the prior rows, e.g.,
+# exponential moving averages, so they cannot be warmed up from
+# a window of recent rows, and are updated with their streams
+# (see ``alphapy.stream``) instead
+#
+
+vrecursive_names = ['adx', 'diminus', 'diplus', 'ema']
+
+
+#
+# Variables that the variable functions calculate themselves, e.g.,
+# with ``vexec``, formatted with the arguments of the function
+#
+
+vinternal = {
+    'dminus'    : ['low[1]', 'high[1]'],
+    'dmplus'    : ['low[1]', 'high[1]'],
+    'gap'       : ['close[1]'],
+    'rsi'       : ['net'],
+    'truehigh'  : ['low[1]'],
+    'truelow'   : ['high[1]'],
+    'truerange' : ['low[1]', 'high[1]']
+    }
+
+
 #
 # Class Variable
 #
@@ -121,7 +213,7 @@ class Variable(object):
                     logger.info("Invalid variable key: %s", name)
                     return
                 try:
-                    result = parser.expr(expr)
+                    result = ast.parse(expr.strip(), mode='eval')
                 except:
                     logger.info("Invalid expression: %s", expr)
                     return
@@ -188,27 +280,56 @@ def vparse(vname):
 
     """
 
+    # the alias is part of the cache key, so new aliases take effect
+    root = vname.split(LOFF, 1)[0].split(USEP, 1)[0]
+    vxlag, root, plist, lag = vgrammar(vname, get_alias(root))
+    return vxlag, root, list(plist), lag
+
+
+#
+# Function vgrammar
+#
+
+@lru_cache(maxsize=VCACHE_SIZE)
+def vgrammar(vname, alias=None):
+    r"""Split a variable name into its components, with memoization.
+
+    Parameters
+    ----------
+    vname : str
+        The name of the variable.
+    alias : str, optional
+        The value of the alias of the root of the name, if any.
+
+    Returns
+    -------
+    vxlag : str
+        Variable name without the ``lag`` component.
+    root : str
+        The base variable name without the parameters.
+    plist : tuple
+        The parameters.
+    lag : int
+        The offset of the variable.
+
+    """
     # split along lag first
     lsplit = vname.split(LOFF)
     vxlag = lsplit[0]
     # if necessary, substitute any alias
-    root = vxlag.split(USEP)[0]
-    alias = get_alias(root)
     if alias:
+        root = vxlag.split(USEP)[0]
         vxlag = vxlag.replace(root, alias)
     vsplit = vxlag.split(USEP)
     root = vsplit[0]
-    plist = vsplit[1:]
+    plist = tuple(vsplit[1:])
     # extract lag
     lag = 0
     if len(lsplit) > 1:
         # lag is present
         slag = lsplit[1].replace(ROFF, '')
-        if len(slag) > 0:
-            lpat = r'(^-?[0-9]+$)'
-            lre = re.compile(lpat)
-            if lre.match(slag):
-                lag = int(slag)
+        if LAG_REGEX.match(slag):
+            lag = int(slag)
     # return all components
     return vxlag, root, plist, lag
 
@@ -231,13 +352,18 @@ def allvars(expr):
         List of valid variable names.
 
     """
-    regex = re.compile('\w+')
-    items = regex.findall(expr)
-    vlist = []
-    for item in items:
-        if valid_name(item):
-            vlist.append(item)
-    return vlist
+    return list(vnames(expr))
+
+
+#
+# Function vnames
+#
+
+@lru_cache(maxsize=VCACHE_SIZE)
+def vnames(expr):
+    r"""Get the tuple of valid names in the expression, with memoization."""
+    items = WORD_REGEX.findall(expr)
+    return tuple(item for item in items if valid_name(item))
 
 
 #
@@ -293,6 +419,7 @@ def vtree(vname):
 # Function vsub
 #
 
+@lru_cache(maxsize=VCACHE_SIZE)
 def vsub(v, expr):
     r"""Substitute the variable parameters into the expression.
 
@@ -316,8 +443,7 @@ def vsub(v, expr):
 
     """
     # numbers pattern
-    npat = '[-+]?[0-9]*\.?[0-9]+'
-    nreg = re.compile(npat)
+    nreg = NUMBER_REGEX
     # find all number locations in variable name
     vnums = nreg.findall(v)
     viter = nreg.finditer(v)
@@ -351,106 +477,1450 @@ def vsub(v, expr):
     newexpr += expr[estart:elen]
     return newexpr
 
-    
+
+#
+# Function vconstant
+#
+
+def vconstant(node):
+    r"""Get the value of a constant node of an expression, or ``None``."""
+    if isinstance(node, getattr(ast, 'Index', ())):
+        node = node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = vconstant(node.operand)
+        return None if value is None else -value
+    for node_type, field in [('Constant', 'value'), ('Num', 'n'),
+                             ('NameConstant', 'value')]:
+        if isinstance(node, getattr(ast, node_type, ())):
+            return getattr(node, field)
+    return None
+
+
+#
+# Function vlag
+#
+
+def vlag(values, lag):
+    r"""Shift an array of values by the given number of rows.
+
+    Parameters
+    ----------
+    values : numpy array
+        The values of a variable.
+    lag : int
+        The offset, where ``1`` is the previous value.
+
+    Returns
+    -------
+    lagged : numpy array
+        The shifted values. The missing values of a boolean array
+        are ``False``, and the missing values of a numeric array
+        are ``NaN``.
+
+    """
+    if lag == 0:
+        return values
+    if values.dtype == bool:
+        lagged = np.zeros(len(values), dtype=bool)
+    else:
+        lagged = np.full(len(values), np.nan)
+    if abs(lag) < len(values):
+        if lag > 0:
+            lagged[lag:] = values[:-lag]
+        else:
+            lagged[:lag] = values[-lag:]
+    return lagged
+
+
+#
+# Functions available in expressions
+#
+
+vexpr_funcs = {'abs'     : np.abs,
+               'arccos'  : np.arccos,
+               'arccosh' : np.arccosh,
+               'arcsin'  : np.arcsin,
+               'arcsinh' : np.arcsinh,
+               'arctan'  : np.arctan,
+               'arctan2' : np.arctan2,
+               'arctanh' : np.arctanh,
+               'cos'     : np.cos,
+               'cosh'    : np.cosh,
+               'exp'     : np.exp,
+               'expm1'   : np.expm1,
+               'log'     : np.log,
+               'log10'   : np.log10,
+               'log1p'   : np.log1p,
+               'sin'     : np.sin,
+               'sinh'    : np.sinh,
+               'sqrt'    : np.sqrt,
+               'tan'     : np.tan,
+               'tanh'    : np.tanh}
+
+
+#
+# Class VTransformer
+#
+
+class VTransformer(ast.NodeTransformer):
+    """Rewrite the syntax tree of an expression for array evaluation.
+
+    Each variable and each lagged variable, e.g., ``close[1]``, becomes
+    a term that is bound to an array at evaluation time. The boolean
+    operators ``and``, ``or``, and ``not`` become the element-wise
+    operators ``&``, ``|``, and ``~``. Any other kind of node raises
+    a ``ValueError``.
+
+    """
+
+    allowed = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare,
+               ast.Load, ast.operator, ast.unaryop, ast.cmpop)
+
+    # __init__
+
+    def __init__(self):
+        self.terms = OrderedDict()
+
+    # function term
+
+    def term(self, name, lag, node):
+        key = (name, lag)
+        if key not in self.terms:
+            self.terms[key] = '_v%d' % len(self.terms)
+        return ast.copy_location(ast.Name(id=self.terms[key], ctx=ast.Load()), node)
+
+    # function visit_Name
+
+    def visit_Name(self, node):
+        if node.id in ['True', 'False']:
+            return node
+        return self.term(node.id, 0, node)
+
+    # function visit_Subscript
+
+    def visit_Subscript(self, node):
+        lag = vconstant(node.slice)
+        if not isinstance(node.value, ast.Name) or type(lag) is not int:
+            raise ValueError("Invalid offset in expression")
+        return self.term(node.value.id, lag, node)
+
+    # function visit_BoolOp
+
+    def visit_BoolOp(self, node):
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        values = [self.visit(v) for v in node.values]
+        new_node = values[0]
+        for value in values[1:]:
+            new_node = ast.BinOp(left=new_node, op=op, right=value)
+        return ast.copy_location(new_node, node)
+
+    # function visit_UnaryOp
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.Not):
+            node.op = ast.Invert()
+        return self.generic_visit(node)
+
+    # function visit_Compare
+
+    def visit_Compare(self, node):
+        node = self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a chained comparison is the element-wise and of its pairs,
+        # e.g., a > b > c is (a > b) & (b > c)
+        operands = [node.left] + node.comparators
+        pairs = [ast.Compare(left=operands[i], ops=[op],
+                             comparators=[operands[i+1]])
+                 for i, op in enumerate(node.ops)]
+        new_node = pairs[0]
+        for pair in pairs[1:]:
+            new_node = ast.BinOp(left=new_node, op=ast.BitAnd(), right=pair)
+        return ast.copy_location(new_node, node)
+
+    # function visit_Call
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in vexpr_funcs \
+           or node.keywords:
+            raise ValueError("Invalid function in expression")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    # function generic_visit
+
+    def generic_visit(self, node):
+        if vconstant(node) is None and not isinstance(node, self.allowed):
+            raise ValueError("Invalid syntax %s in expression" % type(node).__name__)
+        return super(VTransformer, self).generic_visit(node)
+
+
+#
+# Class VExpression
+#
+
+class VExpression(object):
+    """Compile an expression of the Variable Definition Language.
+
+    The expression is parsed once into a syntax tree and compiled into
+    code that evaluates directly on the column arrays of a dataframe.
+    As in ``pandas.eval``, ``&`` and ``|`` have the precedence of ``and``
+    and ``or``, e.g., ``rr_3_20 <= 0.9 & netup`` compares before the
+    ``&``. A lag is an offset on a variable, e.g., ``close[1]`` is the
+    previous close. An expression that cannot be compiled is evaluated
+    with ``pandas.eval`` instead.
+
+    Parameters
+    ----------
+    expr : str
+        The expression with its parameters substituted.
+
+    Attributes
+    ----------
+    variables : list
+        The variables in the expression, without any lags.
+    lags : dict
+        The largest lag of each variable.
+
+    Notes
+    -----
+    The compiled code is not pickled with the expression, e.g., when
+    a plan is sent to a worker process, so it is compiled again from
+    ``expr`` when the expression is unpickled.
+
+    Examples
+    --------
+
+    >>> vexpr = VExpression('close > close[1] & netup')
+    >>> f['higher_up'] = vexpr.evaluate(f)
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 expr):
+        # code
+        self.expr = expr
+        self.compile()
+
+    # __getstate__
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['code'] = None
+        return state
+
+    # __setstate__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.compile()
+
+    # __str__
+
+    def __str__(self):
+        return self.expr
+
+    # function compile
+
+    def compile(self):
+        r"""Compile the expression into code and its terms."""
+        expr = self.expr
+        self.code = None
+        self.terms = []
+        try:
+            text = expr.replace('&', ' and ').replace('|', ' or ')
+            tree = ast.parse(text.strip(), mode='eval')
+            transformer = VTransformer()
+            tree = ast.fix_missing_locations(transformer.visit(tree))
+            self.code = compile(tree, '<vexpr>', 'eval')
+            self.terms = [(name, lag, local) for (name, lag), local
+                          in transformer.terms.items()]
+        except (SyntaxError, ValueError) as e:
+            logger.debug("Using pandas.eval for %s: %s", expr, e)
+            self.terms = [(name, 0, name) for name in allvars(expr)]
+        self.variables = list(OrderedDict.fromkeys([t[0] for t in self.terms]))
+        self.lags = {}
+        for name, lag, local in self.terms:
+            self.lags[name] = max(self.lags.get(name, 0), lag)
+
+    # function evaluate
+
+    def evaluate(self, f):
+        r"""Evaluate the expression on a dataframe.
+
+        Parameters
+        ----------
+        f : pandas.DataFrame
+            Dataframe with all of the variables in the expression.
+
+        Returns
+        -------
+        result : numpy array or pandas.Series
+            The value of the expression for each row of ``f``.
+
+        """
+        if self.code is None:
+            return f.eval(self.expr)
+        env = dict(vexpr_funcs)
+        for name, lag, local in self.terms:
+            env[local] = vlag(f[name].values, lag)
+        with np.errstate(all='ignore'):
+            result = eval(self.code, {'__builtins__' : {}}, env)
+        return result
+
+
+#
+# Function vexpression
+#
+
+def vexpression(expr):
+    r"""Get the compiled form of an expression from the cache.
+
+    Parameters
+    ----------
+    expr : str
+        The expression with its parameters substituted.
+
+    Returns
+    -------
+    vexpr : alphapy.VExpression
+        The compiled expression.
+
+    """
+    vexpr = vexpr_cache.get(expr)
+    if vexpr is None:
+        vexpr = VExpression(expr)
+        vexpr_cache[expr] = vexpr
+    return vexpr
+
+
+#
+# Function vregister
+#
+
+def vregister(vfuncs=None):
+    r"""Add variable functions to the dispatch table.
+
+    The first call adds all of the functions in this module. The
+    functions of ``vfuncs`` are imported only the first time they
+    are registered, and they take precedence over any local function
+    with the same name.
+
+    Parameters
+    ----------
+    vfuncs : dict, optional
+        Dictionary of external modules and functions, i.e., the
+        ``functions`` section of ``market.yml``.
+
+    Returns
+    -------
+    None : None
+
+    Other Parameters
+    ----------------
+    vdispatch : dict
+        Global dictionary of variable functions
+
+    """
+    if not vdispatch:
+        module = sys.modules[__name__]
+        for name in dir(module):
+            obj = getattr(module, name)
+            if inspect.isfunction(obj):
+                vdispatch[name] = obj
+    if vfuncs:
+        for m in vfuncs:
+            for func_name in vfuncs[m]:
+                if (m, func_name) not in vregistered:
+                    ext_module = import_module(m)
+                    vdispatch[func_name] = getattr(ext_module, func_name)
+                    vregistered.add((m, func_name))
+
+
+#
+# Function vstep
+#
+
+def vstep(v, vfuncs=None):
+    r"""Compile a variable into a step of an execution plan.
+
+    Parsing the variable name, substituting the parameters into its
+    expression, and finding its function are done once here, so the
+    step can be run on any number of dataframes.
+
+    Parameters
+    ----------
+    v : str
+        Variable to compile.
+    vfuncs : dict, optional
+        Dictionary of external modules and functions.
+
+    Returns
+    -------
+    step : tuple
+        The variable name, the name without the lag, the lag, the
+        compiled expression (or ``None``), and the function and its
+        parameters (or ``None``).
+
+    Other Parameters
+    ----------------
+    Variable.variables : dict
+        Global dictionary of variables
+
+    """
+    vxlag, root, plist, lag = vparse(v)
+    logger.debug("vstep : %s", v)
+    logger.debug("vxlag : %s", vxlag)
+    logger.debug("root  : %s", root)
+    logger.debug("plist : %s", plist)
+    logger.debug("lag   : %s", lag)
+    estr = None
+    func = None
+    params = []
+    if root in Variable.variables:
+        logger.debug("Found variable %s: ", root)
+        vroot = Variable.variables[root]
+        expr = vroot.expr
+        expr_new = vsub(vxlag, expr)
+        estr = vexpression(expr_new)
+        logger.debug("Expression: %s", estr)
+    else:
+        logger.debug("Did not find variable: %s", root)
+        # Must be a function call
+        func_name = root
+        # Convert the parameter list
+        for p in plist:
+            try:
+                params.append(int(p))
+            except:
+                try:
+                    params.append(float(p))
+                except:
+                    params.append(p)
+        # Find the function in the dispatch table
+        vregister(vfuncs)
+        func = vdispatch.get(func_name)
+        if func is None:
+            logger.debug("Could not find function %s", func_name)
+        elif func_name in vcross_names:
+            # the parameters are the name of the column to compare
+            params = [USEP.join(plist)]
+    return (v, vxlag, lag, estr, func, params)
+
+
+#
+# Function rolling_means
+#
+
+def rolling_means(values, periods):
+    r"""Calculate the rolling means of several periods in one pass.
+
+    Parameters
+    ----------
+    values : numpy array
+        The input values.
+    periods : list
+        The periods of the rolling windows.
+
+    Returns
+    -------
+    means : dict
+        The array of rolling means for each period, with ``NaN`` until
+        the window is full or when the window contains a ``NaN``.
+
+    Notes
+    -----
+    All the windows are differences of the same cumulative sums, so
+    each additional period costs only a few vectorized operations.
+    The cumulative sums restart at every block of rows as long as the
+    longest period, so a window spans at most two blocks, and the
+    rounding error of a sum does not grow with the length of the series.
+
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    isnan = np.isnan(values)
+    cnan = np.concatenate(([0], np.cumsum(isnan)))
+    # cumulative sums within each block of b rows
+    b = max([p for p in periods if 0 < p <= n] + [1])
+    nblocks = -(-n // b)
+    padded = np.zeros(nblocks * b)
+    padded[:n] = np.where(isnan, 0.0, values)
+    csum = padded.reshape(nblocks, b).cumsum(axis=1).ravel()
+    totals = csum[b-1::b]
+    means = {}
+    for p in periods:
+        mean = np.full(n, np.nan)
+        if 0 < p <= n:
+            ends = np.arange(p - 1, n)
+            starts = ends - p + 1
+            # the sum from the start of the block, plus the rest of
+            # the previous block if the window starts there
+            sums = csum[ends] - np.where(starts % b > 0, csum[starts - 1], 0.0)
+            sums += np.where(starts // b < ends // b, totals[starts // b], 0.0)
+            nans = cnan[p:] - cnan[:-p]
+            mean[p-1:] = np.where(nans > 0, np.nan, sums / p)
+        means[p] = mean
+    return means
+
+
+#
+# Function rolling_extremes
+#
+
+def rolling_extremes(values, periods, how='max'):
+    r"""Calculate the rolling maximum or minimum of several periods
+    in one pass.
+
+    Parameters
+    ----------
+    values : numpy array
+        The input values.
+    periods : list
+        The periods of the rolling windows.
+    how : str, optional
+        ``max`` or ``min``.
+
+    Returns
+    -------
+    extremes : dict
+        The array of rolling extremes for each period, with ``NaN``
+        until the window is full or when the window contains a ``NaN``.
+
+    Notes
+    -----
+    The extremes of all the power-of-two windows up to the longest
+    period are built by doubling, and the window of any period is the
+    extreme of two overlapping power-of-two windows.
+
+    """
+    op = np.maximum if how == 'max' else np.minimum
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    # tables[k][i] is the extreme of the 2**k values ending at row i
+    tables = [values]
+    pmax = max(periods) if periods else 0
+    w = 1
+    while 2 * w <= min(pmax, n):
+        prev = tables[-1]
+        table = np.full(n, np.nan)
+        table[w:] = op(prev[w:], prev[:-w])
+        tables.append(table)
+        w *= 2
+    extremes = {}
+    for p in periods:
+        extreme = np.full(n, np.nan)
+        if 0 < p <= n:
+            k = p.bit_length() - 1
+            table = tables[k]
+            d = p - 2**k
+            extreme[p-1:] = op(table[p-1:], table[p-1-d:n-d])
+        extremes[p] = extreme
+    return extremes
+
+
+#
+# Class RollingKernels
+#
+
+class RollingKernels(object):
+    """Share the rolling windows of a family of variables.
+
+    While an execution plan runs on a frame, the first request for
+    a rolling window of a column computes the windows of every period
+    that the plan needs for that column, e.g., ``cma_3`` through
+    ``cma_50`` from a single pass over ``close``.
+
+    Attributes
+    ----------
+    frame : pandas.DataFrame
+        The frame of the running plan, or ``None``.
+    families : dict
+        The periods of each (kind, column) in the plan.
+    windows : dict
+        The computed arrays of each (kind, column).
+
+    """
+
+    # __init__
+
+    def __init__(self):
+        # code
+        self.frame = None
+        self.families = {}
+        self.windows = {}
+
+    # function start
+
+    def start(self, f, families):
+        self.frame = f
+        self.families = families
+        self.windows = {}
+
+    # function stop
+
+    def stop(self):
+        self.frame = None
+        self.families = {}
+        self.windows = {}
+
+    # function window
+
+    def window(self, f, c, p, kind):
+        r"""Get a rolling window, or ``None`` if no plan is running."""
+        if f is not self.frame or c not in f.columns:
+            return None
+        values = f[c].values
+        if not np.issubdtype(values.dtype, np.number):
+            return None
+        key = (kind, c)
+        windows = self.windows.setdefault(key, {})
+        if p not in windows:
+            periods = set(self.families.get(key, ())) - set(windows)
+            periods.add(p)
+            if kind == 'mean':
+                windows.update(rolling_means(values, sorted(periods)))
+            else:
+                windows.update(rolling_extremes(values, sorted(periods), kind))
+        return pd.Series(windows[p], index=f.index, name=c)
+
+    # function shared
+
+    def shared(self, f, key, func):
+        r"""Get a result shared by the variables of the running plan.
+
+        Parameters
+        ----------
+        f : pandas.DataFrame
+            Dataframe of the calculation.
+        key : tuple
+            The name and parameters of the result.
+        func : function
+            The function that calculates the result from ``f``.
+
+        Returns
+        -------
+        result : object
+            The result of ``func``, which is calculated once for the
+            frame of the running plan.
+
+        """
+        if f is not self.frame:
+            return func(f)
+        if key not in self.windows:
+            self.windows[key] = func(f)
+        return self.windows[key]
+
+
+vkernels = RollingKernels()
+
+
+#
+# Function vrolling
+#
+
+def vrolling(f, c, p, kind):
+    r"""Calculate a rolling mean, maximum, or minimum of a column.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe containing the column ``c``.
+    c : str
+        Name of the column in the dataframe ``f``.
+    p : int
+        The period of the rolling window.
+    kind : str
+        ``mean``, ``max``, or ``min``.
+
+    Returns
+    -------
+    new_column : pandas.Series (float)
+        The rolling values, shared with the other periods of the
+        family while a plan is running.
+
+    """
+    new_column = vkernels.window(f, c, p, kind)
+    if new_column is None:
+        new_column = getattr(f[c].rolling(p), kind)()
+    return new_column
+
+
+#
+# Function vfamilies
+#
+
+def vfamilies(plan):
+    r"""Group the rolling windows of an execution plan by input column.
+
+    Parameters
+    ----------
+    plan : list
+        The compiled steps from ``vcompile``.
+
+    Returns
+    -------
+    families : dict
+        The set of periods of each (kind, column), e.g.,
+        ``('mean', 'close') : {3, 5, 10, 20, 50}``.
+
+    """
+    families = {}
+    for step in plan:
+        v, vxlag, lag, estr, func, params = step
+        if not func or func.__module__ != __name__:
+            continue
+        specs = vkernel_specs.get(func.__name__)
+        if not specs:
+            continue
+        sig = inspect.signature(func).parameters
+        names = list(sig)[1:]
+        args = {k : d.default for k, d in sig.items()}
+        args.update(zip(names, params))
+        for kind, column, period in specs:
+            c = args.get(column, column)
+            p = args.get(period)
+            if isinstance(c, str) and type(p) is int:
+                families.setdefault((kind, c), set()).add(p)
+    return families
+
+
+#
+# Function vrunplan
+#
+
+def vrunplan(f, plan):
+    r"""Run all the steps of an execution plan on a dataframe.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe to contain the new variables.
+    plan : list
+        The compiled steps from ``vcompile``.
+
+    Returns
+    -------
+    f : pandas.DataFrame
+        Dataframe with the new variables.
+
+    Notes
+    -----
+    The rolling windows of the plan are grouped with ``vfamilies``,
+    so that each family is computed in one pass over its column.
+
+    """
+    vkernels.start(f, vfamilies(plan))
+    try:
+        for step in plan:
+            f = vrun(f, step)
+    finally:
+        vkernels.stop()
+    return f
+
+
+#
+# Function vrun
+#
+
+def vrun(f, step):
+    r"""Run a compiled variable step on a dataframe.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe to contain the new variable.
+    step : tuple
+        The compiled variable from ``vstep``.
+
+    Returns
+    -------
+    f : pandas.DataFrame
+        Dataframe with the new variable.
+
+    """
+    v, vxlag, lag, estr, func, params = step
+    if vxlag not in f.columns:
+        if estr:
+            # compiled expression
+            f[vxlag] = estr.evaluate(f)
+        elif vcross(step):
+            logger.info("Variable %s must be applied to a group", v)
+        elif func:
+            # Create the variable by calling the function. A lagged
+            # variable is created unlagged, then shifted below.
+            vnew = vxlag if lag > 0 else v
+            f[vnew] = func(f, *params)
+    # if necessary, add the lagged variable
+    if lag > 0 and vxlag in f.columns:
+        f[v] = f[vxlag].shift(lag)
+    # output frame
+    return f
+
+
+#
+# Function vexec
+#
+
+def vexec(f, v, vfuncs=None):
+    r"""Add a variable to the given dataframe.
+
+    This is the core function for adding a variable to a dataframe.
+    The default variable functions are already defined locally
+    in ``alphapy.var``; however, you may want to define your
+    own variable functions. If so, then the ``vfuncs`` parameter
+    will contain the list of modules and functions to be imported
+    and applied by the ``vexec`` function.
+
+    To write your own variable function, your function must have
+    a pandas *DataFrame* as an input parameter and must return
+    a pandas *Series* that represents the new variable.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe to contain the new variable.
+    v : str
+        Variable to add to the dataframe.
+    vfuncs : dict, optional
+        Dictionary of external modules and functions.
+
+    Returns
+    -------
+    f : pandas.DataFrame
+        Dataframe with the new variable.
+
+    Other Parameters
+    ----------------
+    Variable.variables : dict
+        Global dictionary of variables
+
+    """
+    f = vrun(f, vstep(v, vfuncs))
+    return f
+
+
+#
+# Function vcross
+#
+
+def vcross(step):
+    r"""Determine whether a compiled step is cross-sectional.
+
+    Parameters
+    ----------
+    step : tuple
+        The compiled variable from ``vstep``.
+
+    Returns
+    -------
+    is_cross : bool
+        ``True`` if the step compares a column across a group. A lag
+        of a cross-sectional variable is an ordinary step.
+
+    """
+    v, vxlag, lag, estr, func, params = step
+    is_cross = bool(func) and lag == 0 and func.__module__ == __name__ \
+               and func.__name__ in vcross_names
+    return is_cross
+
+
+#
+# Function vstreaming
+#
+
+def vstreaming(step):
+    r"""Determine whether a compiled step is updated with a stream.
+
+    Parameters
+    ----------
+    step : tuple
+        The compiled variable from ``vstep``.
+
+    Returns
+    -------
+    is_streaming : bool
+        ``True`` if the step is a function in ``vrecursive_names``.
+        A lag of the variable is an ordinary step.
+
+    """
+    v, vxlag, lag, estr, func, params = step
+    is_streaming = bool(func) and lag == 0 and func.__module__ == __name__ \
+                   and func.__name__ in vrecursive_names
+    return is_streaming
+
+
+#
+# Function vdeps
+#
+
+def vdeps(step):
+    r"""Get the variables that a compiled step depends on.
+
+    Parameters
+    ----------
+    step : tuple
+        The compiled variable from ``vstep``.
+
+    Returns
+    -------
+    vlist : list
+        The names of the antecedent variables.
+
+    """
+    v, vxlag, lag, estr, func, params = step
+    if lag > 0:
+        vlist = [vxlag]
+    elif estr:
+        vlist = [av for av in estr.variables if valid_name(av)]
+    else:
+        vlist = [p for p in params if isinstance(p, str) and valid_name(p)]
+    return vlist
+
+
+#
+# Function vcompile
+#
+
+def vcompile(vs, vfuncs=None):
+    r"""Compile a list of variables into an execution plan.
+
+    The antecedents of all the variables are resolved together,
+    so a variable shared by several features, e.g., ``atr_10``,
+    is compiled only once. The plan is in topological order:
+    every variable comes after the variables it depends on.
+
+    Parameters
+    ----------
+    vs : list
+        The list of variables to compile.
+    vfuncs : dict, optional
+        Dictionary of external modules and functions.
+
+    Returns
+    -------
+    plan : list
+        The compiled steps, each one from ``vstep``.
+
+    Other Parameters
+    ----------------
+    Variable.variables : dict
+        Global dictionary of variables
+
+    See Also
+    --------
+    vtree
+
+    """
+    plan = []
+    visited = set()
+    def vwalk(vname):
+        if vname in visited:
+            return
+        visited.add(vname)
+        step = vstep(vname, vfuncs)
+        for av in vdeps(step):
+            vwalk(av)
+        plan.append(step)
+    for v in vs:
+        vwalk(v)
+    logger.info("Compiled %d variables into %d steps", len(vs), len(plan))
+    return plan
+
+
+#
+# Function vstages
+#
+
+def vstages(plan):
+    r"""Split an execution plan at its cross-sectional steps.
+
+    Parameters
+    ----------
+    plan : list
+        The compiled steps from ``vcompile``.
+
+    Returns
+    -------
+    stages : list
+        The (cross-sectional steps, frame steps) of each stage. The
+        cross-sectional steps of a stage need the whole group after
+        the frame steps of the previous stages, and the frame steps
+        of a stage are run on each frame independently.
+
+    """
+    level = {}
+    stages = []
+    for step in plan:
+        n = max([level.get(av, 0) for av in vdeps(step)] + [0])
+        is_cross = vcross(step)
+        if is_cross:
+            n += 1
+        level[step[0]] = n
+        while len(stages) <= n:
+            stages.append(([], []))
+        stages[n][0 if is_cross else 1].append(step)
+    return stages
+
+
+#
+# Function vworker
+#
+
+def vworker(f, plan, variables, aliases):
+    r"""Run an execution plan on a dataframe in a worker process.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe to contain the new variables.
+    plan : list
+        The compiled steps from ``vcompile``.
+    variables : dict
+        The expression of each variable in ``Variable.variables``.
+    aliases : dict
+        The aliases in ``Alias.aliases``.
+
+    Returns
+    -------
+    new_frame : pandas.DataFrame
+        Dataframe with only the new columns.
+
+    Notes
+    -----
+    Variable functions such as ``adx`` call ``vexec`` themselves,
+    so the variables and aliases are registered in the worker
+    if the process did not inherit them.
+
+    """
+    for name, alias in aliases.items():
+        if name not in Alias.aliases:
+            Alias(name, alias)
+    for name, expr in variables.items():
+        if name not in Variable.variables:
+            Variable(name, expr)
+    columns = f.columns
+    f = vrunplan(f, plan)
+    new_frame = f[[c for c in f.columns if c not in columns]]
+    return new_frame
+
+
+#
+# Function vwarmup
+#
+
+def vwarmup(plan, vfuncs=None):
+    r"""Get the number of rows needed to warm up an execution plan.
+
+    Parameters
+    ----------
+    plan : list
+        The compiled steps from ``vcompile``.
+    vfuncs : dict, optional
+        Dictionary of external modules and functions.
+
+    Returns
+    -------
+    warmup : int
+        The longest chain of periods and lags in the plan.
+
+    Notes
+    -----
+    The period of a step is its largest integer argument, including
+    the defaults of its function, plus its lag. The warm-up of a step
+    adds its period to the largest warm-up of its antecedents, e.g.,
+    ``atr_10[1]`` needs the ten periods of ``atr_10``, one lag, and
+    the periods of ``truerange``. The antecedents include the
+    variables that a function applies itself (see ``vinternal``).
+
+    A step of an exponential moving average (see ``vstreaming``) needs
+    no warm-up, because it is continued from its stream, and its prior
+    values are read from the stored frame (see ``vupdate``).
+
+    """
+    need = {}
+    def vneed(step):
+        v, vxlag, lag, estr, func, params = step
+        if v in need:
+            return need[v]
+        period = 0
+        internal = []
+        if vstreaming(step):
+            need[v] = 0
+            return 0
+        if func:
+            args = list(params)
+            try:
+                names = list(inspect.signature(func).parameters.values())[1:]
+                args.extend([d.default for d in names[len(params):]])
+            except:
+                pass
+            periods = [a for a in args if type(a) is int]
+            period = max(periods) if periods else 0
+            internal = [av.format(*args) for av in vinternal.get(func.__name__, [])]
+        lags = estr.lags if estr else {}
+        prior = [0]
+        for av in vdeps(step) + internal:
+            n = need[av] if av in need else vneed(vstep(av, vfuncs))
+            prior.append(n + max(lags.get(av, 0), 0))
+        need[v] = period + lag + max(prior)
+        return need[v]
+    for step in plan:
+        vneed(step)
+    warmup = max(list(need.values()) + [0])
+    return warmup
+
+
+#
+# Function vkeep
+#
+
+def vkeep(vs, plan):
+    r"""Get the columns of the requested variables of a plan.
+
+    Parameters
+    ----------
+    vs : list
+        The list of requested variables.
+    plan : list
+        The compiled steps from ``vcompile``.
+
+    Returns
+    -------
+    keep : set
+        The names of the requested variables, including the columns
+        of any aliases of functions and variables.
+
+    """
+    keep = set(vs)
+    for step in plan:
+        v, vxlag, lag, estr, func, params = step
+        if v in keep and lag == 0:
+            keep.add(vxlag)
+    return keep
+
+
+#
+# Function vdropscratch
+#
+
+def vdropscratch(fnames, columns, keep):
+    r"""Drop the intermediate columns of a plan from the dataframes.
+
+    Parameters
+    ----------
+    fnames : list
+        The names of the frames in ``Frame.frames``.
+    columns : dict
+        The columns of each frame before the plan was applied.
+    keep : set
+        The columns of the requested variables.
+
+    Returns
+    -------
+    reclaimed : int
+        The number of bytes of the dropped columns.
+
+    Notes
+    -----
+    The antecedents of the requested variables, e.g., ``truerange``
+    for ``atr_10``, and the temporary columns of the variable
+    functions, e.g., ``pval`` and ``mval`` for ``rsi``, are scratch
+    columns that would otherwise stay in ``Frame.frames`` and be
+    written with the frames.
+
+    """
+    reclaimed = 0
+    ndropped = 0
+    for fname in fnames:
+        f = Frame.frames[fname].df
+        base = columns.get(fname, [])
+        scratch = [c for c in f.columns if c not in base and c not in keep]
+        if scratch:
+            reclaimed += int(f[scratch].memory_usage(index=False, deep=True).sum())
+            ndropped += len(scratch)
+            Frame.frames[fname].df = f.drop(scratch, axis=1)
+    logger.info("Dropped %d scratch columns from %d frames, reclaimed %.1f MB",
+                ndropped, len(fnames), reclaimed / 1e6)
+    return reclaimed
+
+
+#
+# Function vupdate
+#
+
+def vupdate(f, stored, plan, warmup, required=None, streams=None):
+    r"""Apply an execution plan to only the new rows of a dataframe.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe with the latest raw data.
+    stored : pandas.DataFrame
+        Dataframe with the variables from the previous run, or ``None``.
+    plan : list
+        The compiled steps from ``vcompile``.
+    warmup : int
+        The number of rows before the new rows for warming up
+        the variables.
+    required : list, optional
+        The variables that the stored dataframe must have, by default
+        all the variables of the plan.
+    streams : dict, optional
+        The stream of each streaming step of the plan (see
+        ``vstreaming``) after the last row of the stored dataframe.
+
+    Returns
+    -------
+    new_frame : pandas.DataFrame
+        The stored dataframe with the new rows appended.
+    streams : dict
+        The stream of each streaming step after the last row of
+        the new dataframe.
+
+    Notes
+    -----
+    The exponential moving averages, e.g., ``ema`` and ``adx``, are
+    continued from their streams for the new rows, and their values
+    in the warm-up rows are those of the stored dataframe, so they
+    match the calculation over the whole history.
+
+    If there is no stored dataframe, or it is missing any required
+    variable or stream, then the plan is applied to the whole
+    dataframe, and the streams are run over all of its rows.
+
+    """
+    # the streams import this module
+    from alphapy.stream import stream_frame
+    from alphapy.stream import vstream
+    def vbars(step, frame):
+        inputs = ['high', 'low', 'close'] + [p for p in step[5] if isinstance(p, str)]
+        return frame[[c for c in OrderedDict.fromkeys(inputs) if c in frame.columns]]
+    recursive = [step[0] for step in plan if vstreaming(step)]
+    streams = streams or {}
+    full = stored is None or stored.empty
+    if not full:
+        if required is None:
+            required = [step[0] for step in plan]
+        missing = [v for v in set(required + recursive) if v not in stored.columns]
+        missing += [v for v in recursive if v not in streams]
+        if missing:
+            logger.info("Stored frame is missing variables %s", missing)
+            full = True
+    if full:
+        new_frame = vrunplan(f.copy(), plan)
+        streams = {}
+        for step in plan:
+            if vstreaming(step):
+                streams[step[0]] = vstream(step[0])
+                stream_frame(streams[step[0]], vbars(step, new_frame))
+        return new_frame, streams
+    # find the new rows
+    if isinstance(f.index, pd.DatetimeIndex):
+        stored.index = pd.to_datetime(stored.index)
+    new_rows = np.asarray(f.index > stored.index[-1])
+    n_new = new_rows.sum()
+    if n_new == 0:
+        logger.debug("No new rows")
+        return stored, streams
+    # apply the plan to the warm-up rows and the new rows
+    first_new = np.argmax(new_rows)
+    start = max(0, first_new - warmup)
+    window = f.iloc[start:].copy()
+    is_new = new_rows[start:]
+    vkernels.start(window, vfamilies(plan))
+    try:
+        for step in plan:
+            if vstreaming(step):
+                v = step[0]
+                values = stored[v].reindex(window.index).values.astype(float)
+                bars = vbars(step, window)[is_new]
+                values[is_new] = stream_frame(streams[v], bars).values
+                window[v] = values
+            else:
+                window = vrun(window, step)
+    finally:
+        vkernels.stop()
+    tail = window[is_new]
+    logger.debug("Updated %d new rows with %d warm-up rows", n_new, first_new - start)
+    new_frame = pd.concat([stored, tail])
+    return new_frame, streams
+
+
 #
-# Function vexec
+# Function vstatefile
 #
 
-def vexec(f, v, vfuncs=None):
-    r"""Add a variable to the given dataframe.
+def vstatefile(directory, fname):
+    r"""Get the file of the stored streams of a frame.
 
-    This is the core function for adding a variable to a dataframe.
-    The default variable functions are already defined locally
-    in ``alphapy.var``; however, you may want to define your
-    own variable functions. If so, then the ``vfuncs`` parameter
-    will contain the list of modules and functions to be imported
-    and applied by the ``vexec`` function.
+    Parameters
+    ----------
+    directory : str
+        Full directory specification of the stored frames.
+    fname : str
+        The name of the frame.
 
-    To write your own variable function, your function must have
-    a pandas *DataFrame* as an input parameter and must return
-    a pandas *Series* that represents the new variable.
+    Returns
+    -------
+    state_file : str
+        The full path of the pickle file ``<frame>_streams.pkl``.
+
+    """
+    state_file = SSEP.join([directory, PSEP.join([USEP.join([fname, 'streams']), 'pkl'])])
+    return state_file
+
+
+#
+# Function vmupdate
+#
+
+def vmupdate(group, vs, directory, extension, separator, vfuncs=None,
+             factor=3, verify=False, keep_scratch=True, history=None):
+    r"""Apply multiple variables to only the new rows of multiple dataframes.
 
     Parameters
     ----------
-    f : pandas.DataFrame
-        Dataframe to contain the new variable.
-    v : str
-        Variable to add to the dataframe.
+    group : alphapy.Group
+        The input group.
+    vs : list
+        The list of variables to apply to the ``group``.
+    directory : str
+        Full directory specification of the stored frames.
+    extension : str
+        File name extension of the stored frames, e.g., ``parquet``.
+    separator : str
+        The delimiter between fields in the file.
     vfuncs : dict, optional
         Dictionary of external modules and functions.
+    factor : int, optional
+        The multiple of the plan's warm-up periods to recalculate.
+    verify : bool, optional
+        If ``True``, also apply the variables to the whole dataframe,
+        and log any variable whose new rows differ from the update.
+    keep_scratch : bool, optional
+        If ``False``, drop the intermediate columns that are not in
+        ``vs`` before storing the frames (see ``vdropscratch``).
+    history : int, optional
+        The number of most recent rows to keep in the stored frames,
+        or ``None`` to keep all of the rows.
 
     Returns
     -------
-    f : pandas.DataFrame
-        Dataframe with the new variable.
+    None : None
 
     Other Parameters
     ----------------
-    Variable.variables : dict
-        Global dictionary of variables
+    Frame.frames : dict
+        Global dictionary of dataframes
+
+    Notes
+    -----
+    The frames with all of the variables are stored in ``directory``
+    after each run, along with the streams of their exponential
+    moving averages, e.g., ``ema`` and ``adx``, in a pickle file
+    ``<frame>_streams.pkl``. On the next run, only the rows after
+    the last stored row are calculated, starting from the warm-up
+    rows of the plan (see ``vwarmup``), and the streams are continued
+    with the new rows (see ``vupdate``), so the time is proportional
+    to the number of new rows instead of the length of the history.
+    Any cross-sectional stages of the plan (see ``vstages``) are
+    applied to all of the rows after the frames are updated.
+
+    See Also
+    --------
+    vmapply
 
     """
-    vxlag, root, plist, lag = vparse(v)
-    logger.debug("vexec : %s", v)
-    logger.debug("vxlag : %s", vxlag)
-    logger.debug("root  : %s", root)
-    logger.debug("plist : %s", plist)
-    logger.debug("lag   : %s", lag)
-    if vxlag not in f.columns:
-        if root in Variable.variables:
-            logger.debug("Found variable %s: ", root)
-            vroot = Variable.variables[root]
-            expr = vroot.expr
-            expr_new = vsub(vxlag, expr)
-            estr = "%s" % expr_new
-            estr = BSEP.join([vxlag, '=', estr])
-            logger.debug("Expression: %s", estr)
-            # pandas eval
-            f.eval(estr, inplace=True)
-        else:
-            logger.debug("Did not find variable: %s", root)
-            # Must be a function call
-            func_name = root
-            # Convert the parameter list and prepend the data frame
-            newlist = []
-            for p in plist:
+    for v in vs:
+        logger.info("Updating variable: %s", v)
+    plan = vcompile(vs, vfuncs)
+    keep = vkeep(vs, plan)
+    stages = vstages(plan)
+    # the later stages are recalculated from the stored rows
+    for xsteps, fsteps in stages[1:]:
+        for step in xsteps + fsteps:
+            keep.update(vdeps(step))
+    plan = stages[0][1]
+    # the streaming variables are continued from their stored values
+    keep.update([step[0] for step in plan if vstreaming(step)])
+    required = None if keep_scratch else [step[0] for step in plan if step[0] in keep]
+    warmup = factor * vwarmup(plan, vfuncs)
+    logger.info("Warm-up Rows : %d", warmup)
+    # get all frame names to apply variables
+    gnames = [item.lower() for item in group.members]
+    fnames = []
+    columns = {}
+    all_streams = {}
+    for g in gnames:
+        fname = frame_name(g, group.space)
+        if fname not in Frame.frames:
+            logger.debug("Frame not found: %s", fname)
+            continue
+        f = Frame.frames[fname].df
+        if f.empty:
+            logger.debug("Frame for %s is empty", g)
+            continue
+        stored = read_frame(directory, fname, extension, separator,
+                            index_col='date')
+        columns[fname] = list(f.columns)
+        # the streams must continue from the last stored row
+        streams = None
+        state_file = vstatefile(directory, fname)
+        if stored is not None and not stored.empty and os.path.isfile(state_file):
+            with open(state_file, 'rb') as state:
+                date, streams = pickle.load(state)
+            if pd.Timestamp(date) != pd.Timestamp(stored.index[-1]):
+                logger.info("Streams of %s are not at the last stored row", g)
+                streams = None
+        new_frame, all_streams[fname] = vupdate(f, stored, plan, warmup,
+                                                required, streams)
+        if history:
+            new_frame = new_frame.iloc[-history:]
+        if verify and stored is not None and not stored.empty:
+            full_frame = vrunplan(f.copy(), plan)
+            rows = full_frame.index[full_frame.index > stored.index[-1]]
+            for step in plan:
+                v = step[0]
+                expected = full_frame.loc[rows, v].values
+                actual = new_frame.loc[rows, v].values
                 try:
-                    newlist.append(int(p))
+                    same = np.allclose(actual.astype(float), expected.astype(float),
+                                       equal_nan=True)
                 except:
-                    try:
-                        newlist.append(float(p))
-                    except:
-                        newlist.append(p)
-            newlist.insert(0, f)
-            # Find the module and function
-            module = None
-            if vfuncs:
-                for m in vfuncs:
-                    funcs = vfuncs[m]
-                    if func_name in funcs:
-                        module = m
-                        break
-            # If the module was found, import the external treatment function,
-            # else search the local namespace.
-            if module:
-                ext_module = import_module(module)
-                func = getattr(my_module, func_name)
-                # Create the variable by calling the function
-                f[v] = func(*newlist)
-            else:
-                modname = globals()['__name__']
-                module = sys.modules[modname]
-                if func_name in dir(module):
-                    func = getattr(module, func_name)
-                    # Create the variable
-                    f[v] = func(*newlist)
-                else:
-                    logger.debug("Could not find function %s", func_name)
-    # if necessary, add the lagged variable
-    if lag > 0 and vxlag in f.columns:
-        f[v] = f[vxlag].shift(lag)
-    # output frame
-    return f
+                    same = np.array_equal(actual, expected)
+                if not same:
+                    logger.warning("Variable %s of %s differs from full calculation", v, g)
+        Frame.frames[fname].df = new_frame
+        fnames.append(fname)
+    # the cross-sectional stages depend on the whole group, so they
+    # are applied to all of the rows
+    if len(stages) > 1:
+        later = [step[0] for xsteps, fsteps in stages[1:]
+                 for step in xsteps + fsteps]
+        for fname in fnames:
+            f = Frame.frames[fname].df
+            Frame.frames[fname].df = f.drop([v for v in later if v in f.columns],
+                                            axis=1)
+        for xsteps, fsteps in stages[1:]:
+            if xsteps:
+                vcrossapply(fnames, xsteps)
+            if fsteps:
+                vplanapply(fnames, fsteps)
+    # remove the intermediate columns
+    if not keep_scratch:
+        vdropscratch(fnames, columns, keep)
+    # store the frames and their streams for the next run
+    for fname in fnames:
+        df = Frame.frames[fname].df
+        write_frame(df, directory, fname, extension, separator,
+                    index=True, index_label='date')
+        if all_streams[fname]:
+            state_file = vstatefile(directory, fname)
+            with open(state_file, 'wb') as state:
+                pickle.dump((df.index[-1], all_streams[fname]), state)
 
 
 #
@@ -483,30 +1953,114 @@ def vapply(group, vname, vfuncs=None):
     vunapply
 
     """
-    # get all frame names to apply variables
-    gnames = [item.lower() for item in group.members]
-    # get all the precedent variables
-    allv = vtree(vname)
-    # apply the variables to each frame
-    for g in gnames:
-        fname = frame_name(g, group.space)
-        if fname in Frame.frames:
-            f = Frame.frames[fname].df
-            if not f.empty:
-                for v in allv:
-                    logger.debug("Applying variable %s to %s", v, g)
-                    f = vexec(f, v, vfuncs)
-            else:
-                logger.debug("Frame for %s is empty", g)
-        else:
-            logger.debug("Frame not found: %s", fname)
+    vmapply(group, [vname], vfuncs)
                 
 
+#
+# Function vcrossapply
+#
+
+def vcrossapply(fnames, steps):
+    r"""Apply cross-sectional variables to a group of dataframes.
+
+    Parameters
+    ----------
+    fnames : list
+        The names of the frames in ``Frame.frames``.
+    steps : list
+        The cross-sectional steps from ``vstages``.
+
+    Returns
+    -------
+    None : None
+
+    Notes
+    -----
+    The input columns of all the frames are stacked into one
+    ``Panel``, so that each variable is one vectorized pass over
+    the group, and the new column of each member is then stored
+    in its frame.
+
+    """
+    columns = []
+    for step in steps:
+        c = step[5][0]
+        if c not in columns:
+            columns.append(c)
+    frames = []
+    for fname in fnames:
+        f = Frame.frames[fname].df
+        missing = [c for c in columns if c not in f.columns]
+        if missing:
+            logger.info("Frame %s is missing columns %s", fname, missing)
+            return
+        frames.append(f[columns])
+    panel = Panel(frames, fnames)
+    for step in steps:
+        v, vxlag, lag, estr, func, params = step
+        logger.debug("Applying cross-sectional variable %s", v)
+        values = func(panel, *params).values
+        for i, fname in enumerate(fnames):
+            f = Frame.frames[fname].df
+            f[v] = values[panel.offsets[i]:panel.offsets[i+1]]
+            Frame.frames[fname].touch()
+
+
+#
+# Function vplanapply
+#
+
+def vplanapply(fnames, plan, n_jobs=1):
+    r"""Apply an execution plan to each of a group of dataframes.
+
+    Parameters
+    ----------
+    fnames : list
+        The names of the frames in ``Frame.frames``.
+    plan : list
+        The compiled steps without any cross-sectional steps.
+    n_jobs : int, optional
+        The number of processes for applying the variables
+        [-1 for all cores].
+
+    Returns
+    -------
+    None : None
+
+    """
+    n_workers = os.cpu_count() if n_jobs < 1 else n_jobs
+    n_workers = min(n_workers, len(fnames))
+    if n_workers > 1:
+        logger.info("Applying %d variables to %d frames with %d workers",
+                    len(plan), len(fnames), n_workers)
+        variables = {k : v.expr for k, v in Variable.variables.items()}
+        aliases = dict(Alias.aliases)
+        # submit the frames in batches, so that only a batch of frames
+        # has to be in memory with a Frame memory budget
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for i in range(0, len(fnames), n_workers):
+                batch = fnames[i:i+n_workers]
+                futures = [executor.submit(vworker, Frame.frames[fname].df,
+                                           plan, variables, aliases)
+                           for fname in batch]
+                for fname, future in zip(batch, futures):
+                    new_frame = future.result()
+                    f = Frame.frames[fname].df
+                    Frame.frames[fname].df = pd.concat([f, new_frame], axis=1)
+    else:
+        for fname in fnames:
+            f = Frame.frames[fname].df
+            logger.debug("Applying %d variables to %s", len(plan), fname)
+            f = vrunplan(f, plan)
+            # the frame grew in place, so enforce any memory budget
+            Frame.frames[fname].touch()
+
+
 #
 # Function vmapply
 #
 
-def vmapply(group, vs, vfuncs=None):
+def vmapply(group, vs, vfuncs=None, n_jobs=1, keep_scratch=True):
     r"""Apply multiple variables to multiple dataframes.
 
     Parameters
@@ -517,19 +2071,68 @@ def vmapply(group, vs, vfuncs=None):
         The list of variables to apply to the ``group``.
     vfuncs : dict, optional
         Dictionary of external modules and functions.
+    n_jobs : int, optional
+        The number of processes for applying the variables
+        [-1 for all cores].
+    keep_scratch : bool, optional
+        If ``False``, drop the intermediate columns that are not in
+        ``vs`` after the plan is applied (see ``vdropscratch``).
 
     Returns
     -------
     None : None
 
+    Other Parameters
+    ----------------
+    Frame.frames : dict
+        Global dictionary of dataframes
+
+    Notes
+    -----
+    The variables are compiled once into an execution plan with
+    ``vcompile``, and then the plan is run on every frame. The frames
+    are independent, so with ``n_jobs`` other than 1, they are sent
+    to a process pool, and the new columns of each frame are joined
+    back to the frame in ``Frame.frames``.
+
+    Cross-sectional variables, e.g., ``xrank_rsi_14``, compare a
+    column across the frames on each date, so the plan is split into
+    stages with ``vstages``, and each cross-sectional step is applied
+    to the whole group between the stages.
+
     See Also
     --------
     vmunapply
 
     """
+    # compile the variables and their antecedents
     for v in vs:
         logger.info("Applying variable: %s", v)
-        vapply(group, v, vfuncs)
+    plan = vcompile(vs, vfuncs)
+    # get all frame names to apply variables
+    gnames = [item.lower() for item in group.members]
+    fnames = []
+    for g in gnames:
+        fname = frame_name(g, group.space)
+        if fname in Frame.frames:
+            if not Frame.frames[fname].df.empty:
+                fnames.append(fname)
+            else:
+                logger.debug("Frame for %s is empty", g)
+        else:
+            logger.debug("Frame not found: %s", fname)
+    if not keep_scratch:
+        columns = {fname : list(Frame.frames[fname].df.columns)
+                   for fname in fnames}
+    # apply each stage of the plan to the group, then to each frame
+    for xsteps, fsteps in vstages(plan):
+        if xsteps:
+            vcrossapply(fnames, xsteps)
+        if fsteps:
+            vplanapply(fnames, fsteps, n_jobs)
+    # remove the intermediate columns
+    if not keep_scratch:
+        vdropscratch(fnames, columns, vkeep(vs, plan))
 
         
 #
@@ -859,7 +2462,7 @@ def highest(f, c, p = 20):
         The array containing the new feature.
 
     """
-    new_column = f[c].rolling(p).max()
+    new_column = vrolling(f, c, p, 'max')
     return new_column
 
 
@@ -912,7 +2515,7 @@ def lowest(f, c, p = 20):
         The array containing the new feature.
 
     """
-    return f[c].rolling(p).min()
+    return vrolling(f, c, p, 'min')
 
 
 #
@@ -945,7 +2548,7 @@ def ma(f, c, p = 20):
     .. [WIKI_MA] https://en.wikipedia.org/wiki/Moving_average
 
     """
-    new_column = f[c].rolling(p).mean()
+    new_column = vrolling(f, c, p, 'mean')
     return new_column
 
 
@@ -979,7 +2582,7 @@ def ema(f, c, p = 20):
     .. [IP_EMA] http://www.investopedia.com/terms/e/ema.asp
 
     """
-    new_column = pd.ewma(f[c], span=p)
+    new_column = f[c].ewm(span=p).mean()
     return new_column
 
 
@@ -1218,7 +2821,10 @@ def truehigh(f):
     c1 = 'low[1]'
     vexec(f, c1)
     c2 = 'high'
-    new_column = f.apply(c2max, axis=1, args=[c1, c2])
+    v1 = f[c1].values
+    v2 = f[c2].values
+    # same as c2max: the first value unless the second is greater
+    new_column = pd.Series(np.where(v2 > v1, v2, v1), index=f.index)
     return new_column
 
 
@@ -1247,7 +2853,10 @@ def truelow(f):
     c1 = 'high[1]'
     vexec(f, c1)
     c2 = 'low'
-    new_column = f.apply(c2min, axis=1, args=[c1, c2])
+    v1 = f[c1].values
+    v2 = f[c2].values
+    # same as c2min: the first value unless the second is lower
+    new_column = pd.Series(np.where(v2 < v1, v2, v1), index=f.index)
     return new_column
 
 
@@ -1273,7 +2882,8 @@ def truerange(f):
     *True High - True Low* [TS_TR]_.
 
     """
-    new_column = truehigh(f) - truelow(f)
+    tr, dmp, dmm = dmoves(f)
+    new_column = pd.Series(tr, index=f.index)
     return new_column
 
 
@@ -1506,8 +3116,11 @@ def rsi(f, c, p = 14):
     """
     cdiff = 'net'
     vexec(f, cdiff)
-    f['pval'] = upc(f, cdiff)
-    f['mval'] = dpc(f, cdiff)
+    # the gains and losses are shared by every period of the family
+    if 'pval' not in f.columns:
+        f['pval'] = upc(f, cdiff)
+    if 'mval' not in f.columns:
+        f['mval'] = dpc(f, cdiff)
     upcs = ma(f, 'pval', p)
     dpcs = ma(f, 'mval', p)
     new_column = 100 - (100 / (1 + (upcs / dpcs)))
@@ -1572,6 +3185,56 @@ def gtval0(f, c1, c2):
     return new_val
 
 
+#
+# Function dmoves
+#
+
+def dmoves(f):
+    r"""Calculate the true range and the directional movement in one pass.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe with columns ``high`` and ``low``.
+
+    Returns
+    -------
+    tr : numpy array (float)
+        The true range, as in ``truerange``.
+    dmp : numpy array (float)
+        The plus directional movement, as in ``dmplus``.
+    dmm : numpy array (float)
+        The minus directional movement, as in ``dminus``.
+
+    Notes
+    -----
+    While a plan is running, the arrays are calculated once for the
+    frame and shared by all of the directional indicators.
+
+    """
+    def dkernel(f):
+        high = f['high'].values.astype(float)
+        low = f['low'].values.astype(float)
+        prior_high = np.empty_like(high)
+        prior_low = np.empty_like(low)
+        prior_high[:1] = np.nan
+        prior_low[:1] = np.nan
+        prior_high[1:] = high[:-1]
+        prior_low[1:] = low[:-1]
+        # same as truehigh and truelow: the first value unless the second
+        # is higher or lower, so the first row is NaN
+        true_high = np.where(high > prior_low, high, prior_low)
+        true_low = np.where(low < prior_high, low, prior_high)
+        tr = true_high - true_low
+        # same as gtval0, where a comparison with NaN yields zero
+        upmove = high - prior_high
+        downmove = prior_low - low
+        dmp = np.where((upmove > downmove) & (upmove > 0), upmove, 0.0)
+        dmm = np.where((downmove > upmove) & (downmove > 0), downmove, 0.0)
+        return tr, dmp, dmm
+    return vkernels.shared(f, ('dmoves',), dkernel)
+
+
 #
 # Function dmplus
 #
@@ -1600,11 +3263,8 @@ def dmplus(f):
     .. [SC_ADX] http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:average_directional_index_adx
 
     """
-    c1 = 'upmove'
-    f[c1] = net(f, 'high')
-    c2 = 'downmove'
-    f[c2] = -net(f, 'low')
-    new_column = f.apply(gtval0, axis=1, args=[c1, c2])
+    tr, dmp, dmm = dmoves(f)
+    new_column = pd.Series(dmp, index=f.index)
     return new_column
 
 
@@ -1634,14 +3294,50 @@ def dminus(f):
     would simply be entered as zero* [SC_ADX]_.
 
     """
-    c1 = 'downmove'
-    f[c1] = -net(f, 'low')
-    c2 = 'upmove'
-    f[c2] = net(f, 'high')
-    new_column = f.apply(gtval0, axis=1, args=[c1, c2])
+    tr, dmp, dmm = dmoves(f)
+    new_column = pd.Series(dmm, index=f.index)
     return new_column
 
 
+#
+# Function dindicators
+#
+
+def dindicators(f, p = 14):
+    r"""Calculate the +DI and -DI of a period in one pass.
+
+    Parameters
+    ----------
+    f : pandas.DataFrame
+        Dataframe with columns ``high`` and ``low``.
+    p : int
+        The period of the average true range and the span of the
+        directional movement.
+
+    Returns
+    -------
+    dip : numpy array (float)
+        The plus directional indicator, as in ``diplus``.
+    dim : numpy array (float)
+        The minus directional indicator, as in ``diminus``.
+
+    Notes
+    -----
+    The true range and the directional movement come from ``dmoves``,
+    and the indicators of each period are shared by ``diplus``,
+    ``diminus``, and ``adx`` while a plan is running.
+
+    """
+    def dkernel(f):
+        tr, dmp, dmm = dmoves(f)
+        atr = rolling_means(tr, [p])[p]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dip = 100 * pd.Series(dmp).ewm(span=p).mean().values / atr
+            dim = 100 * pd.Series(dmm).ewm(span=p).mean().values / atr
+        return dip, dim
+    return vkernels.shared(f, ('dindicators', p), dkernel)
+
+
 #
 # Function diplus
 #
@@ -1670,13 +3366,8 @@ def diplus(f, p = 14):
     .. [IP_PDI] http://www.investopedia.com/terms/p/positivedirectionalindicator.asp
 
     """
-    tr = 'truerange'
-    vexec(f, tr)
-    atr = USEP.join(['atr', str(p)])
-    vexec(f, atr)
-    dmp = 'dmplus'
-    vexec(f, dmp)
-    new_column = 100 * f[dmp].ewm(span=p).mean() / f[atr]
+    dip, dim = dindicators(f, p)
+    new_column = pd.Series(dip, index=f.index)
     return new_column
 
 
@@ -1708,13 +3399,8 @@ def diminus(f, p = 14):
     .. [IP_NDI] http://www.investopedia.com/terms/n/negativedirectionalindicator.asp
 
     """
-    tr = 'truerange'
-    vexec(f, tr)
-    atr = USEP.join(['atr', str(p)])
-    vexec(f, atr)
-    dmm = 'dmminus'
-    f[dmm] = dminus(f)
-    new_column = 100 * dminus(f).ewm(span=p).mean() / f[atr]
+    dip, dim = dindicators(f, p)
+    new_column = pd.Series(dim, index=f.index)
     return new_column
 
 
@@ -1728,9 +3414,7 @@ def adx(f, p = 14):
     Parameters
     ----------
     f : pandas.DataFrame
-        Dataframe with all columns required for calculation. If you
-        are applying ADX through ``vapply``, then these columns are
-        calculated automatically.
+        Dataframe with columns ``high`` and ``low``.
     p : int
         The period over which to calculate the ADX.
 
@@ -1747,17 +3431,15 @@ def adx(f, p = 14):
 
     .. [WIKI_ADX] https://en.wikipedia.org/wiki/Average_directional_movement_index
 
+    Notes
+    -----
+    The directional indicators have their default period of 14.
+
     """
-    c1 = 'diplus'
-    vexec(f, c1)
-    c2 = 'diminus'
-    vexec(f, c2)
-    # calculations
-    dip = f[c1]
-    dim = f[c2]
-    didiff = abs(dip - dim)
-    disum = dip + dim
-    new_column = 100 * didiff.ewm(span=p).mean() / disum
+    dip, dim = dindicators(f)
+    didiff = pd.Series(np.abs(dip - dim)).ewm(span=p).mean().values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new_column = pd.Series(100 * didiff / (dip + dim), index=f.index)
     return new_column
 
 
@@ -1897,3 +3579,118 @@ def xmaup(f, c='close', pfast = 20, pslow = 50):
     lma_prev = lma.shift(1)
     new_column = (sma > lma) & (sma_prev < lma_prev)
     return new_column
+
+
+#
+# Cross-sectional functions
+#
+# These functions are applied to a ``Panel`` of the whole group by
+# ``vmapply``, so the column of each member is compared with the
+# columns of the other members on the same date.
+#
+
+
+#
+# Function xdemean
+#
+
+def xdemean(p, c):
+    r"""Subtract the mean of the group on each date.
+
+    Parameters
+    ----------
+    p : alphapy.Panel
+        Panel containing the column ``c`` of every member.
+    c : str
+        Name of the column in the panel ``p``.
+
+    Returns
+    -------
+    new_column : pandas.Series (float)
+        The array containing the new feature.
+
+    """
+    new_column = p.cross_section(c, 'demean')
+    return new_column
+
+
+#
+# Function xpercentile
+#
+
+def xpercentile(p, c):
+    r"""Calculate the percentile rank within the group on each date.
+
+    Parameters
+    ----------
+    p : alphapy.Panel
+        Panel containing the column ``c`` of every member.
+    c : str
+        Name of the column in the panel ``p``.
+
+    Returns
+    -------
+    new_column : pandas.Series (float)
+        The array containing the new feature, from just above 0
+        for the lowest value to 1 for the highest value.
+
+    """
+    new_column = p.cross_section(c, 'percentile')
+    return new_column
+
+
+#
+# Function xrank
+#
+
+def xrank(p, c):
+    r"""Rank the values of the group on each date.
+
+    Parameters
+    ----------
+    p : alphapy.Panel
+        Panel containing the column ``c`` of every member.
+    c : str
+        Name of the column in the panel ``p``.
+
+    Returns
+    -------
+    new_column : pandas.Series (float)
+        The array containing the new feature, from 1 for the lowest
+        value, with ties getting their average rank.
+
+    """
+    new_column = p.cross_section(c, 'rank')
+    return new_column
+
+
+#
+# Function xzscore
+#
+
+def xzscore(p, c):
+    r"""Calculate the Z-Score within the group on each date.
+
+    Parameters
+    ----------
+    p : alphapy.Panel
+        Panel containing the column ``c`` of every member.
+    c : str
+        Name of the column in the panel ``p``.
+
+    Returns
+    -------
+    new_column : pandas.Series (float)
+        The array containing the new feature.
+
+    References
+    ----------
+    *In statistics, the standard score is the signed number of standard
+    deviations by which the value of an observation or data point is
+    above the mean value of what is being observed* [WIKI_ZS]_.
+
+    .. [WIKI_ZS] https://en.wikipedia.org/wiki/Standard_score
+
+    """
+    new_column = p.cross_section(c, 'zscore')
+    return new_column
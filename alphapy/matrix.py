@@ -0,0 +1,283 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : matrix
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+import logging
+import numpy as np
+import tempfile
+
+
+#
+# Initialize logger
+#
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Class FeatureMatrix
+#
+
+class FeatureMatrix(object):
+    """Create a new feature matrix with a fixed number of rows and
+    a growing number of columns.
+
+    The matrix is stored in column-major (Fortran) order, so new
+    columns are appended at the end of the buffer without moving
+    the existing columns. The buffer is over-allocated, so appending
+    the columns of each pipeline stage rarely copies the matrix.
+
+    Parameters
+    ----------
+    nrows : int
+        The number of rows (training plus testing samples).
+    split_point : int, optional
+        The row separating the training rows from the testing rows.
+    capacity : int, optional
+        The initial number of columns to allocate.
+    directory : str, optional
+        If specified, the matrix is backed by a temporary memory-mapped
+        file in this directory instead of anonymous memory.
+    dtype : numpy dtype, optional
+        The narrowest data type of the matrix. The matrix is widened
+        to hold the type of any appended features, e.g., ``float32``
+        features stay ``float32``, but ``int64`` features need
+        ``float64``.
+
+    Attributes
+    ----------
+    ncols : int
+        The number of columns currently in use.
+    dtype : numpy dtype
+        The data type of the matrix.
+    values : numpy array
+        A view of the columns in use.
+    train : numpy array
+        A view of the training rows.
+    test : numpy array
+        A view of the testing rows.
+
+    Examples
+    --------
+
+    >>> fm = FeatureMatrix(1000, split_point=800, directory='./data')
+    >>> fm.append(features)
+    >>> X_train, X_test = fm.split()
+    >>> fm.close()
+
+    Notes
+    -----
+    Views obtained before a call to ``append`` may point to the old
+    buffer if the matrix grows or is widened, and views obtained before
+    a call to ``select`` no longer point to the selected columns, so
+    get new views after either call.
+
+    The temporary file is deleted when the matrix is closed, or when
+    the process exits.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 nrows,
+                 split_point = None,
+                 capacity = 64,
+                 directory = None,
+                 dtype = np.float32):
+        # code
+        self.nrows = nrows
+        self.split_point = nrows if split_point is None else split_point
+        self.ncols = 0
+        self.dtype = np.dtype(dtype)
+        self.directory = directory
+        self.file = None
+        if directory:
+            logger.info("Mapping feature matrix to a temporary file in %s",
+                        directory)
+            self.file = self._tempfile()
+        self.data = self._allocate(max(capacity, 1), 'w+')
+
+    # __str__
+
+    def __str__(self):
+        return "FeatureMatrix(%d x %d)" % (self.nrows, self.ncols)
+
+    # function _tempfile
+
+    def _tempfile(self):
+        return tempfile.TemporaryFile(prefix='feature_matrix_', suffix='.dat',
+                                      dir=self.directory)
+
+    # function _allocate
+
+    def _allocate(self, capacity, mode):
+        shape = (self.nrows, capacity)
+        if self.file:
+            data = np.memmap(self.file, dtype=self.dtype, mode=mode,
+                             shape=shape, order='F')
+        else:
+            data = np.empty(shape, dtype=self.dtype, order='F')
+        return data
+
+    # function _reserve
+
+    def _reserve(self, ncols, dtype):
+        capacity = self.data.shape[1]
+        if dtype != self.dtype:
+            # every column moves to a buffer of the wider type
+            logger.debug("Widening feature matrix to %s", dtype)
+            old_data = self.data
+            old_file = self.file
+            self.dtype = dtype
+            if old_file:
+                self.file = self._tempfile()
+            self.data = self._allocate(max(ncols, capacity), 'w+')
+            self.data[:, :self.ncols] = old_data[:, :self.ncols]
+            del old_data
+            if old_file:
+                old_file.close()
+        elif ncols > capacity:
+            new_capacity = max(ncols, 2 * capacity)
+            logger.debug("Growing feature matrix to %d columns", new_capacity)
+            if self.file:
+                # In column-major order, extending the file keeps
+                # every existing column in place.
+                self.data.flush()
+                self.data = self._allocate(new_capacity, 'r+')
+            else:
+                data = self._allocate(new_capacity, None)
+                data[:, :self.ncols] = self.data[:, :self.ncols]
+                self.data = data
+
+    # function append
+
+    def append(self, features):
+        r"""Append new columns to the feature matrix.
+
+        Parameters
+        ----------
+        features : array-like
+            The new features, with one row per matrix row.
+
+        Returns
+        -------
+        ncols : int
+            The number of columns after appending.
+
+        Raises
+        ------
+        IndexError
+            The number of feature rows must match the matrix.
+
+        """
+        features = np.asarray(features)
+        if features.ndim == 1:
+            features = features.reshape(-1, 1)
+        if features.shape[0] != self.nrows:
+            raise IndexError("The number of feature rows [%d] must match the matrix [%d]" %
+                             (features.shape[0], self.nrows))
+        # non-numeric features are converted as before
+        ftype = features.dtype if features.dtype.kind in 'biuf' else np.float64
+        start = self.ncols
+        end = start + features.shape[1]
+        self._reserve(end, np.result_type(self.dtype, ftype))
+        self.data[:, start:end] = features
+        self.ncols = end
+        return self.ncols
+
+    # function select
+
+    def select(self, support):
+        r"""Keep only the supported columns, compacting them in place.
+
+        Parameters
+        ----------
+        support : numpy array
+            Boolean mask or column indices of the columns to keep.
+
+        Returns
+        -------
+        ncols : int
+            The number of columns after selection.
+
+        """
+        indices = np.arange(self.ncols)[support]
+        for i, j in enumerate(indices):
+            if i != j:
+                self.data[:, i] = self.data[:, j]
+        self.ncols = len(indices)
+        return self.ncols
+
+    # values
+
+    @property
+    def values(self):
+        return self.data[:, :self.ncols]
+
+    # train
+
+    @property
+    def train(self):
+        return self.data[:self.split_point, :self.ncols]
+
+    # test
+
+    @property
+    def test(self):
+        return self.data[self.split_point:, :self.ncols]
+
+    # function split
+
+    def split(self):
+        r"""Get the training and testing partitions as views.
+
+        Returns
+        -------
+        X_train : numpy array
+            The training rows.
+        X_test : numpy array
+            The testing rows.
+
+        """
+        return self.train, self.test
+
+    # function close
+
+    def close(self):
+        r"""Release the matrix and delete its temporary file.
+
+        Returns
+        -------
+        None : None
+
+        """
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.data = np.empty((self.nrows, 0), dtype=self.dtype, order='F')
+        self.ncols = 0
@@ -26,6 +26,7 @@
 # Imports
 #
 
+from alphapy.data import sampled_fit
 from alphapy.estimators import scorers
 from alphapy.estimators import xgb_score_map
 from alphapy.features import feature_scorers
@@ -38,8 +39,12 @@ from alphapy.globals import Partition, datasets
 from alphapy.globals import PSEP, SSEP, USEP
 from alphapy.globals import SamplingMethod
 from alphapy.globals import Scalers
+from alphapy.optimize import hyper_grid_search
+from alphapy.optimize import rfe_search
+from alphapy.optimize import rfecv_search
 from alphapy.utilities import np_store_data
 
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
 from datetime import datetime
 import glob
@@ -80,6 +85,13 @@ import yaml
 logger = logging.getLogger(__name__)
 
 
+#
+# Model attributes with the results of each algorithm
+#
+
+model_results = ['estimators', 'importances', 'coefs', 'support', 'preds', 'probas']
+
+
 #
 # Class Model
 #
@@ -108,6 +120,14 @@ class Model:
         Training labels in vector format.
     y_test  : pandas.Series
         Testing labels in vector format.
+    partitions : dict
+        Input frames already in memory, in the layout of the input
+        files (key: partition)
+    sample_rows : numpy array
+        The training rows kept by random undersampling, or ``None``
+    sample_counts : numpy array
+        The number of copies of each training row after random
+        oversampling, or ``None``
     algolist : list
         Algorithms to use in training.
     estimators : dict
@@ -144,6 +164,9 @@ class Model:
         self.X_test = None
         self.y_train = None
         self.y_test = None
+        self.partitions = {}
+        self.sample_rows = None
+        self.sample_counts = None
         # test labels
         self.test_labels = False
         # datasets
@@ -224,6 +247,10 @@ def get_model_config():
     # Section: data
 
     specs['drop'] = cfg['data']['drop']
+    try:
+        specs['downcast'] = cfg['data']['downcast']
+    except:
+        specs['downcast'] = False
     specs['features'] = cfg['data']['features']
     specs['sentinel'] = cfg['data']['sentinel']
     specs['separator'] = cfg['data']['separator']
@@ -349,6 +376,18 @@ def get_model_config():
     specs['n_jobs'] = cfg['pipeline']['number_jobs']
     specs['seed'] = cfg['pipeline']['seed']
     specs['verbosity'] = cfg['pipeline']['verbosity']
+    try:
+        specs['memory_map'] = cfg['pipeline']['memory_map']
+    except:
+        specs['memory_map'] = False
+    try:
+        specs['parallel'] = cfg['pipeline']['parallel']
+    except:
+        specs['parallel'] = False
+    try:
+        specs['stage_cache'] = cfg['pipeline']['stage_cache']
+    except:
+        specs['stage_cache'] = False
 
     # Section: plots
 
@@ -388,6 +427,7 @@ def get_model_config():
     logger.info('directory         = %s', specs['directory'])
     logger.info('extension         = %s', specs['extension'])
     logger.info('drop              = %s', specs['drop'])
+    logger.info('downcast          = %r', specs['downcast'])
     logger.info('encoder           = %r', specs['encoder'])
     logger.info('esr               = %d', specs['esr'])
     logger.info('factors           = %s', specs['factors'])
@@ -411,11 +451,13 @@ def get_model_config():
     logger.info('logtransform      = %r', specs['logtransform'])
     logger.info('lv_remove         = %r', specs['lv_remove'])
     logger.info('lv_threshold      = %f', specs['lv_threshold'])
+    logger.info('memory_map        = %r', specs['memory_map'])
     logger.info('model_type        = %r', specs['model_type'])
     logger.info('n_estimators      = %d', specs['n_estimators'])
     logger.info('n_jobs            = %d', specs['n_jobs'])
     logger.info('ngrams_max        = %d', specs['ngrams_max'])
     logger.info('numpy             = %r', specs['numpy'])
+    logger.info('parallel          = %r', specs['parallel'])
     logger.info('pca               = %r', specs['pca'])
     logger.info('pca_inc           = %d', specs['pca_inc'])
     logger.info('pca_max           = %d', specs['pca_max'])
@@ -439,6 +481,7 @@ def get_model_config():
     logger.info('separator         = %s', specs['separator'])
     logger.info('shuffle           = %r', specs['shuffle'])
     logger.info('split             = %f', specs['split'])
+    logger.info('stage_cache       = %r', specs['stage_cache'])
     logger.info('submission_file   = %s', specs['submission_file'])
     logger.info('submit_probas     = %r', specs['submit_probas'])
     logger.info('target [y]        = %s', specs['target'])
@@ -459,7 +502,7 @@ def get_model_config():
 # Function load_predictor
 #
 
-def load_predictor(directory):
+def load_predictor(directory, timestamp=None):
     r"""Load the model predictor from storage. By default, the
     most recent model is loaded into memory.
 
@@ -467,6 +510,8 @@ def load_predictor(directory):
     ----------
     directory : str
         Full directory specification of the predictor's location.
+    timestamp : str, optional
+        The timestamp of the predictor to load, if not the latest.
 
     Returns
     -------
@@ -476,7 +521,8 @@ def load_predictor(directory):
     """
 
     # Create search path
-    search_path = SSEP.join([directory, 'model', 'model_*.pkl'])
+    filename = 'model_' + (timestamp or '*') + '.pkl'
+    search_path = SSEP.join([directory, 'model', filename])
 
     # Locate the model Pickle file
 
@@ -536,7 +582,7 @@ def save_predictor(model, timestamp):
 # Function load_feature_map
 #
 
-def load_feature_map(model, directory):
+def load_feature_map(model, directory, timestamp=None):
     r"""Load the feature map from storage. By default, the
     most recent feature map is loaded into memory.
 
@@ -546,6 +592,8 @@ def load_feature_map(model, directory):
         The model object to contain the feature map.
     directory : str
         Full directory specification of the feature map's location.
+    timestamp : str, optional
+        The timestamp of the feature map to load, if not the latest.
 
     Returns
     -------
@@ -555,7 +603,8 @@ def load_feature_map(model, directory):
     """
 
     # Create search path
-    search_path = SSEP.join([directory, 'model', 'feature_map_*.pkl'])
+    filename = 'feature_map_' + (timestamp or '*') + '.pkl'
+    search_path = SSEP.join([directory, 'model', filename])
 
     # Locate the feature map and load it
 
@@ -634,16 +683,21 @@ def get_class_weights(model):
     target = model.specs['target']
     target_value = model.specs['target_value']
 
-    # Extract model data.
+    # Extract model data, counting any sampled rows.
 
-    y_train = model.y_train
+    y_train = np.asarray(model.y_train)
+    counts = model.sample_counts
+    sampled = y_train
+    if model.sample_rows is not None:
+        sampled = y_train[model.sample_rows]
 
-    # Calculate sample weights
+    # Calculate sample weights, one for each row of the training data
 
     sw = None
     if balance_classes:
         logger.info("Getting Class Weights")
-        uv, uc = np.unique(y_train, return_counts=True)
+        uv, ui = np.unique(sampled, return_inverse=True)
+        uc = np.bincount(ui, weights=counts)
         target_index = np.where(uv == target_value)[0][0]
         nontarget_index = np.where(uv != target_value)[0][0]
         weight = uc[nontarget_index] / uc[target_index]
@@ -707,22 +761,35 @@ def first_fit(model, algo, est):
     else:
         class_weights = None
 
-    # Extract model data.
+    # Extract model data, weighting any sampled rows.
 
-    X_train = model.X_train
-    y_train = model.y_train
+    if class_weights and model_type != ModelType.classification:
+        sw = class_weights
+    else:
+        sw = None
+    X_train, y_train, sw = sampled_fit(model, est, class_weights=sw)
 
     # Fit the initial model.
 
     if 'XGB' in algo and scorer in xgb_score_map:
-        X1, X2, y1, y2 = train_test_split(X_train, y_train, test_size=split,
-                                          random_state=seed)
-        eval_set = [(X1, y1), (X2, y2)]
         eval_metric = xgb_score_map[scorer]
-        est.fit(X1, y1, eval_set=eval_set, eval_metric=eval_metric,
-                early_stopping_rounds=esr)
-    elif class_weights and model_type != ModelType.classification:
-        est.fit(X_train, y_train, sample_weight=class_weights)
+        if sw is None:
+            X1, X2, y1, y2 = train_test_split(X_train, y_train,
+                                              test_size=split,
+                                              random_state=seed)
+            eval_set = [(X1, y1), (X2, y2)]
+            est.fit(X1, y1, eval_set=eval_set, eval_metric=eval_metric,
+                    early_stopping_rounds=esr)
+        else:
+            X1, X2, y1, y2, w1, w2 = train_test_split(X_train, y_train, sw,
+                                                      test_size=split,
+                                                      random_state=seed)
+            eval_set = [(X1, y1), (X2, y2)]
+            est.fit(X1, y1, sample_weight=w1, eval_set=eval_set,
+                    sample_weight_eval_set=[w1, w2], eval_metric=eval_metric,
+                    early_stopping_rounds=esr)
+    elif sw is not None:
+        est.fit(X_train, y_train, sample_weight=sw)
     else:
         est.fit(X_train, y_train)
 
@@ -807,7 +874,9 @@ def make_predictions(model, algo, calibrate):
         if calibrate:
             logger.info("Calibrating Classifier")
             est = CalibratedClassifierCV(est, cv=cv_folds, method=cal_type)
-            est.fit(X_train, y_train, sample_weight=class_weights)
+            X_sample, y_sample, sw = sampled_fit(model, est, X_train,
+                                                 class_weights)
+            est.fit(X_sample, y_sample, sample_weight=sw)
             model.estimators[algo] = est
             logger.info("Calibration Complete")
         else:
@@ -827,6 +896,203 @@ def make_predictions(model, algo, calibrate):
     return model
 
 
+#
+# Function fit_algorithm
+#
+
+def fit_algorithm(model, algo, estimator):
+    r"""Run the model selection steps for one algorithm.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object with specifications and training data.
+    algo : str
+        Abbreviation of the algorithm to run.
+    estimator : alphapy.Estimator
+        The estimator of the algorithm.
+
+    Returns
+    -------
+    model : alphapy.Model
+        The model object with the estimator, predictions, and any
+        support vector, importances, or coefficients of the algorithm.
+
+    """
+
+    # Extract model parameters.
+
+    calibration = model.specs['calibration']
+    grid_search = model.specs['grid_search']
+    rfe = model.specs['rfe']
+
+    # Fit the estimator
+
+    scoring = estimator.scoring
+    est = estimator.estimator
+    logger.info("Algorithm: %s", algo)
+    # initial fit
+    model = first_fit(model, algo, est)
+    # recursive feature elimination
+    if rfe:
+        if scoring:
+            model = rfecv_search(model, algo)
+        elif hasattr(est, "coef_"):
+            model = rfe_search(model, algo)
+        else:
+            logger.info("No RFE Available for %s", algo)
+    # grid search
+    if grid_search:
+        model = hyper_grid_search(model, estimator)
+    # predictions
+    model = make_predictions(model, algo, calibration)
+    return model
+
+
+#
+# Function fit_algorithm_worker
+#
+
+def fit_algorithm_worker(model, algo, estimator, data_files, n_jobs):
+    r"""Fit one algorithm in a worker process.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object without training and testing data.
+    algo : str
+        Abbreviation of the algorithm to run.
+    estimator : alphapy.Estimator
+        The estimator of the algorithm.
+    data_files : dict
+        The ``.npy`` file for each data attribute of the model.
+    n_jobs : int
+        The number of cores available to this algorithm.
+
+    Returns
+    -------
+    results : dict
+        The results of the algorithm for each model attribute.
+
+    Notes
+    -----
+    The data files are memory-mapped read-only, so all of the workers
+    share the same physical pages of the training and testing data.
+
+    """
+
+    for attr, filename in data_files.items():
+        setattr(model, attr, np.load(filename, mmap_mode='r'))
+    model.specs['n_jobs'] = n_jobs
+    est_params = estimator.estimator.get_params()
+    for param in ['n_jobs', 'nthread']:
+        if param in est_params:
+            estimator.estimator.set_params(**{param : n_jobs})
+    model = fit_algorithm(model, algo, estimator)
+    results = {attr : getattr(model, attr) for attr in model_results}
+    return results
+
+
+#
+# Function fit_algorithms
+#
+
+def fit_algorithms(model, estimators):
+    r"""Run the model selection steps for all of the algorithms.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object with specifications and training data.
+    estimators : dict
+        The estimators of all the available algorithms.
+
+    Returns
+    -------
+    model : alphapy.Model
+        The model object with the results of every algorithm.
+
+    Notes
+    -----
+    If the ``parallel`` option is set, the algorithms are fitted
+    concurrently in a process pool. The ``number_jobs`` cores are
+    divided among the workers, so the total number of cores in use
+    stays within this budget. The training and testing data are
+    passed to the workers as memory-mapped files in the ``data``
+    directory instead of being copied into each process.
+
+    """
+
+    logger.info("Selecting Models")
+
+    # Extract model parameters.
+
+    directory = model.specs['directory']
+    n_jobs = model.specs['n_jobs']
+    parallel = model.specs['parallel']
+
+    # Get the estimator of each algorithm
+
+    algo_estimators = []
+    for algo in model.algolist:
+        try:
+            algo_estimators.append((algo, estimators[algo]))
+        except KeyError:
+            logger.info("Algorithm %s not found", algo)
+
+    # Fit the algorithms in sequence
+
+    if not parallel or len(algo_estimators) < 2:
+        for algo, estimator in algo_estimators:
+            model = fit_algorithm(model, algo, estimator)
+        return model
+
+    # Divide the core budget among the workers
+
+    n_cores = n_jobs if n_jobs > 0 else os.cpu_count()
+    n_workers = min(n_cores, len(algo_estimators))
+    worker_jobs = max(1, n_cores // n_workers)
+    logger.info("Fitting %d algorithms with %d workers [%d cores each]",
+                len(algo_estimators), n_workers, worker_jobs)
+
+    # Share the data through memory-mapped files
+
+    data_files = {}
+    for attr in ['X_train', 'X_test', 'y_train', 'y_test']:
+        data = getattr(model, attr)
+        if data is not None:
+            file_only = PSEP.join([USEP.join(['shared', attr]), 'npy'])
+            filename = SSEP.join([directory, 'data', file_only])
+            np.save(filename, np.asarray(data))
+            data_files[attr] = filename
+
+    # Send the model to the workers without the data
+
+    worker_model = copy(model)
+    worker_model.specs = copy(model.specs)
+    for attr in data_files:
+        setattr(worker_model, attr, None)
+    for attr in model_results:
+        setattr(worker_model, attr, {})
+
+    # Fit the algorithms concurrently and merge the results
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(fit_algorithm_worker, worker_model, algo,
+                                       estimator, data_files, worker_jobs)
+                       for algo, estimator in algo_estimators]
+            for future in futures:
+                results = future.result()
+                for attr in model_results:
+                    getattr(model, attr).update(results[attr])
+    finally:
+        for filename in data_files.values():
+            os.remove(filename)
+
+    return model
+
+
 #
 # Function predict_best
 #
@@ -1219,8 +1485,11 @@ def save_predictions(model, tag, partition):
     input_dir = SSEP.join([directory, 'input'])
     output_dir = SSEP.join([directory, 'output'])
 
-    # Read the prediction frame
-    pf = read_frame(input_dir, datasets[partition], extension, separator)
+    # Read the prediction frame, unless it is already in memory
+
+    pf = model.partitions.pop(partition, None)
+    if pf is None:
+        pf = read_frame(input_dir, datasets[partition], extension, separator)
 
     # Cull records before the prediction date
 
@@ -26,6 +26,8 @@
 # Imports
 #
 
+from alphapy.data import sampled_fit
+from alphapy.data import sampled_rows
 from alphapy.globals import ModelType
 
 from datetime import datetime
@@ -87,10 +89,9 @@ def rfecv_search(model, algo):
 
     """
 
-    # Extract model data.
+    # Extract model data, including any sampled rows.
 
-    X_train = model.X_train
-    y_train = model.y_train
+    X_train, y_train = sampled_rows(model)
 
     # Extract model parameters.
 
@@ -161,10 +162,9 @@ def rfe_search(model, algo):
  
     """
 
-    # Extract model data.
+    # Extract model data, including any sampled rows.
 
-    X_train = model.X_train
-    y_train = model.y_train
+    X_train, y_train = sampled_rows(model)
 
     # Extract model parameters.
 
@@ -279,7 +279,6 @@ def hyper_grid_search(model, estimator):
         X_train = model.X_train[:, support]
     except:
         X_train = model.X_train
-    y_train = model.y_train
 
     # Extract model parameters.
 
@@ -296,6 +295,13 @@ def hyper_grid_search(model, estimator):
     scorer = model.specs['scorer']
     verbosity = model.specs['verbosity']
 
+    # Weight any sampled rows, unless feature selection must see them.
+
+    if feature_selection:
+        X_train, y_train, sw = sampled_fit(model, None, X_train)
+    else:
+        X_train, y_train, sw = sampled_fit(model, est, X_train)
+
     # Subsample if necessary to reduce grid search duration.
 
     if gs_sample:
@@ -304,6 +310,8 @@ def hyper_grid_search(model, estimator):
         indices = np.random.choice(length, subset, replace=False)
         X_train = X_train[indices]
         y_train = y_train[indices]
+        if sw is not None:
+            sw = sw[indices]
 
     # Convert the grid to pipeline format
 
@@ -341,7 +349,10 @@ def hyper_grid_search(model, estimator):
     # Fit the randomized search and time it.
 
     start = time()
-    gscv.fit(X_train, y_train)
+    if sw is not None:
+        gscv.fit(X_train, y_train, est__sample_weight=sw)
+    else:
+        gscv.fit(X_train, y_train)
     if gs_iters > 0:
         logger.info("Grid Search took %.2f seconds for %d candidate"
                     " parameter settings." % ((time() - start), gs_iters))
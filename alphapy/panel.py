@@ -0,0 +1,305 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : panel
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.frame import Frame
+from alphapy.frame import frame_name
+from alphapy.frame import read_frame
+
+import logging
+import numpy as np
+import pandas as pd
+
+
+#
+# Initialize logger
+#
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Name of the symbol level of a panel
+#
+
+PANEL_TAG = 'tag'
+
+
+#
+# Class Panel
+#
+
+class Panel(object):
+    """Stack the frames of a group into one dataframe indexed by
+    (tag, date), so that group-wide operations run in one call.
+
+    The rows of each member are contiguous and in date order, and the
+    member boundaries are kept in ``offsets``, so the time-series
+    kernels never mix the rows of two members.
+
+    Parameters
+    ----------
+    frames : list
+        The dataframes of the members, each indexed by date.
+    tags : list
+        The name of each member, in the same order as ``frames``.
+    space : alphapy.Space, optional
+        Namespace of the member frames.
+
+    Attributes
+    ----------
+    df : pandas.DataFrame
+        The stacked dataframe with a (tag, date) ``MultiIndex``.
+    offsets : numpy array
+        The first row of each member, followed by the total number
+        of rows.
+
+    Examples
+    --------
+
+    >>> panel = group_panel(Group.groups['tech'])
+    >>> panel.df['ret'] = panel.shift('close', -1) / panel.df['close'] - 1
+    >>> closes = panel.pivot('close')
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 frames,
+                 tags,
+                 space=None):
+        # code
+        self.tags = list(tags)
+        self.space = space
+        if frames:
+            index_name = frames[0].index.name
+            self.df = pd.concat(frames, keys=self.tags,
+                                names=[PANEL_TAG, index_name])
+        else:
+            self.df = pd.DataFrame()
+        sizes = [len(df) for df in frames]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(int)
+
+    # __str__
+
+    def __str__(self):
+        return "Panel(%d members, %d rows)" % (len(self.tags), len(self.df))
+
+    # sizes
+
+    @property
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    # dates
+
+    @property
+    def dates(self):
+        return self.df.index.get_level_values(1)
+
+    # function frame
+
+    def frame(self, tag):
+        r"""Get the rows of one member, indexed by date."""
+        i = self.tags.index(tag)
+        rows = self.df.iloc[self.offsets[i]:self.offsets[i+1]]
+        return rows.reset_index(level=0, drop=True)
+
+    # function positions
+
+    def positions(self):
+        r"""Get the position of each row within its member."""
+        starts = np.repeat(self.offsets[:-1], self.sizes)
+        return np.arange(len(self.df)) - starts
+
+    # function shift
+
+    def shift(self, column, n=1):
+        r"""Shift a column by ``n`` rows within each member.
+
+        Parameters
+        ----------
+        column : str
+            Name of the column to shift.
+        n : int, optional
+            The number of rows, negative to shift values backward.
+
+        Returns
+        -------
+        shifted : pandas.Series
+            The shifted column, with ``NaN`` where a value would
+            cross into another member.
+
+        """
+        shifted = self.df[column].shift(n)
+        if n > 0:
+            shifted = shifted.where(self.positions() >= n)
+        elif n < 0:
+            sizes = np.repeat(self.sizes, self.sizes)
+            shifted = shifted.where(self.positions() < sizes + n)
+        return shifted
+
+    # function cross_section
+
+    def cross_section(self, column, how='rank'):
+        r"""Compare a column across all the members on each date.
+
+        Parameters
+        ----------
+        column : str
+            Name of the column.
+        how : str, optional
+            The cross-sectional function:
+
+            ``'demean'``:
+                The value minus the mean of the date.
+            ``'percentile'``:
+                The rank of the value as a fraction of the members
+                with a value on the date.
+            ``'rank'``:
+                The rank of the value, starting at 1 for the lowest.
+            ``'zscore'``:
+                The distance of the value from the mean of the date,
+                in standard deviations.
+
+        Returns
+        -------
+        xs : pandas.Series
+            The cross-sectional values, in the order of the panel.
+
+        Raises
+        ------
+        ValueError
+            Unknown cross-sectional function.
+
+        """
+        values = self.df[column]
+        grouped = values.groupby(level=1, sort=False)
+        if how == 'rank':
+            xs = grouped.rank()
+        elif how == 'percentile':
+            xs = grouped.rank(pct=True)
+        elif how == 'demean':
+            xs = values - grouped.transform('mean')
+        elif how == 'zscore':
+            std = grouped.transform('std')
+            xs = (values - grouped.transform('mean')) / std.where(std > 0)
+        else:
+            raise ValueError("Unknown cross-sectional function: %s" % how)
+        return xs
+
+    # function last_dates
+
+    def last_dates(self):
+        r"""Get the last date of the member of each row."""
+        return np.repeat(self.dates[self.offsets[1:] - 1], self.sizes)
+
+    # function member_any
+
+    def member_any(self, mask):
+        r"""Broadcast whether any row of each member is in the mask."""
+        if len(mask) == 0:
+            return np.asarray(mask, dtype=bool)
+        hits = np.logical_or.reduceat(np.asarray(mask, dtype=bool),
+                                      self.offsets[:-1])
+        return np.repeat(hits, self.sizes)
+
+    # function member_count
+
+    def member_count(self, mask):
+        r"""Count the members with any row in the mask."""
+        return int(self.member_any(mask)[self.offsets[:-1]].sum())
+
+    # function pivot
+
+    def pivot(self, column):
+        r"""Align a column of all the members along a common date axis.
+
+        Parameters
+        ----------
+        column : str
+            Name of the column.
+
+        Returns
+        -------
+        aligned : pandas.DataFrame
+            A frame with one row per date and one column per member,
+            with ``NaN`` where a member has no data for a date.
+
+        """
+        aligned = self.df[column].unstack(level=0)
+        return aligned.reindex(columns=self.tags)
+
+
+#
+# Function group_panel
+#
+
+def group_panel(group, directory=None, extension=None, separator=None):
+    r"""Stack the frames of a group into a panel.
+
+    Parameters
+    ----------
+    group : alphapy.Group
+        The group whose members are stacked.
+    directory : str, optional
+        Full directory specification of the frames that are not
+        in memory.
+    extension : str, optional
+        File name extension, e.g., ``csv``.
+    separator : str, optional
+        The delimiter between fields in the file.
+
+    Returns
+    -------
+    panel : alphapy.Panel
+        The panel of all the non-empty member frames.
+
+    """
+    logger.info("Stacking frames for group %s", group.name)
+    gspace = group.space
+    frames = []
+    tags = []
+    for gn in [item.lower() for item in group.members]:
+        fname = frame_name(gn, gspace)
+        if fname in Frame.frames:
+            # spilled frames stay spilled, as the panel holds the rows
+            df = Frame.frames[fname].read()
+        elif directory:
+            logger.info("Load Data Frame %s from file", fname)
+            df = read_frame(directory, fname, extension, separator,
+                            index_col='date')
+        else:
+            logger.info("Data Frame for %s not found", fname)
+            df = None
+        if df is not None and not df.empty:
+            frames.append(df)
+            tags.append(gn)
+        else:
+            logger.debug("Empty Data Frame for: %s", gn)
+    return Panel(frames, tags, gspace)
@@ -0,0 +1,288 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : server
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.features import get_predict_features
+from alphapy.frame import downcast_frame
+from alphapy.globals import ModelType
+from alphapy.globals import SSEP
+from alphapy.globals import WILDCARD
+from alphapy.model import load_feature_map
+from alphapy.model import load_predictor
+
+import glob
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from io import StringIO
+import logging
+import os
+import pandas as pd
+
+
+#
+# Initialize logger
+#
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Class PredictionServer
+#
+
+class PredictionServer(object):
+    """Keep a trained model in memory for scoring prediction batches.
+
+    The predictor and the feature map are loaded once. Before each
+    batch, the ``model`` directory is checked for a newer predictor,
+    which is reloaded together with the feature map of the same
+    timestamp once that feature map has been saved.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object in prediction mode.
+
+    Attributes
+    ----------
+    predictor : object
+        The best estimator of the trained model.
+    version : tuple
+        The file name and creation time of the loaded predictor.
+
+    Examples
+    --------
+
+    >>> server = PredictionServer(model)
+    >>> rankings = server.predict(X_predict)
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 model):
+        # code
+        self.model = model
+        self.predictor = None
+        self.version = None
+        self.reload()
+
+    # __str__
+
+    def __str__(self):
+        return "PredictionServer(%s)" % (self.version,)
+
+    # function latest_version
+
+    def latest_version(self):
+        r"""Get the most recent predictor in the model directory.
+
+        Returns
+        -------
+        version : tuple
+            The file name and creation time of the newest predictor,
+            or ``None`` if there is no predictor.
+
+        """
+        directory = self.model.specs['directory']
+        search_path = SSEP.join([directory, 'model', 'model_*.pkl'])
+        filenames = glob.glob(search_path)
+        if not filenames:
+            return None
+        filename = max(filenames, key=os.path.getctime)
+        return (filename, os.path.getctime(filename))
+
+    # function reload
+
+    def reload(self):
+        r"""Load the newest predictor and feature map, if changed.
+
+        Returns
+        -------
+        reloaded : bool
+            ``True`` if a new predictor was loaded.
+
+        """
+        version = self.latest_version()
+        if version is None or version == self.version:
+            return False
+        # the feature map is saved after the predictor
+        filename, ctime = version
+        timestamp = os.path.basename(filename)[len('model_'):-len('.pkl')]
+        directory = self.model.specs['directory']
+        map_file = SSEP.join([directory, 'model',
+                              'feature_map_' + timestamp + '.pkl'])
+        if not os.path.exists(map_file) or os.path.getctime(map_file) < ctime:
+            logger.info("Waiting for the feature map of %s", filename)
+            return False
+        logger.info("Reloading model from %s", filename)
+        self.predictor = load_predictor(directory, timestamp)
+        self.model = load_feature_map(self.model, directory, timestamp)
+        self.version = version
+        return True
+
+    # function predict
+
+    def predict(self, X_predict):
+        r"""Score a batch of raw prediction data.
+
+        Parameters
+        ----------
+        X_predict : pandas.DataFrame
+            The raw prediction data, in the format of ``predict.csv``.
+
+        Returns
+        -------
+        rankings : pandas.DataFrame
+            The prediction data with the ``prediction`` and, for
+            classification, the ``probability`` columns, sorted
+            from the highest to the lowest score.
+
+        """
+        self.reload()
+        if self.predictor is None:
+            raise RuntimeError("No model predictor found")
+        # select the features as in get_data, dropping the target
+        downcast = self.model.specs['downcast']
+        features = self.model.specs['features']
+        target = self.model.specs['target']
+        rankings = X_predict.copy()
+        if target in X_predict.columns:
+            X_predict = X_predict.drop([target], axis=1)
+        if features != WILDCARD:
+            X_predict = X_predict[features]
+        if downcast:
+            X_predict = downcast_frame(X_predict.copy())
+        # transform and score the batch
+        all_features = get_predict_features(self.model, X_predict)
+        rankings['prediction'] = self.predictor.predict(all_features)
+        if self.model.specs['model_type'] == ModelType.classification:
+            probas = self.predictor.predict_proba(all_features)[:, 1]
+            rankings['probability'] = probas
+            rankings.sort_values('probability', ascending=False, inplace=True)
+        else:
+            rankings.sort_values('prediction', ascending=False, inplace=True)
+        return rankings
+
+
+#
+# Class PredictionHandler
+#
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Handle HTTP requests for the prediction server.
+
+    ``POST /predict`` accepts a batch in the format of ``predict.csv``
+    and returns the rankings in the same format. ``GET /status``
+    returns the file name of the loaded predictor.
+
+    """
+
+    # function send_text
+
+    def send_text(self, code, text, content_type='text/plain'):
+        body = text.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # function do_GET
+
+    def do_GET(self):
+        if self.path == '/status':
+            self.server.prediction_server.reload()
+            self.send_text(200, str(self.server.prediction_server.version))
+        else:
+            self.send_text(404, "Unknown path %s" % self.path)
+
+    # function do_POST
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_text(404, "Unknown path %s" % self.path)
+            return
+        prediction_server = self.server.prediction_server
+        separator = prediction_server.model.specs['separator']
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            text = self.rfile.read(length).decode('utf-8')
+            X_predict = pd.read_csv(StringIO(text), sep=separator)
+            rankings = prediction_server.predict(X_predict)
+            self.send_text(200, rankings.to_csv(sep=separator, index=False),
+                           'text/csv')
+        except Exception as e:
+            logger.exception("Prediction request failed")
+            self.send_text(500, str(e))
+
+    # function log_message
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+#
+# Function serve_predictions
+#
+
+def serve_predictions(model, host='localhost', port=8765):
+    r"""Run the prediction server until interrupted.
+
+    Parameters
+    ----------
+    model : alphapy.Model
+        The model object in prediction mode.
+    host : str, optional
+        The host name or address to listen on.
+    port : int, optional
+        The port to listen on.
+
+    Returns
+    -------
+    None : None
+
+    Notes
+    -----
+    Requests are handled one at a time, so a model is never
+    reloaded in the middle of scoring a batch.
+
+    """
+
+    logger.info("Serve Mode")
+
+    prediction_server = PredictionServer(model)
+    httpd = HTTPServer((host, port), PredictionHandler)
+    httpd.prediction_server = prediction_server
+    logger.info("Serving predictions on http://%s:%d/predict", host, port)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping prediction server")
+    finally:
+        httpd.server_close()
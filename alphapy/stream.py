@@ -0,0 +1,695 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : stream
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Streams
+# -------
+#
+# A stream is the incremental form of a variable function in
+# ``alphapy.market_variables``. Each call to ``update`` takes one
+# new bar and returns the new value of the variable in constant
+# time, with the same result as the function applied to the whole
+# dataframe, up to the rounding of the running sums.
+#
+# The state of a stream is stored in its attributes, so a stream
+# can be pickled, e.g., with ``joblib.dump``, and restored in
+# another process to continue with the next bar.
+#
+# Examples
+# --------
+#
+# stream = vstream('atr_10')
+# for bar in bars:
+#     value = stream.update(bar)
+#
+
+
+#
+# Imports
+#
+
+from alphapy.market_variables import vparse
+
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+import logging
+import math
+import pandas as pd
+
+
+#
+# Initialize logger
+#
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Function fdiv
+#
+
+def fdiv(a, b):
+    r"""Divide two floats with the IEEE results of numpy and pandas.
+
+    Parameters
+    ----------
+    a : float
+        The numerator.
+    b : float
+        The denominator.
+
+    Returns
+    -------
+    quotient : float
+        ``a / b``, which is infinite for a nonzero numerator and
+        a zero denominator, and ``NaN`` for ``0 / 0``.
+
+    """
+    if b == 0:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+#
+# Class Stream
+#
+
+class Stream(ABC):
+    """The base class of all streams.
+
+    Each subclass implements ``update``. A stream of a single input
+    value derives from ``ColumnStream`` and implements ``push``
+    instead.
+
+    Parameters
+    ----------
+    c : str, optional
+        The column of the bar that is the input of the stream.
+
+    Attributes
+    ----------
+    value : float
+        The value of the stream after the latest bar.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c=None):
+        # code
+        self.c = c
+        self.value = math.nan
+
+    # __str__
+
+    def __str__(self):
+        return "%s(%s)" % (self.__class__.__name__, self.c)
+
+    # function update
+
+    @abstractmethod
+    def update(self, bar):
+        r"""Add one bar, and return the new value of the stream.
+
+        Parameters
+        ----------
+        bar : dict or pandas.Series
+            The values of the bar, keyed by column name.
+
+        Returns
+        -------
+        value : float
+            The new value of the stream.
+
+        """
+
+
+#
+# Class ColumnStream
+#
+
+class ColumnStream(Stream):
+    """The base class of the streams of a single input value.
+
+    Parameters
+    ----------
+    c : str, optional
+        The column of the bar that is the input of the stream. If the
+        bar does not have the column, then the input is the stream of
+        the variable ``c``, e.g., ``truerange`` for ``atr_10``.
+
+    Attributes
+    ----------
+    source : alphapy.Stream
+        The stream of the input variable, or ``None``.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c=None):
+        # code
+        super(ColumnStream, self).__init__(c)
+        self.source = None
+
+    # function push
+
+    @abstractmethod
+    def push(self, x):
+        r"""Add one input value, and return the new value."""
+
+    # function update
+
+    def update(self, bar):
+        r"""Add the input value of one bar (see ``Stream.update``)."""
+        if self.c in bar:
+            x = bar[self.c]
+        else:
+            if self.source is None:
+                self.source = vstream(self.c)
+            x = self.source.update(bar)
+        self.value = self.push(float(x))
+        return self.value
+
+
+#
+# Class StreamMA
+#
+
+class StreamMA(ColumnStream):
+    """Stream of ``ma``, the rolling mean.
+
+    The sum of the window is updated with the entering and leaving
+    values, with the compensated summation of pandas.
+
+    Parameters
+    ----------
+    c : str
+        The column of the bar.
+    p : int, optional
+        The period of the rolling mean.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c,
+                 p=20):
+        # code
+        super(StreamMA, self).__init__(c)
+        self.p = p
+        self.window = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp = 0.0
+
+    # function add
+
+    def add(self, x):
+        if x == x:
+            self.nobs += 1
+            y = x - self.comp
+            t = self.sum_x + y
+            self.comp = t - self.sum_x - y
+            self.sum_x = t
+            if x < 0:
+                self.neg_ct += 1
+
+    # function remove
+
+    def remove(self, x):
+        if x == x:
+            self.nobs -= 1
+            y = -x - self.comp
+            t = self.sum_x + y
+            self.comp = t - self.sum_x - y
+            self.sum_x = t
+            if x < 0:
+                self.neg_ct -= 1
+
+    # function push
+
+    def push(self, x):
+        self.window.append(x)
+        self.add(x)
+        if len(self.window) > self.p:
+            self.remove(self.window.popleft())
+        if len(self.window) < self.p or self.nobs < self.p:
+            return math.nan
+        mean = self.sum_x / self.nobs
+        if self.neg_ct == 0 and mean < 0:
+            mean = 0.0
+        elif self.neg_ct == self.nobs and mean > 0:
+            mean = 0.0
+        return mean
+
+
+#
+# Class StreamEWM
+#
+
+class StreamEWM(ColumnStream):
+    """Stream of an exponentially weighted mean, as in ``ema``.
+
+    The weights are adjusted as in ``pandas.Series.ewm(span=p)``,
+    where a missing value still decays the weights of the earlier
+    values.
+
+    Parameters
+    ----------
+    c : str
+        The column of the bar.
+    p : int, optional
+        The span of the exponential weights.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c,
+                 p=20):
+        # code
+        super(StreamEWM, self).__init__(c)
+        self.p = p
+        alpha = 2.0 / (p + 1.0)
+        self.old_wt_factor = 1.0 - alpha
+        self.old_wt = 1.0
+        self.weighted = math.nan
+        self.nobs = 0
+
+    # function push
+
+    def push(self, x):
+        is_obs = x == x
+        self.nobs += is_obs
+        if self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_obs:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + x) \
+                                    / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif is_obs:
+            self.weighted = x
+        return self.weighted if self.nobs > 0 else math.nan
+
+
+#
+# Class StreamExtreme
+#
+
+class StreamExtreme(ColumnStream):
+    """Stream of ``highest`` or ``lowest``, the rolling maximum or
+    minimum.
+
+    A monotonic deque holds the candidates for the extreme, so each
+    value enters and leaves the deque once.
+
+    Parameters
+    ----------
+    c : str
+        The column of the bar.
+    p : int, optional
+        The period of the rolling window.
+    how : str, optional
+        ``max`` or ``min``.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c,
+                 p=20,
+                 how='max'):
+        # code
+        super(StreamExtreme, self).__init__(c)
+        self.p = p
+        self.sign = 1.0 if how == 'max' else -1.0
+        self.candidates = deque()
+        self.nans = deque()
+        self.count = 0
+
+    # function push
+
+    def push(self, x):
+        i = self.count
+        self.count += 1
+        if x != x:
+            self.nans.append(i)
+        else:
+            v = self.sign * x
+            while self.candidates and self.candidates[-1][1] <= v:
+                self.candidates.pop()
+            self.candidates.append((i, v))
+        start = i - self.p + 1
+        while self.candidates and self.candidates[0][0] < start:
+            self.candidates.popleft()
+        while self.nans and self.nans[0] < start:
+            self.nans.popleft()
+        if start < 0 or self.nans or not self.candidates:
+            return math.nan
+        return self.sign * self.candidates[0][1]
+
+
+#
+# Class StreamHighest
+#
+
+class StreamHighest(StreamExtreme):
+    """Stream of ``highest``, the rolling maximum."""
+
+    # __init__
+
+    def __init__(self,
+                 c,
+                 p=20):
+        # code
+        super(StreamHighest, self).__init__(c, p, 'max')
+
+
+#
+# Class StreamLowest
+#
+
+class StreamLowest(StreamExtreme):
+    """Stream of ``lowest``, the rolling minimum."""
+
+    # __init__
+
+    def __init__(self,
+                 c,
+                 p=20):
+        # code
+        super(StreamLowest, self).__init__(c, p, 'min')
+
+
+#
+# Class StreamNet
+#
+
+class StreamNet(ColumnStream):
+    """Stream of ``net``, the change from ``o`` bars ago.
+
+    Parameters
+    ----------
+    c : str, optional
+        The column of the bar.
+    o : int, optional
+        The offset of the previous value.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c='close',
+                 o=1):
+        # code
+        super(StreamNet, self).__init__(c)
+        self.o = o
+        self.previous = deque()
+
+    # function push
+
+    def push(self, x):
+        self.previous.append(x)
+        if len(self.previous) <= self.o:
+            return math.nan
+        return x - self.previous.popleft()
+
+
+#
+# Class StreamRSI
+#
+
+class StreamRSI(Stream):
+    """Stream of ``rsi``, the Relative Strength Index.
+
+    As in ``rsi``, the gains and losses are those of the ``net``
+    variable, i.e., of the close.
+
+    Parameters
+    ----------
+    c : str, optional
+        The column of the bar, which is not used by ``rsi``.
+    p : int, optional
+        The period of the RSI.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 c='close',
+                 p=14):
+        # code
+        super(StreamRSI, self).__init__(c)
+        self.p = p
+        self.net = StreamNet('close', 1)
+        self.gains = StreamMA('pval', p)
+        self.losses = StreamMA('mval', p)
+
+    # function update
+
+    def update(self, bar):
+        net = self.net.update(bar)
+        gain = self.gains.push(net if net > 0 else 0.0)
+        loss = self.losses.push(-net if net < 0 else 0.0)
+        self.value = 100 - fdiv(100, 1 + fdiv(gain, loss))
+        return self.value
+
+
+#
+# Class StreamTrueRange
+#
+
+class StreamTrueRange(Stream):
+    """Stream of ``truerange``, the range from the previous bar."""
+
+    # __init__
+
+    def __init__(self):
+        # code
+        super(StreamTrueRange, self).__init__()
+        self.high = math.nan
+        self.low = math.nan
+
+    # function update
+
+    def update(self, bar):
+        high = float(bar['high'])
+        low = float(bar['low'])
+        # same as truehigh and truelow, including the first bar
+        true_high = high if high > self.low else self.low
+        true_low = low if low < self.high else self.high
+        self.high = high
+        self.low = low
+        self.value = true_high - true_low
+        return self.value
+
+
+#
+# Class StreamDI
+#
+
+class StreamDI(Stream):
+    """Stream of ``diplus`` or ``diminus``, the directional indicators.
+
+    Parameters
+    ----------
+    p : int, optional
+        The period of the average true range and the span of the
+        directional movement.
+    how : str, optional
+        ``plus`` or ``minus``.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 p=14,
+                 how='plus'):
+        # code
+        super(StreamDI, self).__init__()
+        self.p = p
+        self.how = how
+        self.truerange = StreamTrueRange()
+        self.atr = StreamMA('truerange', p)
+        self.dm = StreamEWM('dm', p)
+        self.high = math.nan
+        self.low = math.nan
+
+    # function update
+
+    def update(self, bar):
+        high = float(bar['high'])
+        low = float(bar['low'])
+        upmove = high - self.high
+        downmove = self.low - low
+        self.high = high
+        self.low = low
+        # same as dmplus and dminus, where a comparison with NaN is zero
+        if self.how == 'plus':
+            dm = upmove if upmove > downmove and upmove > 0 else 0.0
+        else:
+            dm = downmove if downmove > upmove and downmove > 0 else 0.0
+        atr = self.atr.push(self.truerange.update(bar))
+        self.value = fdiv(100 * self.dm.push(dm), atr)
+        return self.value
+
+
+#
+# Class StreamADX
+#
+
+class StreamADX(Stream):
+    """Stream of ``adx``, the Average Directional Index.
+
+    As in ``adx``, the directional indicators have their default
+    period of 14, and ``p`` is the span of the index.
+
+    Parameters
+    ----------
+    p : int, optional
+        The span of the index.
+
+    """
+
+    # __init__
+
+    def __init__(self,
+                 p=14):
+        # code
+        super(StreamADX, self).__init__()
+        self.p = p
+        self.diplus = StreamDI(14, 'plus')
+        self.diminus = StreamDI(14, 'minus')
+        self.didiff = StreamEWM('didiff', p)
+
+    # function update
+
+    def update(self, bar):
+        dip = self.diplus.update(bar)
+        dim = self.diminus.update(bar)
+        didiff = self.didiff.push(abs(dip - dim))
+        self.value = fdiv(100 * didiff, dip + dim)
+        return self.value
+
+
+#
+# Stream classes of the variable functions
+#
+
+stream_classes = {'adx'       : StreamADX,
+                  'diminus'   : lambda p=14: StreamDI(p, 'minus'),
+                  'diplus'    : lambda p=14: StreamDI(p, 'plus'),
+                  'ema'       : StreamEWM,
+                  'highest'   : StreamHighest,
+                  'lowest'    : StreamLowest,
+                  'ma'        : StreamMA,
+                  'net'       : StreamNet,
+                  'rsi'       : StreamRSI,
+                  'truerange' : StreamTrueRange}
+
+
+#
+# Function vstream
+#
+
+def vstream(vname):
+    r"""Create the stream of a variable.
+
+    Parameters
+    ----------
+    vname : str
+        The name of the variable, e.g., ``ma_close_20``, or an alias
+        of a variable function, e.g., ``atr_10``.
+
+    Returns
+    -------
+    stream : alphapy.Stream
+        The new stream of the variable.
+
+    Raises
+    ------
+    ValueError
+        No stream for the variable.
+
+    """
+    vxlag, root, plist, lag = vparse(vname)
+    if root not in stream_classes or lag:
+        raise ValueError("No stream for variable %s" % vname)
+    params = []
+    for p in plist:
+        try:
+            params.append(int(p))
+        except:
+            try:
+                params.append(float(p))
+            except:
+                params.append(p)
+    stream = stream_classes[root](*params)
+    return stream
+
+
+#
+# Function stream_frame
+#
+
+def stream_frame(stream, df):
+    r"""Run a stream over the bars of a dataframe.
+
+    Parameters
+    ----------
+    stream : alphapy.Stream
+        The stream to update with each bar.
+    df : pandas.DataFrame
+        The bars, in time order.
+
+    Returns
+    -------
+    new_column : pandas.Series
+        The value of the stream after each bar.
+
+    Notes
+    -----
+    Use this function to warm up a stream with the history before
+    updating it with live bars.
+
+    """
+    columns = list(df.columns)
+    values = [stream.update(dict(zip(columns, row)))
+              for row in df.itertuples(index=False)]
+    new_column = pd.Series(values, index=df.index)
+    return new_column
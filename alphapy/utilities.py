@@ -26,6 +26,8 @@
 # Imports
 #
 
+from alphapy.frame import frame_stores
+from alphapy.frame import write_frame
 from alphapy.globals import PSEP, SSEP, USEP
 
 import argparse
@@ -34,6 +36,7 @@ import inspect
 from itertools import groupby
 import logging
 import numpy as np
+import pandas as pd
 from os import listdir
 from os.path import isfile, join
 import re
@@ -70,11 +73,20 @@ def np_store_data(data, dir_name, file_name, extension, separator):
     -------
     None : None
 
+    Notes
+    -----
+    If the ``extension`` is one of the binary frame stores, e.g.,
+    ``parquet``, then the data are written with ``write_frame``.
+
     """
-    output_file = PSEP.join([file_name, extension])
-    output = SSEP.join([dir_name, output_file])
-    logger.info("Storing output to %s", output)
-    np.savetxt(output, data, delimiter=separator)
+    if extension in frame_stores:
+        df = pd.DataFrame(np.asarray(data))
+        write_frame(df, dir_name, file_name, extension, separator)
+    else:
+        output_file = PSEP.join([file_name, extension])
+        output = SSEP.join([dir_name, output_file])
+        logger.info("Storing output to %s", output)
+        np.savetxt(output, data, delimiter=separator)
 
 
 #
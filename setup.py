@@ -30,7 +30,7 @@ install_reqs = [
     'ipython>=3.2.3',
     'matplotlib>=2.0.0',
     'numpy>=1.9.1',
-    'pandas>=0.19.0',
+    'pandas>=0.21.0',
     'pandas-datareader>=0.3',
     'pyfolio>=0.7',
     'pyyaml>=3.12',
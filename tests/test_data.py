@@ -0,0 +1,244 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_data
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+import alphapy.data
+from alphapy.data import fetch_feed_data
+from alphapy.data import get_cached_data
+from alphapy.data import sample_data
+from alphapy.data import sampled_fit
+from alphapy.data import sampled_rows
+from alphapy.globals import SamplingMethod
+
+from datetime import datetime
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+
+#
+# Function google_text
+#
+
+def google_text(days, bars=3):
+    r"""Make a Google Finance response with bars for the last days."""
+    lines = ['EXCHANGE%3DNASDAQ',
+             'MARKET_OPEN_MINUTE=570',
+             'MARKET_CLOSE_MINUTE=960',
+             'INTERVAL=300',
+             'COLUMNS=DATE,CLOSE,HIGH,LOW,OPEN,VOLUME',
+             'DATA=',
+             'TIMEZONE_OFFSET=0']
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0,
+                                      microsecond=0)
+    epoch = datetime(1970, 1, 1)
+    for d in range(days - 1, -1, -1):
+        anchor = today - timedelta(days=d) + timedelta(hours=12)
+        stamp = int((anchor - epoch).total_seconds())
+        for i in range(bars):
+            date = 'a%d' % stamp if i == 0 else str(i)
+            lines.append('%s,10.5,11,10,10.2,%d' % (date, 1000 + i))
+    return '\n'.join(lines) + '\n'
+
+
+#
+# Class FeedHandler
+#
+
+class FeedHandler(BaseHTTPRequestHandler):
+    r"""Serve the Google Finance format, failing the first requests."""
+
+    # function do_GET
+
+    def do_GET(self):
+        server = self.server
+        server.paths.append(self.path)
+        if len(server.paths) <= server.failures:
+            self.send_response(500)
+            self.end_headers()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        days = int(query['p'][0].rstrip('d'))
+        body = google_text(days).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # function log_message
+
+    def log_message(self, format, *args):
+        pass
+
+
+#
+# Function feed
+#
+
+@pytest.fixture
+def feed():
+    server = HTTPServer(('127.0.0.1', 0), FeedHandler)
+    server.paths = []
+    server.failures = 0
+    server.base_url = 'http://127.0.0.1:%d/getprices?q={}&i={}&p={}d' \
+                      % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+#
+# Function delays
+#
+
+@pytest.fixture
+def delays(monkeypatch):
+    slept = []
+    monkeypatch.setattr(alphapy.data.time, 'sleep', slept.append)
+    return slept
+
+
+#
+# Function test_fetch_retries_with_backoff
+#
+
+def test_fetch_retries_with_backoff(feed, delays):
+    feed.failures = 2
+    df = fetch_feed_data('google', '5m', 'aaa', 5, retries=3, backoff=0.5,
+                         base_url=feed.base_url)
+    assert len(feed.paths) == 3
+    assert delays == [0.5, 1.0]
+    assert len(df) == 15
+    assert 'q=AAA' in feed.paths[0]
+    assert list(df['bar_number'][:3]) == [0, 1, 2]
+
+
+#
+# Function test_fetch_gives_up
+#
+
+def test_fetch_gives_up(feed, delays):
+    feed.failures = 10
+    df = fetch_feed_data('google', '5m', 'aaa', 5, retries=2, backoff=0.5,
+                         base_url=feed.base_url)
+    assert df is None
+    assert len(feed.paths) == 3
+    assert delays == [0.5, 1.0]
+
+
+#
+# Function test_cache_miss_then_hit
+#
+
+def test_cache_miss_then_hit(feed, delays, tmpdir):
+    cache_dir = str(tmpdir)
+    # a miss requests the whole lookback period
+    df = get_cached_data('google', '5m', 'aaa', 10, cache_dir, 'npz', ',',
+                         base_url=feed.base_url)
+    assert feed.paths[-1].endswith('p=10d')
+    assert tmpdir.join('feed_aaa_google_5m.npz').check()
+    # a hit requests only the days since the last cached date
+    df2 = get_cached_data('google', '5m', 'aaa', 10, cache_dir, 'npz', ',',
+                          base_url=feed.base_url)
+    assert len(feed.paths) == 2
+    assert feed.paths[-1].endswith('p=1d')
+    assert len(df2) == len(df)
+    assert list(df2.index) == list(df.index)
+    assert delays == []
+
+
+#
+# Function sampling_model
+#
+
+def sampling_model(sampling_method, nrows=200):
+    r"""Make a model with imbalanced training data for sampling."""
+    specs = {'sampling_method' : sampling_method,
+             'sampling_ratio' : 0.0,
+             'seed' : 42,
+             'target' : 'target',
+             'target_value' : 1}
+    rng = np.random.RandomState(0)
+    model = SimpleNamespace(specs=specs,
+                            X_train=rng.rand(nrows, 3),
+                            y_train=(np.arange(nrows) % 5 == 0).astype(int),
+                            sample_rows=None,
+                            sample_counts=None)
+    return model
+
+
+#
+# Function test_random_undersampling
+#
+
+def test_random_undersampling():
+    model = sample_data(sampling_model(SamplingMethod.under_random))
+    rows = model.sample_rows
+    assert model.sample_counts is None
+    assert len(rows) == 80 and np.all(np.diff(rows) > 0)
+    # the estimator only sees the sampled rows, with no weights
+    for est in [LogisticRegression(), KNeighborsClassifier(), None]:
+        X, y, sw = sampled_fit(model, est)
+        np.testing.assert_array_equal(X, model.X_train[rows])
+        np.testing.assert_array_equal(np.bincount(y), [40, 40])
+        assert sw is None
+    X, y, sw = sampled_fit(model, None, model.X_train[:, :2],
+                           class_weights=np.arange(200.0))
+    assert X.shape == (80, 2)
+    np.testing.assert_array_equal(sw, rows)
+
+
+#
+# Function test_random_oversampling
+#
+
+def test_random_oversampling():
+    model = sample_data(sampling_model(SamplingMethod.over_random))
+    counts = model.sample_counts
+    assert model.sample_rows is None
+    assert counts.min() == 1 and counts.sum() == 320
+    # an estimator with sample weights is fit on the rows as is
+    X, y, sw = sampled_fit(model, LogisticRegression())
+    assert X is model.X_train
+    np.testing.assert_array_equal(sw, counts)
+    # otherwise the rows are copied
+    X, y = sampled_rows(model)
+    assert X.shape == (320, 3)
+    np.testing.assert_array_equal(np.bincount(y), [160, 160])
+
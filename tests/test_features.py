@@ -0,0 +1,57 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_features
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+
+#
+# Imports
+#
+
+from alphapy.features import rolling_runs
+from alphapy.features import rtotal
+from alphapy.features import runs
+from alphapy.features import streak
+from alphapy.features import zscore
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+#
+# Function test_rolling_runs_matches_window_functions
+#
+
+@pytest.mark.parametrize('window', [1, 2, 7, 20])
+def test_rolling_runs_matches_window_functions(window):
+    rng = np.random.RandomState(7)
+    values = (rng.rand(300) > 0.4).astype(float)
+    values[[50, 51, 180]] = np.nan
+    vec = pd.Series(values)
+    stats = rolling_runs(vec, window)
+    # the previous implementation applied each function to each window
+    for name, func in [('rtotal', rtotal), ('runs', runs),
+                       ('streak', streak), ('zscore', zscore)]:
+        expected = vec.rolling(window=window).apply(func, raw=True)
+        np.testing.assert_allclose(stats[name], expected.values,
+                                   rtol=1e-12, equal_nan=True)
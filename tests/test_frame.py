@@ -0,0 +1,145 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_frame
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.frame import Frame
+from alphapy.frame import read_chunked_frame
+from alphapy.frame import read_frame
+from alphapy.frame import set_frame_budget
+from alphapy.frame import write_frame
+from alphapy.space import Space
+
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+
+
+#
+# Function price_frame
+#
+
+def price_frame(label):
+    r"""Make a small price frame with its dates in the column label."""
+    dates = pd.date_range('2017-01-02', periods=5).strftime('%Y-%m-%d')
+    df = pd.DataFrame({label : dates,
+                       'close' : np.arange(5, dtype=float),
+                       'volume' : np.arange(5) * 100})
+    return df
+
+
+#
+# Function test_read_frame_date_labels
+#
+
+@pytest.mark.parametrize('extension', ['csv', 'npz', 'parquet', 'feather'])
+@pytest.mark.parametrize('label', ['date', 'Date', 'datetime', 'bar'])
+def test_read_frame_date_labels(tmpdir, extension, label):
+    if extension in ['parquet', 'feather']:
+        pytest.importorskip('pyarrow')
+    directory = str(tmpdir)
+    df = price_frame(label)
+    assert write_frame(df, directory, 'prices', extension, ',', index=False)
+    rf = read_frame(directory, 'prices', extension, ',', index_col='date')
+    assert rf is not None
+    if label == 'bar':
+        # no date label, so the frame keeps its default index
+        assert list(rf.columns) == ['bar', 'close', 'volume']
+        assert list(rf.index) == list(range(5))
+    else:
+        assert rf.index.name == label
+        assert list(rf.index) == list(df[label])
+        assert list(rf.columns) == ['close', 'volume']
+    # the subset of columns is read with the index
+    rf = read_frame(directory, 'prices', extension, ',', index_col='date',
+                    columns=['close'], squeeze=True)
+    assert isinstance(rf, pd.Series)
+    assert list(rf) == list(df['close'])
+
+
+#
+# Function test_read_frame_missing
+#
+
+def test_read_frame_missing(tmpdir, caplog):
+    caplog.set_level(logging.INFO)
+    directory = str(tmpdir)
+    assert read_frame(directory, 'nothing', 'csv', ',', index_col='date') is None
+    assert read_frame(directory, 'nothing', 'npz', ',') is None
+    assert read_chunked_frame(directory, 'nothing', 'npz', ',') is None
+    assert 'No such file' in caplog.text
+    # a missing column of a binary store is also reported
+    write_frame(price_frame('date'), directory, 'prices', 'npz', ',',
+                index=False)
+    assert read_frame(directory, 'prices', 'npz', ',',
+                      columns=['open']) is None
+    df = read_chunked_frame(directory, 'prices', 'npz', ',',
+                            columns=['close', 'open'])
+    assert list(df.columns) == ['close']
+
+
+#
+# Function test_npz_frame_dtypes
+#
+
+def test_npz_frame_dtypes(tmpdir):
+    directory = str(tmpdir)
+    dates = pd.date_range('2017-01-02 09:30', periods=4, freq='h',
+                          tz='US/Eastern')
+    df = pd.DataFrame({'sector' : pd.Categorical(['tech', None, 'bank', 'tech'],
+                                                 categories=['tech', 'bank', 'oil'],
+                                                 ordered=True),
+                       'close' : np.linspace(1, 2, 4).astype(np.float32),
+                       'volume' : np.arange(4, dtype=np.int16),
+                       'symbol' : ['a', 'b', 'c', 'd']},
+                      index=pd.Index(dates, name='datetime'))
+    assert write_frame(df, directory, 'prices', 'npz', ',', index=True)
+    rf = read_frame(directory, 'prices', 'npz', ',', index_col='datetime')
+    pd.testing.assert_frame_equal(rf, df, check_freq=False)
+    rf = read_frame(directory, 'prices', 'npz', ',', columns=['sector'])
+    pd.testing.assert_series_equal(rf['sector'], df['sector'].reset_index(drop=True))
+
+
+#
+# Function test_frame_read_keeps_spill
+#
+
+def test_frame_read_keeps_spill(tmpdir):
+    space = Space('test', 'prices', '1d')
+    frames = [Frame(s, space, price_frame('date').set_index('date'))
+              for s in ['spill_a', 'spill_b']]
+    try:
+        set_frame_budget(1e-6, str(tmpdir))
+        assert frames[0].spilled
+        df = frames[0].read()
+        assert frames[0].spilled
+        assert frames[0]._df is None
+        pd.testing.assert_frame_equal(df, price_frame('date').set_index('date'))
+    finally:
+        set_frame_budget(None, None)
+        for f in frames:
+            Frame.frames.pop(str(f), None)
@@ -0,0 +1,311 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_market_variables
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.alias import Alias
+from alphapy.frame import Frame
+from alphapy.frame import frame_name
+from alphapy.group import Group
+from alphapy.market_variables import rolling_extremes
+from alphapy.market_variables import rolling_means
+from alphapy.market_variables import VExpression
+from alphapy.market_variables import Variable
+from alphapy.market_variables import vcompile
+from alphapy.market_variables import vmapply
+from alphapy.market_variables import vmupdate
+from alphapy.market_variables import vrunplan
+from alphapy.space import Space
+
+import logging
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import pytest
+import re
+
+
+#
+# Variables of the incremental tests, including exponential moving
+# averages and a cross-sectional stage
+#
+
+VARIABLES = ['ma_close_10', 'highest_high_20', 'rsi_close_14',
+             'ema_close_20', 'adx_14', 'xrank_ma_close_10']
+
+
+#
+# Function price_frame
+#
+
+def price_frame(n, seed):
+    r"""Make a frame of random daily prices indexed by date."""
+    rng = np.random.RandomState(seed)
+    close = 100 + rng.randn(n).cumsum()
+    df = pd.DataFrame({'open'   : close + rng.randn(n) * 0.2,
+                       'high'   : close + rng.rand(n),
+                       'low'    : close - rng.rand(n),
+                       'close'  : close,
+                       'volume' : rng.randint(1000, 5000, n).astype(float)},
+                      index=pd.date_range('2017-01-02', periods=n, freq='B',
+                                          name='date'))
+    return df
+
+
+#
+# Function group
+#
+
+@pytest.fixture
+def group():
+    space = Space('stock', 'prices', '1d')
+    name = 'test_incremental'
+    # adx applies the average true range through its alias
+    if 'atr' not in Alias.aliases:
+        Alias('atr', 'ma_truerange')
+    Group.groups.pop(name, None)
+    g = Group(name, space, members={'aaa', 'bbb', 'ccc'})
+    yield g
+    Group.groups.pop(name, None)
+    for member in g.members:
+        Frame.frames.pop(frame_name(member, space), None)
+
+
+#
+# Function set_frames
+#
+
+def set_frames(group, frames):
+    r"""Replace the member frames of the group."""
+    for member, df in frames.items():
+        fname = frame_name(member, group.space)
+        Frame.frames.pop(fname, None)
+        Frame(member, group.space, df.copy())
+
+
+#
+# Function test_vmupdate_matches_vmapply
+#
+
+@pytest.mark.parametrize('history', [None, 90])
+def test_vmupdate_matches_vmapply(group, tmpdir, caplog, history):
+    directory = str(tmpdir)
+    members = sorted(group.members)
+    frames = {m : price_frame(120, seed) for seed, m in enumerate(members)}
+    # update the frames twice as they grow, checking each update
+    caplog.set_level(logging.INFO)
+    for n in [80, 100, 120]:
+        set_frames(group, {m : df.iloc[:n] for m, df in frames.items()})
+        vmupdate(group, VARIABLES, directory, 'npz', ',', verify=True,
+                 history=history)
+        for m in members:
+            fname = frame_name(m, group.space)
+            assert os.path.exists(os.path.join(directory, fname + '.npz'))
+            assert os.path.exists(os.path.join(directory, fname + '_streams.pkl'))
+    assert 'differs' not in caplog.text
+    # only the first run calculates the whole history
+    assert caplog.text.count('Stored frame is missing') == 0
+    updated = {m : Frame.frames[frame_name(m, group.space)].df
+               for m in members}
+    # apply the variables to the whole history
+    set_frames(group, frames)
+    vmapply(group, VARIABLES)
+    for m in members:
+        expected = Frame.frames[frame_name(m, group.space)].df
+        actual = updated[m]
+        if history:
+            expected = expected.iloc[-history:]
+        assert len(actual) == len(expected)
+        assert actual.index.equals(expected.index)
+        for v in VARIABLES:
+            np.testing.assert_allclose(actual[v].values.astype(float),
+                                       expected[v].values.astype(float),
+                                       rtol=1e-9, equal_nan=True)
+
+
+#
+# Function long_series
+#
+
+def long_series(n=150000, seed=11):
+    r"""Make a long random walk far from zero, with gaps of NaN."""
+    rng = np.random.RandomState(seed)
+    values = 1e4 + rng.randn(n).cumsum()
+    values[1000:1005] = np.nan
+    values[[70000, 149990]] = np.nan
+    return values
+
+
+#
+# Function test_rolling_means_matches_pandas
+#
+
+def test_rolling_means_matches_pandas():
+    values = long_series()
+    periods = [1, 3, 10, 50, 200]
+    means = rolling_means(values, periods)
+    for p in periods:
+        expected = pd.Series(values).rolling(p).mean().values
+        np.testing.assert_allclose(means[p], expected, rtol=1e-12,
+                                   equal_nan=True)
+
+
+#
+# Function test_rolling_extremes_matches_pandas
+#
+
+@pytest.mark.parametrize('how', ['max', 'min'])
+def test_rolling_extremes_matches_pandas(how):
+    values = long_series()
+    periods = [1, 2, 5, 20, 63, 200]
+    extremes = rolling_extremes(values, periods, how)
+    for p in periods:
+        expected = getattr(pd.Series(values).rolling(p), how)().values
+        np.testing.assert_array_equal(extremes[p], expected)
+
+
+#
+# Function test_vrunplan_rolling_families
+#
+
+def test_vrunplan_rolling_families():
+    f = price_frame(500, 3)
+    f.iloc[100:103, f.columns.get_loc('close')] = np.nan
+    f.iloc[250, f.columns.get_loc('high')] = np.nan
+    vs = ['ma_close_5', 'ma_close_20', 'highest_high_10', 'highest_high_20',
+          'lowest_low_10']
+    f = vrunplan(f, vcompile(vs))
+    expected = {'ma_close_5'      : f['close'].rolling(5).mean(),
+                'ma_close_20'     : f['close'].rolling(20).mean(),
+                'highest_high_10' : f['high'].rolling(10).max(),
+                'highest_high_20' : f['high'].rolling(20).max(),
+                'lowest_low_10'   : f['low'].rolling(10).min()}
+    for v, column in expected.items():
+        np.testing.assert_allclose(f[v].values, column.values, rtol=1e-12,
+                                   equal_nan=True)
+
+
+#
+# Expressions of the compiled expression tests
+#
+
+EXPRESSIONS = ['close > close[1]',
+               'high[2] - low[1]',
+               'abs(close - open) / close[1]',
+               'close > open & volume > 2000',
+               '(close > open) | (close < close[3])',
+               'close - open > 0.1 | high - low < 1',
+               '~(close > open)',
+               'close > open and volume > 2000',
+               'close > open or not volume > 2000',
+               'low < close < high',
+               'low[1] <= close < high[1]']
+
+
+#
+# Function eval_frame
+#
+
+def eval_frame(f, expr):
+    r"""Evaluate an expression with pandas.eval on lagged columns."""
+    f = f.copy()
+    def lag_column(match):
+        name, lag = match.group(1), int(match.group(2))
+        column = '%s_lag%d' % (name, lag)
+        f[column] = f[name].shift(lag)
+        return column
+    expr = re.sub(r'(\w+)\[(\d+)\]', lag_column, expr)
+    return f.eval(expr, engine='python')
+
+
+#
+# Function test_vexpression_matches_pandas_eval
+#
+
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_vexpression_matches_pandas_eval(expr):
+    f = price_frame(80, 5)
+    f.iloc[10, f.columns.get_loc('close')] = np.nan
+    expected = eval_frame(f, expr)
+    vexpr = VExpression(expr)
+    assert vexpr.code is not None
+    for compiled in [vexpr, pickle.loads(pickle.dumps(vexpr))]:
+        actual = compiled.evaluate(f)
+        np.testing.assert_allclose(np.asarray(actual, dtype=float),
+                                   np.asarray(expected, dtype=float),
+                                   equal_nan=True)
+
+
+#
+# Function test_vcompile_substitutes_and_lags
+#
+
+def test_vcompile_substitutes_and_lags():
+    Variable.variables.pop('testup', None)
+    Variable('testup', 'close > ma_close_10 & close[1] > open[1]')
+    try:
+        f = vrunplan(price_frame(80, 6), vcompile(['testup_20[2]']))
+    finally:
+        Variable.variables.pop('testup', None)
+    expected = eval_frame(f, 'close > ma_close_20 & close[1] > open[1]')
+    np.testing.assert_array_equal(f['testup_20'].values, expected.values)
+    pd.testing.assert_series_equal(f['testup_20[2]'],
+                                   f['testup_20'].shift(2), check_names=False)
+
+
+#
+# Function test_directional_indicators
+#
+
+def test_directional_indicators():
+    f = price_frame(300, 8)
+    vs = ['truerange', 'dmplus', 'dminus', 'diplus', 'diminus_10', 'adx_20']
+    f = vrunplan(f, vcompile(vs))
+    # the definitions of the indicators, one column at a time
+    high, low = f['high'], f['low']
+    th = high.where(high > low.shift(1), low.shift(1))
+    tl = low.where(low < high.shift(1), high.shift(1))
+    tr = th - tl
+    up = high - high.shift(1)
+    down = low.shift(1) - low
+    dmp = up.where((up > down) & (up > 0), 0.0)
+    dmm = down.where((down > up) & (down > 0), 0.0)
+    def di(dm, p):
+        return 100 * dm.ewm(span=p).mean() / tr.rolling(p).mean()
+    dip, dim = di(dmp, 14), di(dmm, 14)
+    expected = {'truerange'  : tr,
+                'dmplus'     : dmp,
+                'dminus'     : dmm,
+                'diplus'     : dip,
+                'diminus_10' : di(dmm, 10),
+                'adx_20'     : 100 * (dip - dim).abs().ewm(span=20).mean()
+                               / (dip + dim)}
+    for v, column in expected.items():
+        np.testing.assert_allclose(f[v].values, column.values, rtol=1e-10,
+                                   equal_nan=True)
+    # the intermediate moves are not left in the frame
+    assert 'upmove' not in f.columns and 'dmminus' not in f.columns
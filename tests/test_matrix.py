@@ -0,0 +1,65 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_matrix
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.matrix import FeatureMatrix
+
+import numpy as np
+import os
+import pytest
+
+
+#
+# Function test_feature_matrix_dtype
+#
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_feature_matrix_dtype(tmpdir, mapped):
+    directory = str(tmpdir) if mapped else None
+    rng = np.random.RandomState(7)
+    f32 = rng.rand(50, 3).astype(np.float32)
+    fm = FeatureMatrix(50, split_point=40, capacity=2, directory=directory)
+    fm.append(f32)
+    fm.append(np.arange(50, dtype=np.int16))
+    assert fm.values.dtype == np.float32
+    # wider features widen the matrix, keeping the existing columns
+    f64 = rng.rand(50, 70)
+    fm.append(f64)
+    assert fm.values.dtype == np.float64
+    assert fm.ncols == 74
+    np.testing.assert_array_equal(fm.values[:, :3], f32)
+    np.testing.assert_array_equal(fm.values[:, 3], np.arange(50))
+    np.testing.assert_array_equal(fm.values[:, 4:], f64)
+    X_train, X_test = fm.split()
+    assert X_train.shape == (40, 74) and X_test.shape == (10, 74)
+    fm.select([0, 3, 73])
+    np.testing.assert_array_equal(fm.values[:, 2], f64[:, -1])
+    fm.close()
+    assert fm.ncols == 0
+    # the temporary files are gone
+    if mapped:
+        assert os.listdir(directory) == []
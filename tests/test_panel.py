@@ -0,0 +1,66 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_panel
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+#
+# Imports
+#
+
+from alphapy.panel import Panel
+
+import numpy as np
+import pandas as pd
+
+
+#
+# Function member_frames
+#
+
+def member_frames():
+    r"""Make the frames of two members with different dates."""
+    a = pd.DataFrame({'close' : [1.0, 2.0, 3.0]},
+                     index=pd.Index(pd.date_range('2017-01-02', periods=3),
+                                    name='date'))
+    b = pd.DataFrame({'close' : [10.0, 20.0]},
+                     index=pd.Index(pd.date_range('2017-01-03', periods=2),
+                                    name='date'))
+    return [a, b]
+
+
+#
+# Function test_panel_members
+#
+
+def test_panel_members():
+    frames = member_frames()
+    panel = Panel(frames, ['a', 'b'])
+    for tag, df in zip(panel.tags, frames):
+        pd.testing.assert_frame_equal(panel.frame(tag), df, check_freq=False)
+    shifted = panel.shift('close', -1)
+    np.testing.assert_array_equal(shifted.values, [2, 3, np.nan, 20, np.nan])
+    dates = panel.dates
+    assert panel.member_count(dates >= '2017-01-04') == 2
+    assert panel.member_count(dates < '2017-01-03') == 1
+    assert panel.member_count(dates > '2017-01-04') == 0
+    np.testing.assert_array_equal(panel.member_any(dates < '2017-01-03'),
+                                  [True] * 3 + [False] * 2)
@@ -0,0 +1,107 @@
+################################################################################
+#
+# Package   : AlphaPy
+# Module    : test_stream
+# Created   : October 16, 2026
+#
+# Copyright 2017 ScottFree Analytics LLC
+# Mark Conway & Robert D. Scott II
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+################################################################################
+
+
+
+#
+# Imports
+#
+
+from alphapy.alias import Alias
+from alphapy.frame import Frame
+from alphapy.frame import frame_name
+from alphapy.group import Group
+from alphapy.market_variables import vmapply
+from alphapy.space import Space
+from alphapy.stream import stream_frame
+from alphapy.stream import vstream
+
+import numpy as np
+import pickle
+import pytest
+
+from test_market_variables import price_frame
+
+
+#
+# Variables with streams
+#
+
+VARIABLES = ['ma_close_10', 'ema_close_20', 'highest_high_20',
+             'lowest_low_20', 'net_close', 'rsi_close_14', 'truerange',
+             'atr_14', 'diplus', 'diminus_10', 'adx_14']
+
+
+#
+# Function batch_frame
+#
+
+@pytest.fixture(scope='module')
+def batch_frame():
+    r"""Apply the variables to a frame with vmapply."""
+    if 'atr' not in Alias.aliases:
+        Alias('atr', 'ma_truerange')
+    space = Space('stock', 'prices', '1d')
+    name = 'test_stream'
+    Group.groups.pop(name, None)
+    group = Group(name, space, members={'aaa'})
+    fname = frame_name('aaa', space)
+    Frame.frames.pop(fname, None)
+    f = price_frame(300, 4)
+    f.iloc[120, f.columns.get_loc('close')] = np.nan
+    Frame('aaa', space, f.copy())
+    vmapply(group, VARIABLES)
+    df = Frame.frames[fname].df
+    Group.groups.pop(name, None)
+    Frame.frames.pop(fname, None)
+    return f, df
+
+
+#
+# Function test_stream_matches_batch
+#
+
+@pytest.mark.parametrize('v', VARIABLES)
+def test_stream_matches_batch(batch_frame, v):
+    f, expected = batch_frame
+    stream = vstream(v)
+    values = []
+    for i, (date, bar) in enumerate(f.iterrows()):
+        values.append(stream.update(bar.to_dict()))
+        # a pickled stream continues with the next bar
+        if i == 150:
+            stream = pickle.loads(pickle.dumps(stream))
+    np.testing.assert_allclose(values, expected[v].values.astype(float),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+#
+# Function test_stream_frame
+#
+
+def test_stream_frame(batch_frame):
+    f, expected = batch_frame
+    new_column = stream_frame(vstream('adx_14'), f)
+    assert new_column.index.equals(f.index)
+    np.testing.assert_allclose(new_column.values, expected['adx_14'].values,
+                               rtol=1e-9, atol=1e-9, equal_nan=True)